@@ -0,0 +1,34 @@
+"""v1.0.1 添加活跃任务覆盖索引
+
+Revision ID: v101_quest_active_idx
+Revises: aedc19269759
+Create Date: 2026-10-18
+
+推荐规则召回按 (tenant_id, site_id, status) 扫描未删除任务，
+INCLUDE 召回所需列后 PostgreSQL 可走 index-only scan，避免回表。
+"""
+from alembic import op
+
+# revision identifiers
+revision = 'v101_quest_active_idx'
+down_revision = 'aedc19269759'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """添加活跃任务覆盖索引"""
+    # CONCURRENTLY 不能在事务中执行
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_quest_active
+            ON quests (tenant_id, site_id, status)
+            INCLUDE (id, display_name, name, difficulty, tags, description)
+            WHERE deleted_at IS NULL
+        """)
+
+
+def downgrade() -> None:
+    """删除索引"""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_quest_active")
@@ -0,0 +1,38 @@
+"""v1.0.2 农耕知识新增内容摘要列
+
+Revision ID: v102_knowledge_preview
+Revises: v101_quest_active_idx
+Create Date: 2026-10-18
+
+首页节气贴士只展示前 100 字摘要，写入时预先截断，
+读路径直接取 content_preview，无需每次扫描全文。
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers
+revision = 'v102_knowledge_preview'
+down_revision = 'v101_quest_active_idx'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """新增 content_preview 列并回填存量数据"""
+    op.add_column(
+        "farming_knowledge",
+        sa.Column("content_preview", sa.Text(), nullable=True, comment="内容摘要（前 100 字）"),
+    )
+    op.execute("""
+        UPDATE farming_knowledge
+        SET content_preview = CASE
+            WHEN char_length(content) > 100 THEN left(content, 100) || '...'
+            ELSE content
+        END
+    """)
+
+
+def downgrade() -> None:
+    """删除 content_preview 列"""
+    op.drop_column("farming_knowledge", "content_preview")
@@ -0,0 +1,33 @@
+"""v1.0.3 添加已发布任务排序索引
+
+Revision ID: v103_quest_published_sort
+Revises: v102_knowledge_preview
+Create Date: 2026-10-18
+
+可用任务列表按 site_id 过滤已发布、未删除任务并按 sort_order 排序，
+部分索引直接提供有序输出，省去排序步骤。
+"""
+from alembic import op
+
+# revision identifiers
+revision = 'v103_quest_published_sort'
+down_revision = 'v102_knowledge_preview'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """添加已发布任务排序索引"""
+    # CONCURRENTLY 不能在事务中执行
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_quest_site_status_sort
+            ON quests (site_id, sort_order)
+            WHERE status = 'published' AND deleted_at IS NULL
+        """)
+
+
+def downgrade() -> None:
+    """删除索引"""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_quest_site_status_sort")
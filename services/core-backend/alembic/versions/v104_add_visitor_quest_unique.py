@@ -0,0 +1,59 @@
+"""v1.0.4 游客任务进度唯一约束
+
+Revision ID: v104_visitor_quest_unique
+Revises: v103_quest_published_sort
+Create Date: 2026-10-18
+
+同一游客对同一任务只保留一条进度记录，
+开始任务改为 INSERT ... ON CONFLICT DO NOTHING 依赖该约束。
+加约束前先清理重复进度：优先保留已完成、步骤最靠后、最近开始的一条。
+"""
+from alembic import op
+
+# revision identifiers
+revision = 'v104_visitor_quest_unique'
+down_revision = 'v103_quest_published_sort'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """添加 (visitor_id, quest_id) 唯一约束"""
+    # visitor_quests 由旧版领域模型建表，可能不存在
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('visitor_quests') IS NOT NULL
+               AND NOT EXISTS (
+                   SELECT 1 FROM pg_constraint WHERE conname = 'uq_visitor_quests_visitor_quest'
+               ) THEN
+                -- 清理到加约束之间阻止并发写入产生新的重复
+                LOCK TABLE visitor_quests IN SHARE ROW EXCLUSIVE MODE;
+                DELETE FROM visitor_quests
+                WHERE id NOT IN (
+                    SELECT DISTINCT ON (visitor_id, quest_id) id
+                    FROM visitor_quests
+                    ORDER BY visitor_id, quest_id,
+                             completed_at IS NOT NULL DESC,
+                             current_step DESC NULLS LAST,
+                             started_at DESC,
+                             id DESC
+                );
+                ALTER TABLE visitor_quests
+                    ADD CONSTRAINT uq_visitor_quests_visitor_quest UNIQUE (visitor_id, quest_id);
+            END IF;
+        END $$;
+    """)
+
+
+def downgrade() -> None:
+    """删除唯一约束"""
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('visitor_quests') IS NOT NULL THEN
+                ALTER TABLE visitor_quests
+                    DROP CONSTRAINT IF EXISTS uq_visitor_quests_visitor_quest;
+            END IF;
+        END $$;
+    """)
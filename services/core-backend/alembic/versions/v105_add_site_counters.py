@@ -0,0 +1,87 @@
+"""v1.0.5 站点累计计数
+
+Revision ID: v105_site_counters
+Revises: v104_visitor_quest_unique
+Create Date: 2026-10-18
+
+新增 site_counters 分片计数表，由 visitor_profiles、conversations、
+visitor_check_ins 的 INSERT/DELETE 触发器维护，实时统计无需再对明细表 COUNT(*)。
+每次写入随机累加到 SITE_COUNTER_SHARDS 个分片之一，避免并发写入争用同一行。
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers
+revision = 'v105_site_counters'
+down_revision = 'v104_visitor_quest_unique'
+branch_labels = None
+depends_on = None
+
+# (明细表, 计数名)
+COUNTERS = [
+    ("visitor_profiles", "total_visitors"),
+    ("conversations", "total_conversations"),
+    ("visitor_check_ins", "total_checkins"),
+]
+
+SITE_COUNTER_SHARDS = 16
+
+
+def upgrade() -> None:
+    """创建分片计数表与触发器，并回填存量数据"""
+    op.create_table(
+        "site_counters",
+        sa.Column("site_id", sa.String(50), nullable=False),
+        sa.Column("counter", sa.String(32), nullable=False),
+        sa.Column("shard", sa.SmallInteger(), nullable=False),
+        sa.Column("value", sa.BigInteger(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("site_id", "counter", "shard"),
+    )
+
+    # 通用计数触发器函数，TG_ARGV[0] 为计数名
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION site_counter_trigger() RETURNS trigger AS $$
+        DECLARE
+            v_site_id varchar;
+            v_delta bigint;
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                v_site_id := NEW.site_id;
+                v_delta := 1;
+            ELSE
+                v_site_id := OLD.site_id;
+                v_delta := -1;
+            END IF;
+            INSERT INTO site_counters (site_id, counter, shard, value)
+            VALUES (v_site_id, TG_ARGV[0], floor(random() * {SITE_COUNTER_SHARDS})::smallint, v_delta)
+            ON CONFLICT (site_id, counter, shard)
+            DO UPDATE SET value = site_counters.value + EXCLUDED.value;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    for table, counter in COUNTERS:
+        # 锁住明细表的写入直到迁移事务提交：回填与建触发器之间不会漏计或重计
+        op.execute(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE")
+        op.execute(f"""
+            CREATE TRIGGER trg_{table}_site_counter
+            AFTER INSERT OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION site_counter_trigger('{counter}')
+        """)
+        op.execute(f"""
+            INSERT INTO site_counters (site_id, counter, shard, value)
+            SELECT site_id, '{counter}', 0, count(*)
+            FROM {table}
+            WHERE site_id IS NOT NULL
+            GROUP BY site_id
+        """)
+
+
+def downgrade() -> None:
+    """删除触发器与计数表"""
+    for table, _ in COUNTERS:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_site_counter ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS site_counter_trigger()")
+    op.drop_table("site_counters")
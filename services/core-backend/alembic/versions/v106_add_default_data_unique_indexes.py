@@ -0,0 +1,84 @@
+"""v1.0.6 添加默认数据唯一索引
+
+Revision ID: v106_default_data_unique
+Revises: v105_site_counters
+Create Date: 2026-10-18
+
+站点初始化以 INSERT ... ON CONFLICT DO NOTHING 写入默认 NPC、任务，
+冲突目标需要唯一索引：
+- npc_profiles (tenant_id, site_id, npc_id, version)
+- quests (tenant_id, site_id, name)
+成就沿用已有的 ix_achievements_code。
+建索引前先清理重复行：优先保留未删除（NPC 另优先启用中）且最近更新的一条。
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers
+revision = 'v106_default_data_unique'
+down_revision = 'v105_site_counters'
+branch_labels = None
+depends_on = None
+
+
+# (表, 唯一键, 保留顺序)
+DEDUPE = [
+    (
+        "npc_profiles",
+        "tenant_id, site_id, npc_id, version",
+        "active DESC, deleted_at IS NULL DESC, updated_at DESC NULLS LAST, id DESC",
+    ),
+    (
+        "quests",
+        "tenant_id, site_id, name",
+        "deleted_at IS NULL DESC, updated_at DESC NULLS LAST, id DESC",
+    ),
+]
+
+
+def _drop_invalid_index(name: str) -> None:
+    """删除此前 CONCURRENTLY 构建失败残留的 INVALID 索引，避免 IF NOT EXISTS 将其跳过"""
+    invalid = op.get_bind().scalar(
+        sa.text("""
+            SELECT 1 FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = :name AND NOT i.indisvalid
+        """),
+        {"name": name},
+    )
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def upgrade() -> None:
+    """清理重复行并添加唯一索引"""
+    for table, key, keep_order in DEDUPE:
+        op.execute(f"""
+            DELETE FROM {table}
+            WHERE id NOT IN (
+                SELECT DISTINCT ON ({key}) id
+                FROM {table}
+                ORDER BY {key}, {keep_order}
+            )
+        """)
+
+    # CONCURRENTLY 不能在事务中执行
+    with op.get_context().autocommit_block():
+        _drop_invalid_index("ux_npc_profiles_site_npc_version")
+        _drop_invalid_index("ux_quests_site_name")
+        op.execute("""
+            CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_npc_profiles_site_npc_version
+            ON npc_profiles (tenant_id, site_id, npc_id, version)
+        """)
+        op.execute("""
+            CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_quests_site_name
+            ON quests (tenant_id, site_id, name)
+        """)
+
+
+def downgrade() -> None:
+    """删除唯一索引"""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ux_quests_site_name")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ux_npc_profiles_site_npc_version")
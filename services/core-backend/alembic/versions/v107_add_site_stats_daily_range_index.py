@@ -0,0 +1,39 @@
+"""v1.0.7 添加站点每日统计区间索引
+
+Revision ID: v107_site_stats_range
+Revises: v106_default_data_unique
+Create Date: 2026-10-18
+
+站点统计按 site_id 与 stat_date 区间读取并按日期排序，
+(site_id, stat_date) 复合索引提供范围扫描与有序输出；
+INCLUDE 汇总字段后逐日数据与合计查询可走 index-only scan（PostgreSQL 11+）。
+"""
+from alembic import op
+
+# revision identifiers
+revision = 'v107_site_stats_range'
+down_revision = 'v106_default_data_unique'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """添加站点统计区间索引"""
+    # CONCURRENTLY 不能在事务中执行
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_site_stats_daily_site_date
+            ON site_stats_daily (site_id, stat_date)
+            INCLUDE (
+                visitor_uv, visitor_pv, new_visitors,
+                quest_started, quest_completed,
+                npc_conversations, npc_messages,
+                achievements_unlocked, check_ins
+            )
+        """)
+
+
+def downgrade() -> None:
+    """删除索引"""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_site_stats_daily_site_date")
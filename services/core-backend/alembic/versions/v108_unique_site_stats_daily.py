@@ -0,0 +1,74 @@
+"""v1.0.8 站点每日统计唯一索引
+
+Revision ID: v108_site_stats_unique
+Revises: v107_site_stats_range
+Create Date: 2026-10-18
+
+每日统计快照以 INSERT ... ON CONFLICT (site_id, stat_date) DO NOTHING 写入，
+冲突目标需要唯一索引。先清理重复快照（每个站点每天保留最新一条），
+再新建唯一覆盖索引，最后删除 v1.0.7 的同列普通索引。
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers
+revision = 'v108_site_stats_unique'
+down_revision = 'v107_site_stats_range'
+branch_labels = None
+depends_on = None
+
+INCLUDE_COLUMNS = """
+    visitor_uv, visitor_pv, new_visitors,
+    quest_started, quest_completed,
+    npc_conversations, npc_messages,
+    achievements_unlocked, check_ins
+"""
+
+
+def _drop_invalid_index(name: str) -> None:
+    """删除此前 CONCURRENTLY 构建失败残留的 INVALID 索引，避免 IF NOT EXISTS 将其跳过"""
+    invalid = op.get_bind().scalar(
+        sa.text("""
+            SELECT 1 FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = :name AND NOT i.indisvalid
+        """),
+        {"name": name},
+    )
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def upgrade() -> None:
+    """以唯一索引替换站点统计区间索引"""
+    # 每个 (site_id, stat_date) 保留最新写入的快照
+    op.execute("""
+        DELETE FROM site_stats_daily
+        WHERE id NOT IN (
+            SELECT DISTINCT ON (site_id, stat_date) id
+            FROM site_stats_daily
+            ORDER BY site_id, stat_date, created_at DESC NULLS LAST, id DESC
+        )
+    """)
+
+    # CONCURRENTLY 不能在事务中执行
+    with op.get_context().autocommit_block():
+        _drop_invalid_index("ux_site_stats_daily_site_date")
+        op.execute(f"""
+            CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ux_site_stats_daily_site_date
+            ON site_stats_daily (site_id, stat_date)
+            INCLUDE ({INCLUDE_COLUMNS})
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_site_stats_daily_site_date")
+
+
+def downgrade() -> None:
+    """恢复普通区间索引"""
+    with op.get_context().autocommit_block():
+        op.execute(f"""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_site_stats_daily_site_date
+            ON site_stats_daily (site_id, stat_date)
+            INCLUDE ({INCLUDE_COLUMNS})
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ux_site_stats_daily_site_date")
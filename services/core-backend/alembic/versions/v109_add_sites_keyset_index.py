@@ -0,0 +1,33 @@
+"""v1.0.9 添加站点键集分页索引
+
+Revision ID: v109_sites_keyset
+Revises: v108_site_stats_unique
+Create Date: 2026-10-18
+
+站点列表按 (created_at DESC, id DESC) 键集分页，
+(tenant_id, created_at DESC, id DESC) 复合索引使每页都是一次索引范围扫描，
+与翻页深度无关。
+"""
+from alembic import op
+
+# revision identifiers
+revision = 'v109_sites_keyset'
+down_revision = 'v108_site_stats_unique'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """添加键集分页索引"""
+    # CONCURRENTLY 不能在事务中执行
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sites_tenant_created_id
+            ON sites (tenant_id, created_at DESC, id DESC)
+        """)
+
+
+def downgrade() -> None:
+    """删除索引"""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_sites_tenant_created_id")
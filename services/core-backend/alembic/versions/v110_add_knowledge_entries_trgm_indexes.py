@@ -0,0 +1,39 @@
+"""v1.1.0 添加知识条目三元组索引
+
+Revision ID: v110_knowledge_trgm
+Revises: v109_sites_keyset
+Create Date: 2026-10-18
+
+knowledge.search 工具以 ILIKE '%...%' 匹配标题与正文，前导通配符无法使用 B-tree 索引，
+pg_trgm GIN 索引可直接支持该匹配，避免全表扫描。
+"""
+from alembic import op
+
+# revision identifiers
+revision = 'v110_knowledge_trgm'
+down_revision = 'v109_sites_keyset'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """添加三元组索引"""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # CONCURRENTLY 不能在事务中执行
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_knowledge_entries_title_trgm
+            ON knowledge_entries USING GIN (title gin_trgm_ops)
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_knowledge_entries_content_trgm
+            ON knowledge_entries USING GIN (content gin_trgm_ops)
+        """)
+
+
+def downgrade() -> None:
+    """删除索引"""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_knowledge_entries_content_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_knowledge_entries_title_trgm")
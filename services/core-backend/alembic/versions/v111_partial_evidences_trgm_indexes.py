@@ -0,0 +1,58 @@
+"""v1.1.1 证据三元组索引改为部分索引
+
+Revision ID: v111_evidences_trgm_live
+Revises: v110_knowledge_trgm
+Create Date: 2026-10-18
+
+retrieve_evidence 的 pg_trgm / LIKE 检索都只查未删除的证据（deleted_at IS NULL），
+将 title / excerpt 的 GIN 三元组索引改为同条件的部分索引，已删除行不再占用索引；
+另加 (tenant_id, site_id) 部分 B-tree 索引，供按站点过滤的证据查询使用。
+"""
+from alembic import op
+
+# revision identifiers
+revision = 'v111_evidences_trgm_live'
+down_revision = 'v110_knowledge_trgm'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """以部分索引替换全表三元组索引"""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # CONCURRENTLY 不能在事务中执行；先建新索引再删旧索引，期间检索始终有索引可用
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_evidences_title_trgm_live
+            ON evidences USING GIN (title gin_trgm_ops)
+            WHERE deleted_at IS NULL
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_evidences_excerpt_trgm_live
+            ON evidences USING GIN (excerpt gin_trgm_ops)
+            WHERE deleted_at IS NULL
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_evidences_tenant_site_live
+            ON evidences (tenant_id, site_id)
+            WHERE deleted_at IS NULL
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_evidences_title_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_evidences_excerpt_trgm")
+
+
+def downgrade() -> None:
+    """恢复全表三元组索引"""
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_evidences_title_trgm
+            ON evidences USING GIN (title gin_trgm_ops)
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_evidences_excerpt_trgm
+            ON evidences USING GIN (excerpt gin_trgm_ops)
+        """)
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_evidences_tenant_site_live")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_evidences_excerpt_trgm_live")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_evidences_title_trgm_live")
@@ -5,6 +5,7 @@
 from fastapi import APIRouter
 
 from app.database.health import check_db_health
+from app.services.vector_store import get_vector_store
 
 router = APIRouter()
 
@@ -41,6 +42,21 @@ async def readiness_check():
     return {"ready": True}
 
 
+@router.get("/vector")
+async def vector_health_check():
+    """
+    向量库健康检查
+
+    返回 Qdrant 连接状态
+    """
+    healthy = await get_vector_store().health_check()
+
+    return {
+        "status": "healthy" if healthy else "unhealthy",
+        "service": "qdrant",
+    }
+
+
 @router.get("/live")
 async def liveness_check():
     """
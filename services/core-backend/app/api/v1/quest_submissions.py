@@ -23,6 +23,7 @@ from app.db import get_db
 from app.database.models.quest_submission import QuestSubmission
 from app.database.models import VisitorProfile
 from app.services.achievement_service import check_achievements_for_user
+from app.services.recommendation import invalidate_home_context
 
 logger = structlog.get_logger(__name__)
 
@@ -308,6 +309,7 @@ async def approve_submission(
             if profile:
                 profile.quest_completed_count += 1
                 await db.commit()
+                await invalidate_home_context(scope.tenant_id, scope.site_id, user_id)
                 log.info("visitor_profile_updated", user_id=str(user_id), quest_completed_count=profile.quest_completed_count)
             
             # 触发成就检查
@@ -12,7 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db, get_current_user, TenantContext, get_tenant_context
 from app.database.models import User
-from app.services.site_manager import SiteManager
+from app.services.site_manager import SiteManager, decode_site_cursor
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
@@ -93,6 +93,7 @@ class SiteListResponse(BaseModel):
     total: int
     limit: int
     offset: int
+    next_cursor: Optional[str] = None
 
 
 # ============================================================
@@ -104,17 +105,24 @@ async def list_sites(
     status: Optional[str] = Query(None, pattern=r"^(active|maintenance|disabled)$"),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页返回的 next_cursor），优先于 offset"),
     tenant_ctx: TenantContext = Depends(get_tenant_context),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """列出站点"""
+    try:
+        cursor_key = decode_site_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
     manager = SiteManager(db)
-    sites, total = await manager.list_sites(
+    sites, total, next_cursor = await manager.list_sites(
         tenant_id=tenant_ctx.tenant_id,
         status=status,
         limit=limit,
         offset=offset,
+        cursor=cursor_key,
     )
 
     return SiteListResponse(
@@ -122,6 +130,7 @@ async def list_sites(
         total=total,
         limit=limit,
         offset=offset,
+        next_cursor=next_cursor,
     )
 
 
@@ -136,7 +145,7 @@ async def create_site(
     manager = SiteManager(db)
 
     # 检查是否已存在
-    existing = await manager.get_site(request.site_id)
+    existing = await manager.get_site_columns(request.site_id, ("id",))
     if existing:
         raise HTTPException(status_code=400, detail="Site ID already exists")
 
@@ -15,10 +15,16 @@ from app.core.rbac import ViewerOrAbove
 from app.core.tenant_scope import RequiredScope
 from app.db import get_db
 from app.database.models import SolarTerm, FarmingKnowledge
+from app.services.cache import CacheKeys, get_cache
 
 router = APIRouter()
 
 
+async def _invalidate_knowledge_cache(tenant_id: str, site_id: str) -> None:
+    """农耕知识变更后清除首页推荐使用的节气知识缓存"""
+    await get_cache().delete_pattern(CacheKeys.farming_knowledge_pattern(tenant_id, site_id))
+
+
 # ============ Schemas ============
 
 class SolarTermResponse(BaseModel):
@@ -219,6 +225,7 @@ async def create_farming_knowledge(
     db.add(knowledge)
     await db.commit()
     await db.refresh(knowledge)
+    await _invalidate_knowledge_cache(scope.tenant_id, scope.site_id)
     return knowledge
 
 
@@ -272,6 +279,7 @@ async def update_farming_knowledge(
     
     await db.commit()
     await db.refresh(knowledge)
+    await _invalidate_knowledge_cache(scope.tenant_id, scope.site_id)
     return knowledge
 
 
@@ -297,6 +305,7 @@ async def delete_farming_knowledge(
     
     await db.delete(knowledge)
     await db.commit()
+    await _invalidate_knowledge_cache(scope.tenant_id, scope.site_id)
 
 
 @router.get("/farming-knowledge/by-term/{term_code}", response_model=List[FarmingKnowledgeResponse], tags=["farming-knowledge"])
@@ -35,6 +35,7 @@ from app.database.models import (
     VisitorInteraction,
 )
 from app.services.achievement_service import check_achievements_for_user
+from app.services.recommendation import invalidate_home_context
 from app.database.models import User
 from app.db.session import get_db
 
@@ -407,6 +408,8 @@ async def create_check_in(
     
     await db.commit()
     await db.refresh(db_check_in)
+    if profile.user_id:
+        await invalidate_home_context(scope.tenant_id, scope.site_id, profile.user_id)
     
     # v0.2.0: 触发成就检查
     if profile.user_id:
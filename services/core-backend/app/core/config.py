@@ -42,9 +42,15 @@ class Settings(BaseSettings):
     DB_MAX_OVERFLOW: int = 10
     DB_POOL_TIMEOUT: int = 30
     DB_POOL_RECYCLE: int = 1800  # 30 分钟
+    # asyncpg 每个连接缓存的预编译语句数（0 表示关闭缓存）
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 500
+    # SQLAlchemy 编译缓存条目数，SQL 文本稳定后预编译语句缓存才能命中
+    DB_QUERY_CACHE_SIZE: int = 1200
 
     # Redis 配置
     REDIS_URL: str = "redis://localhost:6379/0"
+    # 只读工具结果缓存 TTL（秒），0 表示关闭
+    TOOL_RESULT_CACHE_TTL: int = 60
 
     # JWT 配置
     JWT_SECRET_KEY: str = "your-super-secret-jwt-key-change-in-production"
@@ -82,6 +88,10 @@ class Settings(BaseSettings):
     QDRANT_URL: str = "http://localhost:6333"
     QDRANT_HOST: str = "localhost"
     QDRANT_PORT: int = 6333
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_PREFER_GRPC: bool = True  # 向量读写走 gRPC/protobuf，避免 JSON 序列化浮点数组
+    QDRANT_TIMEOUT: int = 5  # 单次请求超时（秒）
+    VECTOR_SEARCH_MIN_QUERY_LEN: int = 2  # 短于该长度的查询不做语义检索（中文双字词仍可检索）
     QDRANT_COLLECTION: str = "yantian_evidence"
     QDRANT_ENABLED: bool = True
 
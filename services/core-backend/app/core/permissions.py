@@ -5,8 +5,8 @@
 """
 
 from enum import Enum
-from functools import wraps
-from typing import Callable, List
+from functools import lru_cache, wraps
+from typing import Callable, FrozenSet, List, Optional, Tuple
 
 from fastapi import HTTPException, status
 
@@ -135,6 +135,28 @@ def has_permission(user: User, permission: Permission) -> bool:
     return False
 
 
+@lru_cache(maxsize=4096)
+def missing_permission(
+    role: str,
+    extra_permissions: FrozenSet[str],
+    required: Tuple[Permission, ...],
+) -> Optional[str]:
+    """
+    返回首个缺失的权限，全部满足时返回 None
+
+    结果只取决于角色、额外权限和所需权限，按三者缓存（含拒绝结果）；
+    用户角色或额外权限变化时键随之变化，无需显式失效
+    """
+    if role == UserRole.SUPER_ADMIN:
+        return None
+
+    role_perms = ROLE_PERMISSIONS.get(role, [])
+    for permission in required:
+        if permission not in role_perms and permission.value not in extra_permissions:
+            return permission.value
+    return None
+
+
 def require_permission(*permissions: Permission):
     """
     权限检查装饰器
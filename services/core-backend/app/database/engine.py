@@ -9,6 +9,8 @@
 - pool_timeout: 获取连接的超时时间（秒）
 - pool_recycle: 连接回收时间（秒），防止数据库断开空闲连接
 - pool_pre_ping: 每次获取连接前检测连接是否有效
+- prepared_statement_cache_size: 每个连接缓存的预编译语句数，热点查询只需解析/规划一次
+- query_cache_size: SQLAlchemy 编译缓存大小，固定形状的语句复用同一 SQL 文本
 """
 
 from typing import AsyncGenerator
@@ -59,11 +61,25 @@ def _get_pool_config() -> dict:
     }
 
 
+def _get_connect_args() -> dict:
+    """
+    获取 asyncpg 连接参数
+
+    asyncpg 对每条语句都会预编译，这里放大语句缓存，
+    使服务中形状固定的热点查询在连接生命周期内复用同一执行计划
+    """
+    return {
+        "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    }
+
+
 # 创建异步引擎（带连接池）
 engine: AsyncEngine = create_async_engine(
     _build_database_url(),
     echo=settings.DEBUG,
     pool_pre_ping=True,
+    query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    connect_args=_get_connect_args(),
     **_get_pool_config(),
 )
 
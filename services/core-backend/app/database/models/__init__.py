@@ -5,7 +5,7 @@
 """
 
 from app.database.models.tenant import Tenant
-from app.database.models.site import Site, SiteStatsDaily
+from app.database.models.site import Site, SiteCounter, SiteStatsDaily
 from app.database.models.user import User
 from app.database.models.content import Content, ContentStatus
 from app.database.models.npc_profile import NPCProfile
@@ -51,6 +51,7 @@ __all__ = [
     "Tenant",
     "Site",
     "SiteStatsDaily",
+    "SiteCounter",
     "User",
     # Content
     "Content",
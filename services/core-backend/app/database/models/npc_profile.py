@@ -7,7 +7,7 @@ NPC 人设模型
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import Boolean, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -30,6 +30,14 @@ class NPCProfile(Base, TenantMixin, AuditMixin):
     """
 
     __tablename__ = "npc_profiles"
+    __table_args__ = (
+        # 站点初始化写入默认 NPC 时的冲突目标
+        Index(
+            "ux_npc_profiles_site_npc_version",
+            "tenant_id", "site_id", "npc_id", "version",
+            unique=True,
+        ),
+    )
 
     # 主键（每个版本一个 ID）
     id: Mapped[str] = mapped_column(
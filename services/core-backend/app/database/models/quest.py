@@ -5,7 +5,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING, List, Optional
 
-from sqlalchemy import Boolean, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -20,6 +20,10 @@ class Quest(Base, TenantMixin, AuditMixin):
     """
 
     __tablename__ = "quests"
+    __table_args__ = (
+        # 站点初始化写入默认任务时的冲突目标
+        Index("ux_quests_site_name", "tenant_id", "site_id", "name", unique=True),
+    )
 
     # 主键
     id: Mapped[str] = mapped_column(
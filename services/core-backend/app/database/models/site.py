@@ -8,7 +8,7 @@ from datetime import date, datetime
 from typing import TYPE_CHECKING, List, Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import Date, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import BigInteger, Date, Float, ForeignKey, Index, Integer, SmallInteger, String, Text
 from sqlalchemy.dialects.postgresql import JSONB, UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -93,6 +93,21 @@ class SiteStatsDaily(Base):
     """
 
     __tablename__ = "site_stats_daily"
+    __table_args__ = (
+        # 站点统计按日期区间读取：覆盖索引支持 index-only scan 且结果天然有序；
+        # 唯一性保证每个站点每天只有一条快照
+        Index(
+            "ux_site_stats_daily_site_date",
+            "site_id", "stat_date",
+            unique=True,
+            postgresql_include=[
+                "visitor_uv", "visitor_pv", "new_visitors",
+                "quest_started", "quest_completed",
+                "npc_conversations", "npc_messages",
+                "achievements_unlocked", "check_ins",
+            ],
+        ),
+    )
 
     id: Mapped[UUID] = mapped_column(
         PGUUID(as_uuid=True),
@@ -141,3 +156,24 @@ class SiteStatsDaily(Base):
 
     def __repr__(self) -> str:
         return f"<SiteStatsDaily(site_id={self.site_id}, date={self.stat_date})>"
+
+
+class SiteCounter(Base):
+    """
+    站点累计计数（分片）
+
+    由明细表 INSERT/DELETE 触发器维护：每次写入随机落到一个分片行上累加，
+    避免所有写入争用同一行；读取时按 counter 求和
+    不建外键，计数写入不依赖站点行
+    """
+
+    __tablename__ = "site_counters"
+
+    site_id: Mapped[str] = mapped_column(String(50), primary_key=True)
+    # total_visitors | total_conversations | total_checkins
+    counter: Mapped[str] = mapped_column(String(32), primary_key=True)
+    shard: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, server_default="0", nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<SiteCounter(site_id={self.site_id}, counter={self.counter}, shard={self.shard})>"
@@ -17,10 +17,13 @@ from sqlalchemy import (
     Text,
     func,
 )
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
 from app.database.base import Base
 
+# 农耕知识摘要长度（字符）
+PREVIEW_LENGTH = 100
+
 
 class SolarTerm(Base):
     """二十四节气表（全局数据，不分租户）"""
@@ -82,6 +85,9 @@ class FarmingKnowledge(Base):
     # 内容
     title: Mapped[str] = mapped_column(String(200), comment="标题")
     content: Mapped[str] = mapped_column(Text, comment="内容")
+    content_preview: Mapped[Optional[str]] = mapped_column(
+        Text, nullable=True, comment="内容摘要（前 100 字）"
+    )
     media_urls: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True, comment="图片/视频 URL")
     related_pois: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True, comment="关联兴趣点")
     
@@ -101,5 +107,13 @@ class FarmingKnowledge(Base):
         Index("ix_farming_knowledge_category", "category"),
     )
 
+    @validates("content")
+    def _sync_content_preview(self, key: str, content: str) -> str:
+        """写入内容时同步生成摘要"""
+        self.content_preview = (
+            content[:PREVIEW_LENGTH] + "..." if len(content) > PREVIEW_LENGTH else content
+        )
+        return content
+
     def __repr__(self) -> str:
         return f"<FarmingKnowledge(id={self.id}, title={self.title})>"
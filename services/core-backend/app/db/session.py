@@ -16,6 +16,10 @@ engine = create_async_engine(
     pool_pre_ping=True,
     pool_size=10,
     max_overflow=20,
+    query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    connect_args={
+        "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    },
 )
 
 async_session_maker = async_sessionmaker(
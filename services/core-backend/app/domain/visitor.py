@@ -8,7 +8,7 @@ from datetime import datetime
 from typing import Any, Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy import DateTime, ForeignKey, Integer, String, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -46,6 +46,9 @@ class VisitorQuest(Base):
     """游客任务进度"""
 
     __tablename__ = "visitor_quests"
+    __table_args__ = (
+        UniqueConstraint("visitor_id", "quest_id", name="uq_visitor_quests_visitor_quest"),
+    )
 
     id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), primary_key=True, default=uuid4)
     visitor_id: Mapped[UUID] = mapped_column(
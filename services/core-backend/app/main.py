@@ -15,18 +15,37 @@ from typing import AsyncGenerator
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api import router as api_router
 from app.core.config import settings
 from app.core.logging import setup_logging
 from app.db.session import engine
+from app.middleware.request_cache import RequestCacheMiddleware
+from app.services.mcp_registry import get_mcp_registry
+from app.services.tool_call_log_writer import get_tool_call_log_writer
+from app.services.vector_store import get_vector_store
+from app.tools.audit_writer import get_trace_ledger_writer
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """应用生命周期管理"""
     setup_logging()
+    # 冻结 MCP 工具注册表，预计算工具列表索引
+    get_mcp_registry().finalize()
+    # 工具调用审计日志后台批量写入
+    log_writer = get_tool_call_log_writer()
+    log_writer.start()
+    trace_writer = get_trace_ledger_writer()
+    trace_writer.start()
+    # 预热向量库连接，首个检索请求不再承担建连开销
+    if settings.QDRANT_ENABLED:
+        await get_vector_store().warmup()
     yield
+    await log_writer.flush_on_shutdown()
+    await trace_writer.flush_on_shutdown()
+    await get_vector_store().close()
     await engine.dispose()
 
 
@@ -39,8 +58,12 @@ def create_app() -> FastAPI:
         docs_url="/docs" if settings.DEBUG else None,
         redoc_url="/redoc" if settings.DEBUG else None,
         lifespan=lifespan,
+        # 响应体统一用 orjson 编码
+        default_response_class=ORJSONResponse,
     )
 
+    app.add_middleware(RequestCacheMiddleware)
+
     app.add_middleware(
         CORSMiddleware,
         allow_origins=settings.CORS_ORIGINS,
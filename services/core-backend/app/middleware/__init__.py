@@ -1,15 +1,18 @@
 """
 中间件模块
 
-提供 Prometheus 指标、限流、日志等中间件
+提供 Prometheus 指标、限流、请求级缓存、日志等中间件
 """
 
 from app.middleware.metrics import MetricsMiddleware, metrics_endpoint
 from app.middleware.rate_limit import RateLimitMiddleware, rate_limit
+from app.middleware.request_cache import RequestCacheMiddleware, get_request_cache
 
 __all__ = [
     "MetricsMiddleware",
     "metrics_endpoint",
     "RateLimitMiddleware",
     "rate_limit",
+    "RequestCacheMiddleware",
+    "get_request_cache",
 ]
@@ -0,0 +1,45 @@
+"""
+请求级缓存中间件
+
+为每个 HTTP 请求提供独立的内存缓存，用于在同一请求内去重数据库读取。
+缓存随请求结束丢弃，无需跨请求失效。
+"""
+
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+_request_cache: ContextVar[Optional[dict[str, dict[Any, Any]]]] = ContextVar(
+    "request_cache", default=None
+)
+
+
+def get_request_cache(namespace: str) -> Optional[dict[Any, Any]]:
+    """
+    获取当前请求指定命名空间的缓存
+
+    不在请求上下文中（脚本、后台任务）时返回 None，调用方应直接查询
+    """
+    cache = _request_cache.get()
+    if cache is None:
+        return None
+    return cache.setdefault(namespace, {})
+
+
+class RequestCacheMiddleware:
+    """请求级缓存中间件（纯 ASGI 实现，与端点运行在同一上下文）"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _request_cache.set({})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_cache.reset(token)
@@ -115,7 +115,7 @@ class AchievementService:
                 UserAchievement.site_id == self.site_id,
             )
         )
-        return {row[0] for row in result.all()}
+        return set(result.scalars().all())
 
     async def _check_rule(
         self,
@@ -0,0 +1,164 @@
+"""
+审计记录异步批量写入器
+
+审计记录不需要与请求响应同步落库：调用方把记录放入队列立即返回，
+后台任务按批（数量或时间窗口先到者）合并为一条多行 INSERT 写入；
+整批写入失败时退回逐条写入，只丢弃出错的记录。
+"""
+
+import asyncio
+from typing import Any, ClassVar, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.dml import Insert
+
+from app.core.logging import get_logger
+from app.db.session import async_session_maker
+
+logger = get_logger(__name__)
+
+# 单批最多写入的记录条数
+BATCH_SIZE = 100
+# 攒批时间窗口（秒）
+FLUSH_INTERVAL = 0.05
+# 队列上限，超出时由调用方同步写入
+MAX_QUEUE_SIZE = 10000
+
+
+class BatchInsertWriter:
+    """批量写入器基类，子类指定写入的 ORM 模型"""
+
+    model: ClassVar[Any]
+
+    def __init__(
+        self,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        max_queue_size: int = MAX_QUEUE_SIZE,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """后台写入任务是否在运行"""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """启动后台写入任务（应用启动时调用）"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, record: Dict[str, Any]) -> bool:
+        """
+        提交一条记录（键为模型属性名）
+
+        Returns:
+            是否已入队；未启动或队列已满时返回 False，调用方应自行同步写入
+        """
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            logger.warning("batch_insert_queue_full", table=self.model.__tablename__)
+            return False
+        return True
+
+    async def flush_on_shutdown(self) -> None:
+        """停止后台任务并写完队列中剩余的记录（应用关闭时调用）"""
+        if not self.running:
+            return
+        # None 作为结束标记，排在已入队记录之后
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        """按批消费队列"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            record = await self._queue.get()
+            if record is None:
+                break
+
+            batch = [record]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    record = await asyncio.wait_for(self._queue.get(), timeout)
+                except TimeoutError:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+
+            await self._write(batch)
+
+    def _statement(self) -> Insert:
+        """批量写入使用的 INSERT 语句"""
+        return insert(self.model)
+
+    async def _insert(self, session: AsyncSession, batch: List[Dict[str, Any]]) -> None:
+        """在给定会话中执行一批写入"""
+        await session.execute(self._statement(), batch)
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        """一条多行 INSERT 写入一批记录，失败时退回逐条写入"""
+        try:
+            async with async_session_maker() as session:
+                await self._insert(session, batch)
+                await session.commit()
+            return
+        except Exception as e:
+            logger.error(
+                "batch_insert_write_error",
+                table=self.model.__tablename__,
+                count=len(batch),
+                error=str(e),
+            )
+        if len(batch) > 1:
+            await self._write_rows(batch)
+
+    async def _write_rows(self, batch: List[Dict[str, Any]]) -> None:
+        """逐条写入：每条记录一个 SAVEPOINT，单条失败不影响同批其他记录"""
+        failed = 0
+        try:
+            async with async_session_maker() as session:
+                for record in batch:
+                    try:
+                        async with session.begin_nested():
+                            await self._insert(session, [record])
+                    except Exception as e:
+                        failed += 1
+                        logger.error(
+                            "batch_insert_row_error",
+                            table=self.model.__tablename__,
+                            error=str(e),
+                        )
+                await session.commit()
+        except Exception as e:
+            logger.error(
+                "batch_insert_write_error",
+                table=self.model.__tablename__,
+                count=len(batch),
+                error=str(e),
+            )
+            return
+        if failed:
+            logger.warning(
+                "batch_insert_rows_dropped",
+                table=self.model.__tablename__,
+                count=failed,
+            )
@@ -115,19 +115,20 @@ class MultiLevelCache:
         """生成完整的缓存 key"""
         return f"{self.config.prefix}:{key}"
 
-    async def get(self, key: str) -> Optional[Any]:
+    async def get(self, key: str, use_l1: bool = True) -> Optional[Any]:
         """
         获取缓存值
 
-        查询顺序: L1 -> L2 -> None
+        查询顺序: L1 -> L2 -> None；use_l1=False 时只读 L2，也不回填 L1
         """
         full_key = self._make_key(key)
 
         # L1: 本地缓存
-        value = self._l1.get(full_key)
-        if value is not None:
-            logger.debug("cache_hit", level="L1", key=key)
-            return value
+        if use_l1:
+            value = self._l1.get(full_key)
+            if value is not None:
+                logger.debug("cache_hit", level="L1", key=key)
+                return value
 
         # L2: Redis 缓存
         try:
@@ -136,7 +137,8 @@ class MultiLevelCache:
             if raw_value is not None:
                 value = json.loads(raw_value)
                 # 回填 L1
-                self._l1.set(full_key, value)
+                if use_l1:
+                    self._l1.set(full_key, value)
                 logger.debug("cache_hit", level="L2", key=key)
                 return value
         except Exception as e:
@@ -151,16 +153,18 @@ class MultiLevelCache:
         value: Any,
         l1_ttl: Optional[int] = None,
         l2_ttl: Optional[int] = None,
+        use_l1: bool = True,
     ) -> None:
         """
         设置缓存值
 
-        同时写入 L1 和 L2
+        同时写入 L1 和 L2；use_l1=False 时只写 L2
         """
         full_key = self._make_key(key)
 
         # L1: 本地缓存
-        self._l1.set(full_key, value, l1_ttl or self.config.l1_ttl)
+        if use_l1:
+            self._l1.set(full_key, value, l1_ttl or self.config.l1_ttl)
 
         # L2: Redis 缓存
         try:
@@ -216,11 +220,14 @@ class MultiLevelCache:
         factory: Callable[[], Any],
         l1_ttl: Optional[int] = None,
         l2_ttl: Optional[int] = None,
+        use_l1: bool = True,
     ) -> Any:
         """
         获取缓存，如果不存在则调用 factory 生成并缓存
+
+        需要跨进程立即失效的数据传 use_l1=False：L1 无法被其他 worker 清除，只走 Redis
         """
-        value = await self.get(key)
+        value = await self.get(key, use_l1=use_l1)
         if value is not None:
             return value
 
@@ -231,7 +238,7 @@ class MultiLevelCache:
             value = factory()
 
         if value is not None:
-            await self.set(key, value, l1_ttl, l2_ttl)
+            await self.set(key, value, l1_ttl, l2_ttl, use_l1=use_l1)
 
         return value
 
@@ -320,6 +327,15 @@ class CacheKeys:
     SOLAR_TERM_CURRENT = "solar_term:current"
     SOLAR_TERM_ALL = "solar_term:all"
 
+    # 节气农耕知识
+    @staticmethod
+    def solar_term_knowledge(tenant_id: str, site_id: str, term_code: str) -> str:
+        return f"farming_knowledge:{tenant_id}:{site_id}:{term_code}"
+
+    @staticmethod
+    def farming_knowledge_pattern(tenant_id: str, site_id: str) -> str:
+        return f"farming_knowledge:{tenant_id}:{site_id}:*"
+
     # NPC
     @staticmethod
     def npc_persona(npc_id: str) -> str:
@@ -339,6 +355,10 @@ class CacheKeys:
     def visitor_context(visitor_id: str) -> str:
         return f"context:{visitor_id}"
 
+    @staticmethod
+    def home_context(tenant_id: str, site_id: str, visitor_id: Optional[str], bucket: int) -> str:
+        return f"context:home:{tenant_id}:{site_id}:{visitor_id or 'anonymous'}:{bucket}"
+
     # 站点配置
     @staticmethod
     def site_config(site_id: str) -> str:
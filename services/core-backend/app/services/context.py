@@ -94,7 +94,7 @@ class ContextService:
             select(VisitorProfile).where(
                 VisitorProfile.tenant_id == tenant_id,
                 VisitorProfile.site_id == site_id,
-                VisitorProfile.visitor_id == visitor_id,
+                VisitorProfile.user_id == visitor_id,
             )
         )
         profile = profile_result.scalar_one_or_none()
@@ -122,7 +122,7 @@ class ContextService:
                 VisitorTag.visitor_id == visitor_id,
             )
         )
-        tags = [row[0] for row in tags_result.fetchall()]
+        tags = list(tags_result.scalars().all())
 
         # 获取最近完成的任务
         recent_quests_result = await self.session.execute(
@@ -137,7 +137,7 @@ class ContextService:
             .order_by(QuestSubmission.updated_at.desc())
             .limit(5)
         )
-        recent_quests = [row[0] for row in recent_quests_result.fetchall()]
+        recent_quests = list(recent_quests_result.scalars().all())
 
         # 获取已解锁成就
         achievements_result = await self.session.execute(
@@ -151,7 +151,7 @@ class ContextService:
             .order_by(UserAchievement.unlocked_at.desc())
             .limit(10)
         )
-        unlocked_achievements = [row[0] for row in achievements_result.fetchall()]
+        unlocked_achievements = list(achievements_result.scalars().all())
 
         return {
             "is_anonymous": False,
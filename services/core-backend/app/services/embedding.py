@@ -5,6 +5,7 @@
 """
 
 import hashlib
+from collections import OrderedDict
 from typing import Optional
 
 import httpx
@@ -15,6 +16,9 @@ from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# 向量缓存最大条目数（LRU 淘汰）
+EMBEDDING_CACHE_SIZE = 4096
+
 
 class EmbeddingConfig(BaseModel):
     """Embedding 配置"""
@@ -29,7 +33,8 @@ class EmbeddingService:
 
     def __init__(self, config: Optional[EmbeddingConfig] = None):
         self.config = config or EmbeddingConfig()
-        self._cache: dict[str, list[float]] = {}
+        # LRU 缓存：热门查询（NPC 问候模板、节气名等）命中时跳过 Embedding API 往返
+        self._cache: OrderedDict[str, list[float]] = OrderedDict()
 
     async def embed_text(self, text: str, use_cache: bool = True) -> list[float]:
         """
@@ -47,15 +52,17 @@ class EmbeddingService:
 
         # 缓存检查
         cache_key = self._get_cache_key(text)
-        if use_cache and cache_key in self._cache:
-            return self._cache[cache_key]
+        if use_cache:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
 
         # 调用 Embedding API
         vector = await self._call_embedding_api([text])
         if vector:
             result = vector[0]
             if use_cache:
-                self._cache[cache_key] = result
+                self._cache_put(cache_key, result)
             return result
 
         return [0.0] * self.config.dimensions
@@ -87,9 +94,9 @@ class EmbeddingService:
                 results.append([0.0] * self.config.dimensions)
                 continue
 
-            cache_key = self._get_cache_key(text)
-            if use_cache and cache_key in self._cache:
-                results.append(self._cache[cache_key])
+            cached = self._cache_get(self._get_cache_key(text)) if use_cache else None
+            if cached is not None:
+                results.append(cached)
             else:
                 results.append([])  # 占位
                 texts_to_embed.append((i, text))
@@ -112,8 +119,7 @@ class EmbeddingService:
                         results[original_idx] = vector
 
                         if use_cache:
-                            cache_key = self._get_cache_key(original_text)
-                            self._cache[cache_key] = vector
+                            self._cache_put(self._get_cache_key(original_text), vector)
 
         # 填充失败的向量
         for i, result in enumerate(results):
@@ -214,9 +220,24 @@ class EmbeddingService:
             return []
 
     def _get_cache_key(self, text: str) -> str:
-        """生成缓存 key"""
-        content = f"{self.config.provider}:{self.config.model}:{text}"
-        return hashlib.md5(content.encode()).hexdigest()
+        """生成缓存 key（去首尾空白、转小写、合并连续空白后哈希）"""
+        normalized = " ".join(text.lower().split())
+        content = f"{self.config.provider}:{self.config.model}:{normalized}"
+        return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+    def _cache_get(self, cache_key: str) -> Optional[list[float]]:
+        """读取缓存并标记为最近使用"""
+        vector = self._cache.get(cache_key)
+        if vector is not None:
+            self._cache.move_to_end(cache_key)
+        return vector
+
+    def _cache_put(self, cache_key: str, vector: list[float]) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        self._cache[cache_key] = vector
+        self._cache.move_to_end(cache_key)
+        if len(self._cache) > EMBEDDING_CACHE_SIZE:
+            self._cache.popitem(last=False)
 
     def clear_cache(self):
         """清空缓存"""
@@ -4,6 +4,8 @@
 结合向量相似度和规则引擎，实现智能推荐。
 """
 
+import asyncio
+import heapq
 from typing import Any, Optional
 from uuid import UUID
 
@@ -18,6 +20,57 @@ from app.core.logging import get_logger
 logger = get_logger(__name__)
 
 
+# 规则打分参数
+_RULE_BASE_SCORE = 0.5
+_RULE_TAG_BONUS = 0.2
+_RULE_DIFFICULTY_BONUS = 0.1
+
+
+def _score_rule_quest(
+    quest_tags: Optional[list[str]],
+    difficulty: Optional[str],
+    user_tags: frozenset[str],
+    completed: int,
+) -> tuple[float, str]:
+    """
+    规则打分内核
+
+    纯函数，不访问 ORM / 上下文字典；用户侧数据由调用方在循环外预先计算。
+
+    Returns:
+        (分数, 推荐理由)
+    """
+    score = _RULE_BASE_SCORE
+    reason = "推荐任务"
+
+    # 标签匹配
+    if user_tags and quest_tags:
+        matched = user_tags.intersection(quest_tags)
+        if matched:
+            score += _RULE_TAG_BONUS
+            reason = f"符合您的兴趣：{'、'.join(matched)}"
+
+    # 难度匹配
+    if completed < 3 and difficulty == "easy":
+        score += _RULE_DIFFICULTY_BONUS
+        reason = "适合新手的任务"
+    elif completed >= 5 and difficulty == "hard":
+        score += _RULE_DIFFICULTY_BONUS
+        reason = "挑战性任务"
+
+    return score, reason
+
+
+async def _empty_recall() -> list["QuestRecommendation"]:
+    """未启用的召回通道"""
+    return []
+
+
+def _score_desc(rec: "QuestRecommendation") -> float:
+    """按分数降序排列的排序键"""
+    return -rec.score
+
+
 class QuestRecommendation:
     """任务推荐结果"""
 
@@ -30,14 +83,23 @@ class QuestRecommendation:
         score: float,
         reason: str,
         source: str,  # "vector" | "rule" | "hybrid"
+        description_limit: Optional[int] = None,
     ):
         self.quest_id = quest_id
         self.title = title
-        self.description = description
         self.difficulty = difficulty
         self.score = score
         self.reason = reason
         self.source = source
+        # 截断延迟到读取时，重排后被丢弃的候选不产生切片
+        self._description = description
+        self._description_limit = description_limit
+
+    @property
+    def description(self) -> str:
+        if self._description_limit is None:
+            return self._description
+        return self._description[: self._description_limit]
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -62,13 +124,21 @@ class ContentRecommendation:
         score: float,
         snippet: str,
         source: str,
+        snippet_limit: Optional[int] = None,
     ):
         self.content_id = content_id
         self.title = title
         self.content_type = content_type
         self.score = score
-        self.snippet = snippet
         self.source = source
+        self._snippet = snippet
+        self._snippet_limit = snippet_limit
+
+    @property
+    def snippet(self) -> str:
+        if self._snippet_limit is None:
+            return self._snippet
+        return self._snippet[: self._snippet_limit]
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -126,40 +196,34 @@ class HybridRecommender:
                 site_id=site_id,
             )
 
-        # 向量召回
-        vector_results = []
-        if strategy in ["vector", "hybrid"]:
-            vector_results = await self._vector_recall_quests(
+        # 向量召回只访问向量库，规则召回只访问数据库，两者并行执行；
+        # 同一时刻只有规则召回使用 session，不存在并发共享会话的问题
+        vector_results, rule_results = await asyncio.gather(
+            self._vector_recall_quests(
                 context=context,
                 tenant_id=tenant_id,
                 site_id=site_id,
                 top_k=top_k * 2,  # 多召回一些用于过滤
             )
-
-        # 规则召回
-        rule_results = []
-        if strategy in ["rule", "hybrid"]:
-            rule_results = await self._rule_recall_quests(
+            if strategy in ["vector", "hybrid"]
+            else _empty_recall(),
+            self._rule_recall_quests(
                 visitor_id=visitor_id,
                 context=context,
                 tenant_id=tenant_id,
                 site_id=site_id,
                 top_k=top_k * 2,
             )
+            if strategy in ["rule", "hybrid"]
+            else _empty_recall(),
+        )
 
-        # 合并和去重
-        seen_ids = set()
-        all_results = []
-
-        for r in vector_results:
-            if r.quest_id not in seen_ids:
-                seen_ids.add(r.quest_id)
-                all_results.append(r)
-
-        for r in rule_results:
-            if r.quest_id not in seen_ids:
-                seen_ids.add(r.quest_id)
-                all_results.append(r)
+        # 合并和去重：两路结果均按分数降序，归并时同分优先保留向量召回
+        rule_results.sort(key=_score_desc)
+        merged: dict[str, QuestRecommendation] = {}
+        for r in heapq.merge(vector_results, rule_results, key=_score_desc):
+            merged.setdefault(r.quest_id, r)
+        all_results = list(merged.values())
 
         # 重排序
         all_results = self._rerank_quests(all_results, context)
@@ -173,8 +237,9 @@ class HybridRecommender:
         site_id: str,
         top_k: int,
     ) -> list[QuestRecommendation]:
-        """向量召回任务"""
-        results = []
+        """向量召回任务（按分数降序返回）"""
+        # 小顶堆，最多保留 top_k 个候选
+        heap: list[tuple[float, int, QuestRecommendation]] = []
 
         # 构建查询
         query_parts = []
@@ -207,22 +272,31 @@ class HybridRecommender:
                 score_threshold=0.3,
             )
 
-            for r in search_results:
-                results.append(
+            for counter, r in enumerate(search_results):
+                if len(heap) >= top_k and (not heap or r.score <= heap[0][0]):
+                    continue
+                entry = (
+                    r.score,
+                    -counter,
                     QuestRecommendation(
                         quest_id=r.id,
                         title=r.metadata.get("title", ""),
-                        description=r.content[:100],
+                        description=r.content,
                         difficulty=r.metadata.get("difficulty", "medium"),
                         score=r.score,
                         reason=f"与您的兴趣相关（相似度 {r.score:.0%}）",
                         source="vector",
-                    )
+                        description_limit=100,
+                    ),
                 )
+                if len(heap) < top_k:
+                    heapq.heappush(heap, entry)
+                else:
+                    heapq.heappushpop(heap, entry)
         except Exception as e:
             logger.warning("vector_recall_quests_error", error=str(e))
 
-        return results
+        return [rec for _, _, rec in sorted(heap, reverse=True)]
 
     async def _rule_recall_quests(
         self,
@@ -236,40 +310,39 @@ class HybridRecommender:
         results = []
 
         # 查询活跃任务
-        query = select(Quest).where(
+        # 仅选取召回所需列，命中覆盖索引 idx_quest_active（index-only scan）
+        query = select(
+            Quest.id,
+            Quest.name,
+            Quest.display_name,
+            Quest.description,
+            Quest.difficulty,
+            Quest.tags,
+        ).where(
             Quest.tenant_id == tenant_id,
             Quest.site_id == site_id,
             Quest.status == "active",
+            Quest.deleted_at.is_(None),
         ).limit(top_k)
 
         result = await self.session.execute(query)
-        quests = result.scalars().all()
+        quests = result.all()
 
-        for quest in quests:
-            score = 0.5  # 基础分
-            reason = "推荐任务"
+        # 循环不变量：用户标签与完成数只计算一次
+        user_tags: frozenset[str] = frozenset()
+        completed = 0
+        if context:
+            user_ctx = context.get("user", {})
+            user_tags = frozenset(user_ctx.get("tags", []))
+            completed = user_ctx.get("stats", {}).get("quest_completed_count", 0)
 
-            # 根据上下文调整分数
+        for quest in quests:
             if context:
-                user_ctx = context.get("user", {})
-                env_ctx = context.get("environment", {})
-
-                # 标签匹配
-                user_tags = set(user_ctx.get("tags", []))
-                quest_tags = set(quest.tags or [])
-                if user_tags & quest_tags:
-                    score += 0.2
-                    reason = f"符合您的兴趣：{'、'.join(user_tags & quest_tags)}"
-
-                # 难度匹配
-                stats = user_ctx.get("stats", {})
-                completed = stats.get("quest_completed_count", 0)
-                if completed < 3 and quest.difficulty == "easy":
-                    score += 0.1
-                    reason = "适合新手的任务"
-                elif completed >= 5 and quest.difficulty == "hard":
-                    score += 0.1
-                    reason = "挑战性任务"
+                score, reason = _score_rule_quest(
+                    quest.tags, quest.difficulty, user_tags, completed
+                )
+            else:
+                score, reason = _RULE_BASE_SCORE, "推荐任务"
 
             results.append(
                 QuestRecommendation(
@@ -329,8 +402,9 @@ class HybridRecommender:
                         title=r.metadata.get("title", ""),
                         content_type=r.metadata.get("type", "unknown"),
                         score=r.score,
-                        snippet=r.content[:200],
+                        snippet=r.content,
                         source="vector",
+                        snippet_limit=200,
                     )
                 )
         except Exception as e:
@@ -357,29 +431,68 @@ class HybridRecommender:
         Returns:
             相似内容列表
         """
-        results = []
+        return await self.find_similar_multi(
+            content,
+            collections=[collection],
+            top_k=top_k,
+            exclude_id=exclude_id,
+        )
+
+    async def find_similar_multi(
+        self,
+        content: str,
+        collections: list[str],
+        top_k: int = 5,
+        exclude_id: Optional[str] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        跨多个 Collection 查找相似内容
 
-        try:
-            search_results = await self.vector_store.search(
-                collection_name=collection,
-                query=content,
-                top_k=top_k + 1,  # 多取一个以便排除自身
-                score_threshold=0.5,
-            )
+        各 Collection 并行检索，按分数全局取 top_k。
 
-            for r in search_results:
-                if exclude_id and r.id == exclude_id:
-                    continue
-                results.append({
-                    "id": r.id,
-                    "score": r.score,
-                    "content": r.content[:200],
-                    "metadata": r.metadata,
-                })
-                if len(results) >= top_k:
-                    break
+        Args:
+            content: 内容文本
+            collections: Collection 名称列表
+            top_k: 返回数量
+            exclude_id: 排除的 ID
 
+        Returns:
+            相似内容列表（按分数降序）
+        """
+        try:
+            # 内容只向量化一次，各 Collection 复用同一查询向量
+            query_vector = await self.vector_store.embedding_service.embed_text(content)
+            searches = await asyncio.gather(
+                *(
+                    self.vector_store.search(
+                        collection_name=collection,
+                        query=content,
+                        top_k=top_k + 1,  # 多取一个以便排除自身
+                        score_threshold=0.5,
+                        query_vector=query_vector,
+                    )
+                    for collection in collections
+                )
+            )
         except Exception as e:
             logger.warning("find_similar_error", error=str(e))
-
-        return results
+            return []
+
+        candidates = (
+            (collection, r)
+            for collection, search_results in zip(collections, searches, strict=True)
+            for r in search_results
+            if not (exclude_id and r.id == exclude_id)
+        )
+        top = heapq.nlargest(top_k, candidates, key=lambda item: item[1].score)
+
+        return [
+            {
+                "id": r.id,
+                "score": r.score,
+                "content": r.content[:200],
+                "metadata": r.metadata,
+                "collection": collection,
+            }
+            for collection, r in top
+        ]
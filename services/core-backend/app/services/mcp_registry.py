@@ -6,10 +6,59 @@ MCP 工具注册表
 """
 
 from dataclasses import dataclass, field
-from typing import Any, Callable, Dict, List, Optional, Type
-from pydantic import BaseModel
+from datetime import date
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Literal, Mapping, Optional, Tuple, Type
+from uuid import UUID
+from pydantic import BaseModel, ConfigDict, create_model
 import json
 
+from app.core.permissions import Permission
+
+# JSON Schema 类型 / format -> Python 类型
+_JSON_SCHEMA_TYPES: Dict[str, Any] = {
+    "string": str,
+    "integer": int,
+    "number": float,
+    "boolean": bool,
+    "object": Dict[str, Any],
+}
+_JSON_SCHEMA_FORMATS: Dict[str, Any] = {
+    "uuid": UUID,
+    "date": date,
+}
+
+
+def _schema_type(schema: Dict[str, Any]) -> Any:
+    """将单个属性的 JSON Schema 映射为 Python 类型"""
+    json_type = schema.get("type")
+    if json_type == "string" and schema.get("format") in _JSON_SCHEMA_FORMATS:
+        return _JSON_SCHEMA_FORMATS[schema["format"]]
+    if json_type == "array":
+        return List[_schema_type(schema.get("items", {}))]
+    return _JSON_SCHEMA_TYPES.get(json_type, Any)
+
+
+def _compile_input_validator(
+    name: str,
+    input_schema: Dict[str, Any],
+) -> Optional[Type[BaseModel]]:
+    """将工具输入的 JSON Schema 编译为 Pydantic 模型（注册时编译一次，校验由 pydantic-core 执行）"""
+    properties = input_schema.get("properties")
+    if input_schema.get("type") != "object" or not properties:
+        return None
+    required = set(input_schema.get("required", ()))
+    fields = {
+        prop: (_schema_type(schema), ...) if prop in required
+        else (Optional[_schema_type(schema)], schema.get("default"))
+        for prop, schema in properties.items()
+    }
+    return create_model(
+        f"{name.replace('.', '_')}_input",
+        __config__=ConfigDict(extra="allow"),
+        **fields,
+    )
+
 
 @dataclass
 class MCPToolDefinition:
@@ -39,6 +88,24 @@ class MCPToolDefinition:
     # 是否可被 AI 直接调用
     ai_callable: bool = True
 
+    # 审计策略：always 每次调用都记录；failures_only 仅记录失败调用（无副作用的只读工具）；never 不记录
+    audit_policy: Literal["always", "failures_only", "never"] = "always"
+
+    # 注册时解析好的权限枚举（未知权限忽略）
+    resolved_permissions: Tuple[Permission, ...] = field(init=False, default=(), repr=False)
+
+    # 注册时由 input_schema 编译的参数校验模型
+    input_validator: Optional[Type[BaseModel]] = field(init=False, default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        # 未知权限跳过
+        self.resolved_permissions = tuple(
+            Permission(perm_str)
+            for perm_str in self.required_permissions
+            if perm_str in Permission._value2member_map_
+        )
+        self.input_validator = _compile_input_validator(self.name, self.input_schema)
+
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式（用于 API 响应）"""
         return {
@@ -63,12 +130,19 @@ class MCPToolRegistry:
     _tools: Dict[str, MCPToolDefinition] = {}
     _handlers: Dict[str, Callable] = {}
 
+    # finalize() 预计算的只读索引；register() 后置空，下次查询时重建
+    _all: Optional[Tuple[MCPToolDefinition, ...]] = None
+    _ai_callable: Tuple[MCPToolDefinition, ...] = ()
+    _by_category: Mapping[str, Tuple[MCPToolDefinition, ...]] = MappingProxyType({})
+    _ai_callable_by_category: Mapping[str, Tuple[MCPToolDefinition, ...]] = MappingProxyType({})
+
     def __new__(cls) -> "MCPToolRegistry":
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._tools = {}
             cls._instance._handlers = {}
             cls._instance._register_builtin_tools()
+            cls._instance.finalize()
         return cls._instance
 
     def _register_builtin_tools(self) -> None:
@@ -164,6 +238,7 @@ class MCPToolRegistry:
                 category="npc",
                 tags=["npc", "persona"],
                 ai_callable=True,
+                audit_policy="failures_only",
             )
         )
 
@@ -201,6 +276,7 @@ class MCPToolRegistry:
                 category="scene",
                 tags=["scene", "location"],
                 ai_callable=True,
+                audit_policy="failures_only",
             )
         )
 
@@ -335,10 +411,38 @@ class MCPToolRegistry:
         definition: MCPToolDefinition,
         handler: Optional[Callable] = None,
     ) -> None:
-        """注册工具"""
+        """注册工具（会使 finalize() 生成的索引失效）"""
         self._tools[definition.name] = definition
         if handler:
             self._handlers[definition.name] = handler
+        self._all = None
+
+    def finalize(self) -> None:
+        """
+        冻结当前工具集合，预计算列表索引
+
+        应用启动完成注册后调用；之后 list_tools 直接返回预计算的元组。
+        """
+        all_tools = tuple(self._tools.values())
+        ai_callable = tuple(t for t in all_tools if t.ai_callable)
+
+        by_category: Dict[str, List[MCPToolDefinition]] = {}
+        for tool in all_tools:
+            by_category.setdefault(tool.category, []).append(tool)
+
+        self._ai_callable = ai_callable
+        self._by_category = MappingProxyType(
+            {c: tuple(ts) for c, ts in by_category.items()}
+        )
+        self._ai_callable_by_category = MappingProxyType(
+            {c: tuple(t for t in ts if t.ai_callable) for c, ts in by_category.items()}
+        )
+        self._all = all_tools
+
+    @property
+    def tools(self) -> Mapping[str, MCPToolDefinition]:
+        """只读的工具定义视图"""
+        return MappingProxyType(self._tools)
 
     def get(self, name: str) -> Optional[MCPToolDefinition]:
         """获取工具定义"""
@@ -352,17 +456,16 @@ class MCPToolRegistry:
         self,
         category: Optional[str] = None,
         ai_callable_only: bool = False,
-    ) -> List[MCPToolDefinition]:
+    ) -> Tuple[MCPToolDefinition, ...]:
         """列出所有工具"""
-        tools = list(self._tools.values())
+        if self._all is None:
+            self.finalize()
 
         if category:
-            tools = [t for t in tools if t.category == category]
-
-        if ai_callable_only:
-            tools = [t for t in tools if t.ai_callable]
+            index = self._ai_callable_by_category if ai_callable_only else self._by_category
+            return index.get(category, ())
 
-        return tools
+        return self._ai_callable if ai_callable_only else self._all
 
     def to_openai_tools(self) -> List[Dict[str, Any]]:
         """转换为 OpenAI function calling 格式"""
@@ -375,8 +478,7 @@ class MCPToolRegistry:
                     "parameters": tool.input_schema,
                 },
             }
-            for tool in self._tools.values()
-            if tool.ai_callable
+            for tool in self.list_tools(ai_callable_only=True)
         ]
 
 
@@ -4,7 +4,7 @@ NPC 服务
 处理 NPC 相关业务逻辑，包括调用 AI Orchestrator 进行对话
 """
 
-from typing import Any, Optional
+from typing import Any, Optional, Sequence
 from uuid import UUID
 
 import httpx
@@ -14,9 +14,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
 from app.core.logging import get_logger
 from app.domain.npc import NPC
+from app.services.cache import LocalCache
 
 logger = get_logger(__name__)
 
+# NPC 热点只读列缓存（人设、问候语等很少变更）
+NPC_LITE_CACHE_TTL = 30
+_npc_lite_cache = LocalCache(max_size=1000, default_ttl=NPC_LITE_CACHE_TTL)
+
 
 class NPCService:
     """NPC 业务服务"""
@@ -31,6 +36,42 @@ class NPCService:
         )
         return result.scalar_one_or_none()
 
+    async def get_npc_lite(
+        self,
+        npc_id: UUID,
+        cols: Sequence[str],
+    ) -> Optional[dict[str, Any]]:
+        """
+        仅获取 NPC 的指定列
+
+        结果按 (npc_id, cols) 在进程内缓存 NPC_LITE_CACHE_TTL 秒。
+
+        Args:
+            npc_id: NPC ID
+            cols: 列名列表
+
+        Returns:
+            列名到值的字典，NPC 不存在时返回 None
+        """
+        cache_key = f"{npc_id}:{','.join(cols)}"
+        cached = _npc_lite_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        result = await self.db.execute(
+            select(*(getattr(NPC, c) for c in cols)).where(
+                NPC.id == npc_id,
+                NPC.deleted_at.is_(None),
+            )
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+
+        data = dict(row._mapping)
+        _npc_lite_cache.set(cache_key, data)
+        return data
+
     async def get_npc_by_name(self, site_id: str, name: str) -> Optional[NPC]:
         """根据名称获取 NPC"""
         result = await self.db.execute(
@@ -55,7 +96,7 @@ class NPCService:
 
         调用 AI Orchestrator 服务处理对话
         """
-        npc = await self.get_npc(npc_id)
+        npc = await self.get_npc_lite(npc_id, ("persona", "fallback_responses"))
         if not npc:
             raise ValueError(f"NPC not found: {npc_id}")
 
@@ -66,7 +107,7 @@ class NPCService:
                     f"{settings.AI_ORCHESTRATOR_URL}/api/v1/chat",
                     json={
                         "npc_id": str(npc_id),
-                        "npc_persona": npc.persona,
+                        "npc_persona": npc["persona"],
                         "message": message,
                         "session_id": session_id,
                         "visitor_id": str(visitor_id) if visitor_id else None,
@@ -85,7 +126,7 @@ class NPCService:
                     status_code=e.response.status_code,
                 )
                 # 返回兜底响应
-                fallback = npc.fallback_responses or ["抱歉，我现在无法回答这个问题。"]
+                fallback = npc["fallback_responses"] or ["抱歉，我现在无法回答这个问题。"]
                 return {
                     "content": fallback[0],
                     "npc_id": str(npc_id),
@@ -95,7 +136,7 @@ class NPCService:
 
             except httpx.RequestError as e:
                 logger.error("ai_orchestrator_connection_error", error=str(e))
-                fallback = npc.fallback_responses or ["抱歉，系统暂时无法响应。"]
+                fallback = npc["fallback_responses"] or ["抱歉，系统暂时无法响应。"]
                 return {
                     "content": fallback[0],
                     "npc_id": str(npc_id),
@@ -109,11 +150,11 @@ class NPCService:
         context: Optional[dict[str, Any]] = None,
     ) -> str:
         """获取 NPC 问候语"""
-        npc = await self.get_npc(npc_id)
+        npc = await self.get_npc_lite(npc_id, ("greeting_templates",))
         if not npc:
             return "你好！"
 
-        templates = npc.greeting_templates or []
+        templates = npc["greeting_templates"] or []
         if templates:
             # TODO: 根据上下文选择合适的问候语
             return templates[0]
@@ -4,11 +4,15 @@
 处理任务进度、验证、奖励等业务逻辑
 """
 
+import asyncio
+from math import asin, cos, radians, sin, sqrt
 from typing import Any, List, Optional
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.core.logging import get_logger
 from app.domain.quest import Quest, QuestStep
@@ -16,6 +20,44 @@ from app.domain.visitor import Visitor, VisitorQuest
 
 logger = get_logger(__name__)
 
+EARTH_RADIUS_M = 6371000  # 地球半径（米）
+
+# 围栏目标数超过该值时在工作线程中校验
+BATCH_VALIDATION_THRESHOLD = 256
+
+
+def _within_radius(
+    lat: float,
+    lng: float,
+    target_lat: float,
+    target_lng: float,
+    radius: float,
+) -> bool:
+    """判断坐标是否落在目标点半径范围内（haversine 距离）"""
+    lat1, lat2 = radians(lat), radians(target_lat)
+    dlat = lat2 - lat1
+    # 纬度差对应的经线弧长是球面距离的下界，明显超出半径时无需三角运算
+    if abs(dlat) * EARTH_RADIUS_M > radius:
+        return False
+    dlon = radians(target_lng) - radians(lng)
+    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * asin(sqrt(a)) <= radius
+
+
+def _within_any(
+    lat: float,
+    lng: float,
+    targets: List[dict[str, Any]],
+    default_radius: float,
+) -> bool:
+    """判断坐标是否落在任一目标点半径范围内"""
+    return any(
+        _within_radius(
+            lat, lng, t["lat"], t["lng"], t.get("radius_meters", default_radius)
+        )
+        for t in targets
+    )
+
 
 class QuestService:
     """研学任务服务"""
@@ -29,6 +71,7 @@ class QuestService:
         visitor_id: Optional[UUID] = None,
     ) -> List[Quest]:
         """获取可用任务列表"""
+        # 由部分索引 ix_quest_site_status_sort 提供有序输出
         query = select(Quest).where(
             Quest.site_id == site_id,
             Quest.status == "published",
@@ -47,26 +90,22 @@ class QuestService:
         quest_id: UUID,
     ) -> VisitorQuest:
         """开始任务"""
-        # 检查是否已开始
-        existing = await self.db.execute(
-            select(VisitorQuest).where(
-                VisitorQuest.visitor_id == visitor_id,
-                VisitorQuest.quest_id == quest_id,
+        # INSERT ... ON CONFLICT DO NOTHING：一次往返完成查重与写入，并发重复开始不会触发唯一约束错误
+        result = await self.db.execute(
+            pg_insert(VisitorQuest)
+            .values(
+                visitor_id=visitor_id,
+                quest_id=quest_id,
+                status="in_progress",
+                current_step=1,
             )
+            .on_conflict_do_nothing(index_elements=["visitor_id", "quest_id"])
+            .returning(VisitorQuest)
         )
-        if existing.scalar_one_or_none():
+        visitor_quest = result.scalar_one_or_none()
+        if visitor_quest is None:
             raise ValueError("Quest already started")
 
-        visitor_quest = VisitorQuest(
-            visitor_id=visitor_id,
-            quest_id=quest_id,
-            status="in_progress",
-            current_step=1,
-        )
-        self.db.add(visitor_quest)
-        await self.db.flush()
-        await self.db.refresh(visitor_quest)
-
         logger.info("quest_started", visitor_id=str(visitor_id), quest_id=str(quest_id))
         return visitor_quest
 
@@ -77,18 +116,30 @@ class QuestService:
         step_number: int,
         answer: Optional[str] = None,
         location: Optional[dict[str, float]] = None,
+        quest: Optional[Quest] = None,
     ) -> dict[str, Any]:
-        """提交任务步骤"""
-        # 获取任务进度
-        result = await self.db.execute(
-            select(VisitorQuest).where(
-                VisitorQuest.visitor_id == visitor_id,
-                VisitorQuest.quest_id == quest_id,
+        """
+        提交任务步骤
+
+        调用方已加载任务（含步骤）时可通过 quest 传入，步骤与总数直接从内存读取
+        """
+        if quest is not None:
+            result = await self.db.execute(
+                select(VisitorQuest).where(
+                    VisitorQuest.visitor_id == visitor_id,
+                    VisitorQuest.quest_id == quest_id,
+                )
+            )
+            visitor_quest = result.scalar_one_or_none()
+            if not visitor_quest:
+                raise ValueError("Quest not started")
+
+            step = next((s for s in quest.steps if s.step_number == step_number), None)
+            total_steps = len(quest.steps)
+        else:
+            visitor_quest, step, total_steps = await self._load_step_progress(
+                visitor_id, quest_id, step_number
             )
-        )
-        visitor_quest = result.scalar_one_or_none()
-        if not visitor_quest:
-            raise ValueError("Quest not started")
 
         if visitor_quest.status == "completed":
             raise ValueError("Quest already completed")
@@ -96,20 +147,16 @@ class QuestService:
         if step_number != visitor_quest.current_step:
             raise ValueError(f"Expected step {visitor_quest.current_step}, got {step_number}")
 
-        # 获取步骤信息
-        step_result = await self.db.execute(
-            select(QuestStep).where(
-                QuestStep.quest_id == quest_id,
-                QuestStep.step_number == step_number,
-            )
-        )
-        step = step_result.scalar_one_or_none()
         if not step:
             raise ValueError(f"Step {step_number} not found")
 
         # 验证答案
         validation = step.validation or {}
-        passed = self._validate_step(validation, answer, location)
+        if len(validation.get("targets") or ()) > BATCH_VALIDATION_THRESHOLD:
+            # 大批量围栏校验放到工作线程，避免阻塞事件循环；少量目标直接内联计算
+            passed = await asyncio.to_thread(self._validate_step, validation, answer, location)
+        else:
+            passed = self._validate_step(validation, answer, location)
 
         if passed:
             # 更新进度
@@ -121,11 +168,6 @@ class QuestService:
             visitor_quest.progress = progress
 
             # 检查是否完成所有步骤
-            total_steps_result = await self.db.execute(
-                select(QuestStep).where(QuestStep.quest_id == quest_id)
-            )
-            total_steps = len(list(total_steps_result.scalars().all()))
-
             if step_number >= total_steps:
                 visitor_quest.status = "completed"
                 from datetime import datetime, timezone
@@ -143,6 +185,47 @@ class QuestService:
             "hints": step.hints if not passed else None,
         }
 
+    async def get_quest_with_steps(self, quest_id: UUID) -> Optional[Quest]:
+        """获取任务及其全部步骤"""
+        result = await self.db.execute(
+            select(Quest)
+            .options(selectinload(Quest.steps))
+            .where(Quest.id == quest_id, Quest.deleted_at.is_(None))
+        )
+        return result.scalar_one_or_none()
+
+    async def _load_step_progress(
+        self,
+        visitor_id: UUID,
+        quest_id: UUID,
+        step_number: int,
+    ) -> tuple[VisitorQuest, Optional[QuestStep], int]:
+        """一次查询取回任务进度、当前步骤与总步骤数"""
+        total_steps_query = (
+            select(func.count(QuestStep.id))
+            .where(QuestStep.quest_id == VisitorQuest.quest_id)
+            .correlate(VisitorQuest)
+            .scalar_subquery()
+        )
+        result = await self.db.execute(
+            select(VisitorQuest, QuestStep, total_steps_query.label("total_steps"))
+            .outerjoin(
+                QuestStep,
+                and_(
+                    QuestStep.quest_id == VisitorQuest.quest_id,
+                    QuestStep.step_number == step_number,
+                ),
+            )
+            .where(
+                VisitorQuest.visitor_id == visitor_id,
+                VisitorQuest.quest_id == quest_id,
+            )
+        )
+        row = result.one_or_none()
+        if not row:
+            raise ValueError("Quest not started")
+        return row.tuple()
+
     def _validate_step(
         self,
         validation: dict[str, Any],
@@ -162,17 +245,14 @@ class QuestService:
             target_lat = validation.get("lat")
             target_lng = validation.get("lng")
             radius = validation.get("radius_meters", 50)
-            # 简化的距离计算
+            # 多目标围栏：到达任一目标即通过，未单独配置半径的目标沿用步骤半径
+            targets = validation.get("targets")
+            if targets:
+                return _within_any(location["lat"], location["lng"], targets, radius)
             if target_lat and target_lng:
-                from math import radians, sin, cos, sqrt, atan2
-                R = 6371000  # 地球半径（米）
-                lat1, lon1 = radians(location["lat"]), radians(location["lng"])
-                lat2, lon2 = radians(target_lat), radians(target_lng)
-                dlat, dlon = lat2 - lat1, lon2 - lon1
-                a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-                c = 2 * atan2(sqrt(a), sqrt(1-a))
-                distance = R * c
-                return distance <= radius
+                return _within_radius(
+                    location["lat"], location["lng"], target_lat, target_lng, radius
+                )
             return False
 
         elif validation_type == "manual":
@@ -5,11 +5,20 @@
 推荐任务、话题和成就目标。
 """
 
+import asyncio
+import time
+from bisect import bisect_right
 from datetime import datetime
-from typing import Any, Optional
+from functools import lru_cache
+from itertools import chain, islice
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Iterator, Mapping, Optional, Sequence, TypeVar
 from uuid import UUID
 
-from sqlalchemy import select, func, and_, not_
+from sqlalchemy import (
+    JSON, Select, ScalarSelect, String, select, func, and_, case, cast, literal_column, not_,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database.models import (
@@ -17,13 +26,104 @@ from app.database.models import (
     VisitorTag,
     Achievement,
     UserAchievement,
+    Conversation,
     Quest,
     QuestSubmission,
     SolarTerm,
     FarmingKnowledge,
 )
+from app.services.cache import CacheKeys, get_cache
 from app.services.context import ContextService
 
+T = TypeVar("T")
+
+# 节气农耕知识缓存 TTL（秒），远小于节气约 15 天的周期
+SOLAR_TERM_KNOWLEDGE_TTL = 3600
+
+# 首页上下文缓存时间桶（秒）
+HOME_CONTEXT_BUCKET_SECONDS = 300
+
+# 首页推荐话题数量上限
+MAX_TOPICS = 5
+
+# 上下文缺省字段的共享只读空映射，避免每次调用分配临时 {}
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+# 成就事件对应的动作名称
+_ACTION_NAMES = {
+    "quest_completed": "完成任务",
+    "check_in": "打卡",
+    "npc_interaction": "与NPC对话",
+}
+
+# 时段问候
+_TIME_GREETINGS = {
+    "清晨": "早安",
+    "上午": "上午好",
+    "中午": "中午好",
+    "下午": "下午好",
+    "傍晚": "傍晚好",
+    "夜间": "晚上好",
+}
+
+# 按已完成任务数分档的结束语：0 / 1-2 / 3+
+_QUEST_COUNT_BREAKPOINTS = (1, 3)
+_QUEST_COUNT_TAILS = ("开启您的研学之旅吧", "继续探索更多精彩", "欢迎回来，资深探索者")
+
+# 任务推荐理由规则表：(已完成任务数, 难度) -> 是否命中，按顺序取第一条
+_QUEST_REASON_RULES: tuple[tuple[Callable[[int, Optional[str]], bool], str], ...] = (
+    (lambda count, difficulty: count == 0 and difficulty == "easy", "适合新手的入门任务"),
+    (lambda count, difficulty: count >= 5 and difficulty == "hard", "挑战高难度任务"),
+    (lambda count, difficulty: count >= 2 and difficulty == "medium", "进阶任务推荐"),
+)
+
+
+def _json_rows(query: Select, name: str, order_by: str, desc: bool = False) -> ScalarSelect:
+    """把查询结果聚合为 JSON 数组（保持给定排序，无结果时为空数组）"""
+    rows = query.subquery(name)
+    order = rows.c[order_by].desc() if desc else rows.c[order_by]
+    return (
+        select(
+            func.coalesce(
+                func.json_agg(aggregate_order_by(literal_column(name), order)),
+                literal_column("'[]'::json"),
+            )
+        )
+        .select_from(rows)
+        .scalar_subquery()
+    )
+
+
+@lru_cache(maxsize=256)
+def _compose_greeting(
+    time_cn: str,
+    term_name: str,
+    name: Optional[str],
+    tail: Optional[str],
+) -> str:
+    """拼接问候语，匿名游客的组合有限，结果可直接复用"""
+    greeting = f"{_TIME_GREETINGS.get(time_cn, '您好')}，{name or '欢迎来到严田'}"
+    if term_name:
+        greeting += f"，今日正值{term_name}时节"
+    if tail:
+        greeting += f"，{tail}"
+    return greeting + "！"
+
+
+async def invalidate_home_context(tenant_id: str, site_id: str, visitor_id: UUID) -> None:
+    """
+    游客画像统计变化（完成任务、打卡等）后清除其首页上下文缓存
+
+    键由时间桶确定，直接删除当前桶与上一个桶（桶边界附近或进程间时钟偏差时仍可能被读到）的键，不做模式扫描；
+    该缓存只存 Redis（不进本地 L1），删除后所有 worker 立即读到新数据
+    """
+    cache = get_cache()
+    bucket = int(time.time() // HOME_CONTEXT_BUCKET_SECONDS)
+    await asyncio.gather(*(
+        cache.delete(CacheKeys.home_context(tenant_id, site_id, str(visitor_id), b))
+        for b in (bucket, bucket - 1)
+    ))
+
 
 class RecommendationService:
     """推荐服务"""
@@ -44,31 +144,37 @@ class RecommendationService:
         Returns:
             包含节气贴士、推荐任务、成就提示的聚合数据
         """
-        # 构建上下文
-        context = await self.context_service.build_context(
-            tenant_id=tenant_id,
-            site_id=site_id,
-            visitor_id=visitor_id,
-        )
-
-        # 获取节气相关内容
-        solar_term_content = await self._get_solar_term_content(
-            tenant_id, site_id, context["environment"]["solar_term"]
-        )
-
-        # 获取推荐任务
-        recommended_quests = await self._get_recommended_quests(
-            tenant_id, site_id, visitor_id, context["user"]
-        )
+        # 构建上下文：画像与节气变化缓慢，按 5 分钟时间桶缓存；
+        # 只用 Redis，避免失效后其他 worker 的本地缓存仍返回旧画像
+        async def build() -> dict[str, Any]:
+            return await self.context_service.build_context(
+                tenant_id=tenant_id,
+                site_id=site_id,
+                visitor_id=visitor_id,
+            )
 
-        # 获取成就进度提示
-        achievement_hints = await self._get_achievement_hints(
-            tenant_id, site_id, visitor_id
+        bucket = int(time.time() // HOME_CONTEXT_BUCKET_SECONDS)
+        context = await get_cache().get_or_set(
+            CacheKeys.home_context(
+                tenant_id, site_id, str(visitor_id) if visitor_id else None, bucket
+            ),
+            build,
+            l2_ttl=HOME_CONTEXT_BUCKET_SECONDS,
+            use_l1=False,
         )
 
-        # 获取推荐话题
-        topics = await self._get_recommended_topics(
-            context["user"], context["environment"]
+        # 节气知识多数命中缓存，在独立会话中与任务/成就聚合查询并行；
+        # AsyncSession 不支持并发使用，因此该分支使用同源的独立会话
+        solar_term_content, (recommended_quests, achievement_hints), topics = (
+            await asyncio.gather(
+                self._with_sibling_session(
+                    lambda svc: svc._get_solar_term_content(
+                        tenant_id, site_id, context["environment"]["solar_term"]
+                    )
+                ),
+                self._get_home_widgets(tenant_id, site_id, visitor_id, context["user"]),
+                self._get_recommended_topics(context["user"], context["environment"]),
+            )
         )
 
         return {
@@ -79,6 +185,45 @@ class RecommendationService:
             "greeting": self._generate_greeting(context),
         }
 
+    async def _with_sibling_session(
+        self,
+        fn: Callable[["RecommendationService"], Awaitable[T]],
+    ) -> T:
+        """在绑定同一引擎的独立只读会话中执行子查询"""
+        async with AsyncSession(bind=self.session.bind, expire_on_commit=False) as session:
+            return await fn(RecommendationService(session))
+
+    async def _get_home_widgets(
+        self,
+        tenant_id: str,
+        site_id: str,
+        visitor_id: Optional[UUID],
+        user_context: dict[str, Any],
+    ) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        """
+        一次往返取回推荐任务与成就提示
+
+        由 PostgreSQL 以 json_build_object + json_agg 组装两个组件的数据，
+        Python 侧只补充推荐理由与提示文案
+        """
+        quests_query = self._recommended_quests_query(tenant_id, site_id, visitor_id)
+        widgets = {"recommended_quests": _json_rows(quests_query, "quests", "sort_order")}
+        if visitor_id:
+            hints_query = self._achievement_hints_query(tenant_id, site_id, visitor_id)
+            widgets["achievement_hints"] = _json_rows(
+                hints_query, "hints", "progress_pct", desc=True
+            )
+
+        result = await self.session.execute(
+            select(func.json_build_object(*chain.from_iterable(widgets.items()), type_=JSON))
+        )
+        payload = result.scalar_one()
+
+        return (
+            self._format_quests(payload["recommended_quests"], user_context),
+            self._format_hints(payload.get("achievement_hints", [])),
+        )
+
     async def _get_solar_term_content(
         self,
         tenant_id: str,
@@ -88,9 +233,43 @@ class RecommendationService:
         """获取节气相关内容"""
         term_code = solar_term.get("code")
 
-        # 获取相关农耕知识
+        # 同一节气内所有游客看到的农耕知识相同，缓存已裁剪的 JSON 结构
+        async def load() -> list[dict[str, Any]]:
+            return await self._load_solar_term_knowledge(tenant_id, site_id, term_code)
+
+        related_knowledge = await get_cache().get_or_set(
+            CacheKeys.solar_term_knowledge(tenant_id, site_id, term_code),
+            load,
+            l1_ttl=SOLAR_TERM_KNOWLEDGE_TTL,
+            l2_ttl=SOLAR_TERM_KNOWLEDGE_TTL,
+        )
+
+        cultural_customs = solar_term.get("cultural_customs") or _EMPTY
+        return {
+            "name": solar_term.get("name"),
+            "description": solar_term.get("description"),
+            "farming_advice": solar_term.get("farming_advice"),
+            "poem": solar_term.get("poem"),
+            "customs": cultural_customs.get("customs", []),
+            "foods": cultural_customs.get("foods", []),
+            "related_knowledge": related_knowledge or [],
+        }
+
+    async def _load_solar_term_knowledge(
+        self,
+        tenant_id: str,
+        site_id: str,
+        term_code: Optional[str],
+    ) -> list[dict[str, Any]]:
+        """查询节气相关农耕知识"""
+        # 只取摘要列，避免读取全文
         knowledge_result = await self.session.execute(
-            select(FarmingKnowledge)
+            select(
+                FarmingKnowledge.id,
+                FarmingKnowledge.title,
+                FarmingKnowledge.category,
+                FarmingKnowledge.content_preview,
+            )
             .where(
                 FarmingKnowledge.tenant_id == tenant_id,
                 FarmingKnowledge.site_id == site_id,
@@ -100,25 +279,17 @@ class RecommendationService:
             .order_by(FarmingKnowledge.sort_order)
             .limit(3)
         )
-        knowledge_items = knowledge_result.scalars().all()
-
-        return {
-            "name": solar_term.get("name"),
-            "description": solar_term.get("description"),
-            "farming_advice": solar_term.get("farming_advice"),
-            "poem": solar_term.get("poem"),
-            "customs": solar_term.get("cultural_customs", {}).get("customs", []),
-            "foods": solar_term.get("cultural_customs", {}).get("foods", []),
-            "related_knowledge": [
-                {
-                    "id": str(k.id),
-                    "title": k.title,
-                    "category": k.category,
-                    "content": k.content[:100] + "..." if len(k.content) > 100 else k.content,
-                }
-                for k in knowledge_items
-            ],
-        }
+        knowledge_items = knowledge_result.all()
+
+        return [
+            {
+                "id": str(k.id),
+                "title": k.title,
+                "category": k.category,
+                "content": k.content_preview,
+            }
+            for k in knowledge_items
+        ]
 
     async def _get_recommended_quests(
         self,
@@ -128,81 +299,101 @@ class RecommendationService:
         user_context: dict[str, Any],
     ) -> list[dict[str, Any]]:
         """获取推荐任务"""
-        # 获取用户已完成的任务 ID
-        completed_quest_ids = []
-        if visitor_id:
-            completed_result = await self.session.execute(
-                select(QuestSubmission.quest_id)
-                .where(
-                    QuestSubmission.tenant_id == tenant_id,
-                    QuestSubmission.site_id == site_id,
-                    QuestSubmission.visitor_id == visitor_id,
-                    QuestSubmission.status == "approved",
-                )
-            )
-            completed_quest_ids = [row[0] for row in completed_result.fetchall()]
+        result = await self.session.execute(
+            self._recommended_quests_query(tenant_id, site_id, visitor_id)
+        )
+        return self._format_quests(result.mappings().all(), user_context)
 
-        # 查询未完成的活跃任务
-        query = select(Quest).where(
+    def _recommended_quests_query(
+        self,
+        tenant_id: str,
+        site_id: str,
+        visitor_id: Optional[UUID],
+    ) -> Select:
+        """构建推荐任务查询：未完成的活跃任务，按排序取前 5 个"""
+        query = select(
+            Quest.id,
+            func.coalesce(Quest.display_name, Quest.name).label("title"),
+            Quest.description,
+            Quest.quest_type.label("type"),
+            Quest.difficulty,
+            Quest.estimated_duration_minutes.label("estimated_duration"),
+            Quest.rewards["points"].as_integer().label("reward_points"),
+            Quest.tags,
+            Quest.sort_order,
+        ).where(
             Quest.tenant_id == tenant_id,
             Quest.site_id == site_id,
             Quest.status == "active",
         )
 
-        if completed_quest_ids:
-            query = query.where(not_(Quest.id.in_(completed_quest_ids)))
-
-        query = query.order_by(Quest.sort_order).limit(5)
+        # 以 NOT EXISTS 反连接排除已完成任务：语句形状固定，无需先取回 ID 列表。
+        # 提交按会话记录，经 conversations.session_id 关联到游客
+        if visitor_id:
+            completed = (
+                select(QuestSubmission.id)
+                .join(Conversation, Conversation.session_id == QuestSubmission.session_id)
+                .where(
+                    QuestSubmission.tenant_id == tenant_id,
+                    QuestSubmission.site_id == site_id,
+                    Conversation.user_id == str(visitor_id),
+                    QuestSubmission.review_status == "approved",
+                    QuestSubmission.quest_id == cast(Quest.id, String),
+                )
+                .exists()
+            )
+            query = query.where(not_(completed))
 
-        result = await self.session.execute(query)
-        quests = result.scalars().all()
+        return query.order_by(Quest.sort_order).limit(5)
 
-        # 根据用户标签计算推荐理由
+    def _format_quests(
+        self,
+        quests: Sequence[Mapping[str, Any]],
+        user_context: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        """组装推荐任务，并根据用户标签计算推荐理由"""
         user_tags = set(user_context.get("tags", []))
-
-        recommendations = []
-        for quest in quests:
-            reason = self._calculate_quest_reason(quest, user_tags, user_context)
-            recommendations.append({
-                "id": str(quest.id),
-                "title": quest.title,
-                "description": quest.description,
-                "type": quest.type,
-                "difficulty": quest.difficulty,
-                "estimated_duration": quest.estimated_duration,
-                "reward_points": quest.reward_points,
-                "reason": reason,
-            })
-
-        return recommendations
+        stats = user_context.get("stats") or _EMPTY
+        completed_count = stats.get("quest_completed_count", 0)
+
+        return [
+            {
+                "id": str(quest["id"]),
+                "title": quest["title"],
+                "description": quest["description"],
+                "type": quest["type"],
+                "difficulty": quest["difficulty"],
+                "estimated_duration": quest["estimated_duration"],
+                "reward_points": quest["reward_points"],
+                "reason": self._calculate_quest_reason(
+                    quest["tags"], quest["difficulty"], user_tags, completed_count
+                ),
+            }
+            for quest in quests
+        ]
 
     def _calculate_quest_reason(
         self,
-        quest: Quest,
+        quest_tags: Optional[Sequence[str]],
+        difficulty: Optional[str],
         user_tags: set[str],
-        user_context: dict[str, Any],
+        completed_count: int,
     ) -> str:
         """计算任务推荐理由"""
-        quest_tags = set(quest.tags or [])
-
         # 标签匹配
-        matched_tags = user_tags & quest_tags
+        matched_tags = user_tags.intersection(quest_tags or ())
         if matched_tags:
             return f"基于您的兴趣「{'、'.join(list(matched_tags)[:2])}」推荐"
 
-        # 新手推荐
-        if user_context.get("stats", {}).get("quest_completed_count", 0) == 0:
-            if quest.difficulty == "easy":
-                return "适合新手的入门任务"
-
-        # 难度匹配
-        completed_count = user_context.get("stats", {}).get("quest_completed_count", 0)
-        if completed_count >= 5 and quest.difficulty == "hard":
-            return "挑战高难度任务"
-        elif completed_count >= 2 and quest.difficulty == "medium":
-            return "进阶任务推荐"
-
-        return "热门任务"
+        # 新手 / 难度匹配
+        return next(
+            (
+                reason
+                for matches, reason in _QUEST_REASON_RULES
+                if matches(completed_count, difficulty)
+            ),
+            "热门任务",
+        )
 
     async def _get_achievement_hints(
         self,
@@ -214,85 +405,97 @@ class RecommendationService:
         if not visitor_id:
             return []
 
-        # 获取用户已解锁的成就 ID
-        unlocked_result = await self.session.execute(
-            select(UserAchievement.achievement_id)
+        result = await self.session.execute(
+            self._achievement_hints_query(tenant_id, site_id, visitor_id)
+        )
+        return self._format_hints(result.mappings().all())
+
+    def _achievement_hints_query(
+        self,
+        tenant_id: str,
+        site_id: str,
+        visitor_id: UUID,
+    ) -> Select:
+        """构建成就提示查询：未解锁且有进度的计数型成就，按进度取前 3 个"""
+        # 按成就规则的事件类型取画像中对应的计数，进度计算、排序和截断均在数据库完成
+        event = Achievement.rule_config["event"].as_string()
+        threshold = Achievement.rule_config["threshold"].as_integer()
+        current = case(
+            (event == "quest_completed", func.coalesce(VisitorProfile.quest_completed_count, 0)),
+            (event == "check_in", func.coalesce(VisitorProfile.check_in_count, 0)),
+            # 画像没有单独的 NPC 互动计数，NPC 对话次数即 conversation_count
+            (event == "npc_interaction", func.coalesce(VisitorProfile.conversation_count, 0)),
+            else_=0,
+        )
+        progress_pct = current * 100 / threshold
+
+        # 以 NOT EXISTS 反连接排除已解锁成就
+        unlocked = (
+            select(UserAchievement.id)
             .where(
                 UserAchievement.tenant_id == tenant_id,
                 UserAchievement.site_id == site_id,
                 UserAchievement.user_id == visitor_id,
+                UserAchievement.achievement_id == Achievement.id,
             )
+            .exists()
         )
-        unlocked_ids = [row[0] for row in unlocked_result.fetchall()]
 
-        # 获取用户画像统计
-        profile_result = await self.session.execute(
-            select(VisitorProfile)
+        # 无画像时连接结果为空
+        return (
+            select(
+                Achievement.id,
+                Achievement.name,
+                Achievement.description,
+                Achievement.icon_url.label("icon"),
+                event.label("event"),
+                current.label("current"),
+                threshold.label("threshold"),
+                progress_pct.label("progress_pct"),
+            )
+            .join(
+                VisitorProfile,
+                and_(
+                    VisitorProfile.tenant_id == tenant_id,
+                    VisitorProfile.site_id == site_id,
+                    VisitorProfile.user_id == visitor_id,
+                ),
+            )
             .where(
-                VisitorProfile.tenant_id == tenant_id,
-                VisitorProfile.site_id == site_id,
-                VisitorProfile.visitor_id == visitor_id,
+                Achievement.tenant_id == tenant_id,
+                Achievement.site_id == site_id,
+                Achievement.is_active == True,
+                Achievement.rule_type == "count",
+                not_(unlocked),
+                current > 0,
+                current < threshold,
             )
-        )
-        profile = profile_result.scalar_one_or_none()
-
-        if not profile:
-            return []
-
-        # 查询未解锁的计数型成就
-        query = select(Achievement).where(
-            Achievement.tenant_id == tenant_id,
-            Achievement.site_id == site_id,
-            Achievement.is_active == True,
-            Achievement.rule_type == "count",
+            # 按进度排序，接近完成的优先
+            .order_by(progress_pct.desc())
+            .limit(3)
         )
 
-        if unlocked_ids:
-            query = query.where(not_(Achievement.id.in_(unlocked_ids)))
-
-        result = await self.session.execute(query.limit(5))
-        achievements = result.scalars().all()
-
-        hints = []
-        for ach in achievements:
-            rule_config = ach.rule_config or {}
-            event = rule_config.get("event", "")
-            threshold = rule_config.get("threshold", 0)
-
-            # 计算当前进度
-            current = 0
-            if event == "quest_completed":
-                current = profile.quest_completed_count or 0
-            elif event == "check_in":
-                current = profile.check_in_count or 0
-            elif event == "npc_interaction":
-                current = profile.npc_interaction_count or 0
-
-            if current > 0 and current < threshold:
-                progress_pct = int((current / threshold) * 100)
-                remaining = threshold - current
-                hints.append({
-                    "id": str(ach.id),
-                    "name": ach.name,
-                    "description": ach.description,
-                    "icon": ach.icon,
-                    "progress": f"{current}/{threshold}",
-                    "progress_pct": progress_pct,
-                    "hint": f"再{self._get_action_name(event)}{remaining}次即可解锁",
-                })
-
-        # 按进度排序，接近完成的优先
-        hints.sort(key=lambda x: x["progress_pct"], reverse=True)
-        return hints[:3]
+    def _format_hints(self, hints: Sequence[Mapping[str, Any]]) -> list[dict[str, Any]]:
+        """组装成就进度提示"""
+        return [
+            {
+                "id": str(hint["id"]),
+                "name": hint["name"],
+                "description": hint["description"],
+                "icon": hint["icon"],
+                "progress": f"{hint['current']}/{hint['threshold']}",
+                "progress_pct": int(hint["progress_pct"]),
+                "hint": (
+                    f"再{self._get_action_name(hint['event'])}"
+                    f"{hint['threshold'] - hint['current']}次即可解锁"
+                ),
+            }
+            for hint in hints
+        ]
 
     def _get_action_name(self, event: str) -> str:
         """获取事件对应的动作名称"""
-        mapping = {
-            "quest_completed": "完成任务",
-            "check_in": "打卡",
-            "npc_interaction": "与NPC对话",
-        }
-        return mapping.get(event, "操作")
+        return _ACTION_NAMES.get(event, "操作")
 
     async def _get_recommended_topics(
         self,
@@ -300,80 +503,57 @@ class RecommendationService:
         env_context: dict[str, Any],
     ) -> list[str]:
         """获取推荐对话话题"""
-        topics = []
+        # 候选话题按优先级依次产出，凑满上限即停止
+        return list(islice(self._topic_candidates(user_context, env_context), MAX_TOPICS))
 
+    def _topic_candidates(
+        self,
+        user_context: dict[str, Any],
+        env_context: dict[str, Any],
+    ) -> Iterator[str]:
+        """按优先级产出候选对话话题"""
         # 基于节气的话题
-        solar_term = env_context.get("solar_term", {})
+        solar_term = env_context.get("solar_term") or _EMPTY
         term_name = solar_term.get("name")
         if term_name:
-            topics.append(f"{term_name}的农耕习俗")
-            customs = solar_term.get("cultural_customs", {}).get("customs", [])
+            yield f"{term_name}的农耕习俗"
+            customs = (solar_term.get("cultural_customs") or _EMPTY).get("customs", [])
             if customs:
-                topics.append(customs[0])
+                yield customs[0]
 
         # 基于时段的话题
         time_cn = env_context.get("time_of_day_cn")
         if time_cn == "清晨":
-            topics.append("晨起养生之道")
+            yield "晨起养生之道"
         elif time_cn == "夜间":
-            topics.append("夜游祠堂的故事")
+            yield "夜游祠堂的故事"
 
         # 基于用户标签的话题
-        tags = user_context.get("tags", [])
+        tags = set(user_context.get("tags", ()))
         if "亲子" in tags:
-            topics.append("适合孩子的农耕体验")
+            yield "适合孩子的农耕体验"
         if "摄影" in tags or "摄影爱好者" in tags:
-            topics.append("最佳拍摄点推荐")
+            yield "最佳拍摄点推荐"
         if "历史" in tags or "文化" in tags:
-            topics.append("徽派建筑的历史")
+            yield "徽派建筑的历史"
 
         # 基于行为的话题
         recent_quests = user_context.get("recent_quests", [])
         if recent_quests:
-            topics.append(f"关于「{recent_quests[0]}」的更多故事")
-
-        return topics[:5]
+            yield f"关于「{recent_quests[0]}」的更多故事"
 
     def _generate_greeting(self, context: dict[str, Any]) -> str:
         """生成个性化问候语"""
-        user = context.get("user", {})
-        env = context.get("environment", {})
+        user = context.get("user") or _EMPTY
+        env = context.get("environment") or _EMPTY
 
         time_cn = env.get("time_of_day_cn", "")
-        term_name = env.get("solar_term", {}).get("name", "")
-        name = user.get("name")
-
-        greeting_parts = []
-
-        # 时段问候
-        time_greetings = {
-            "清晨": "早安",
-            "上午": "上午好",
-            "中午": "中午好",
-            "下午": "下午好",
-            "傍晚": "傍晚好",
-            "夜间": "晚上好",
-        }
-        greeting_parts.append(time_greetings.get(time_cn, "您好"))
-
-        # 称呼
-        if name:
-            greeting_parts[0] += f"，{name}"
-        else:
-            greeting_parts[0] += "，欢迎来到严田"
-
-        # 节气提示
-        if term_name:
-            greeting_parts.append(f"今日正值{term_name}时节")
+        term_name = (env.get("solar_term") or _EMPTY).get("name", "")
 
         # 个性化提示
+        tail = None
         if not user.get("is_anonymous"):
-            quest_count = user.get("stats", {}).get("quest_completed_count", 0)
-            if quest_count == 0:
-                greeting_parts.append("开启您的研学之旅吧")
-            elif quest_count < 3:
-                greeting_parts.append("继续探索更多精彩")
-            else:
-                greeting_parts.append("欢迎回来，资深探索者")
-
-        return "，".join(greeting_parts) + "！"
+            quest_count = (user.get("stats") or _EMPTY).get("quest_completed_count", 0)
+            tail = _QUEST_COUNT_TAILS[bisect_right(_QUEST_COUNT_BREAKPOINTS, quest_count)]
+
+        return _compose_greeting(time_cn, term_name, user.get("name"), tail)
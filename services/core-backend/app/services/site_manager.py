@@ -4,29 +4,161 @@
 提供站点 CRUD、初始化、统计等功能。
 """
 
+import asyncio
+import base64
 from datetime import date, datetime, timedelta
-from typing import Any, Optional
+from typing import Any, Awaitable, Callable, Optional, TypeVar
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import Date, Row, cast, delete, func, insert, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database.models import (
     Site,
+    SiteCounter,
     SiteStatsDaily,
     Quest,
     NPCProfile,
     Achievement,
-    VisitorProfile,
-    VisitorCheckIn,
-    Conversation,
+    AchievementTier,
     Message,
     UserAchievement,
 )
 from app.core.logging import get_logger
+from app.middleware.request_cache import get_request_cache
+from app.services.cache import CacheKeys, get_cache
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+
+# 站点统计汇总字段
+STATS_FIELDS = (
+    "visitor_uv",
+    "visitor_pv",
+    "new_visitors",
+    "quest_started",
+    "quest_completed",
+    "npc_conversations",
+    "npc_messages",
+    "achievements_unlocked",
+    "check_ins",
+)
+
+# 由 site_counters 分片计数提供的统计字段 -> 计数名
+_COUNTER_FIELDS = {
+    "visitor_uv": "total_visitors",
+    "npc_conversations": "total_conversations",
+    "check_ins": "total_checkins",
+}
+
+
+def _site_counter(counter: str):
+    """站点累计计数：对该计数的全部分片求和（关联外层 Site 的标量子查询）"""
+    return (
+        select(func.coalesce(func.sum(SiteCounter.value), 0))
+        .where(SiteCounter.site_id == Site.id, SiteCounter.counter == counter)
+        .scalar_subquery()
+    )
+
+
+# 允许通过 update_site 修改的字段
+_SITE_UPDATE_FIELDS = frozenset({
+    "name", "display_name", "description", "logo_url",
+    "config", "theme", "features", "operating_hours",
+    "contact_info", "location_lat", "location_lng",
+    "address", "timezone", "status",
+})
+
+# 站点配置视图读取的列
+_SITE_CONFIG_COLUMNS = (
+    "id", "tenant_id", "name", "display_name", "description", "logo_url",
+    "config", "theme", "features", "operating_hours", "contact_info",
+    "location_lat", "location_lng", "address", "timezone", "status",
+)
+
+# 站点配置缓存 TTL（秒）
+SITE_CONFIG_CACHE_TTL = 120
+
+# 默认模板数据（只读），初始化时仅拼接站点相关字段
+# NPC 以 (npc_id 后缀, 字段) 存放，npc_id = f"{site_id}_{后缀}"
+_DEFAULT_NPCS = (
+    (
+        "guide",
+        {
+            "name": "导游小李",
+            "role": "景区导游",
+            "background": "热情的景区导游，熟悉这里的每一个角落。",
+            "persona": {"avatar_emoji": "👨‍🦱"},
+        },
+    ),
+    (
+        "elder",
+        {
+            "name": "村长伯伯",
+            "role": "村中长者",
+            "background": "德高望重的村长，见证了村庄的变迁。",
+            "persona": {"avatar_emoji": "👴"},
+        },
+    ),
+)
+
+_DEFAULT_QUESTS = (
+    {
+        "name": "welcome_quest",
+        "display_name": "欢迎来到这里",
+        "description": "完成新手引导，了解基本功能。",
+        "quest_type": "onboarding",
+        "category": "tutorial",
+        "difficulty": "easy",
+    },
+    {
+        "name": "first_chat",
+        "display_name": "第一次对话",
+        "description": "与任意一位村民进行对话。",
+        "quest_type": "interaction",
+        "category": "social",
+        "difficulty": "easy",
+    },
+)
+
+_DEFAULT_ACHIEVEMENTS = (
+    {
+        "code": "first_visit",
+        "name": "初来乍到",
+        "description": "首次访问站点",
+        "category": "exploration",
+        "tier": AchievementTier.BRONZE,
+        "rule_type": "count",
+        "rule_config": {"event": "visit", "threshold": 1},
+    },
+    {
+        "code": "first_chat",
+        "name": "初次交流",
+        "description": "完成第一次 NPC 对话",
+        "category": "social",
+        "tier": AchievementTier.BRONZE,
+        "rule_type": "count",
+        "rule_config": {"event": "npc_chat", "threshold": 1},
+    },
+)
+
+
+def _encode_site_cursor(site: Site) -> str:
+    """将最后一行的 (created_at, id) 编码为不透明游标"""
+    raw = f"{site.created_at.isoformat()}|{site.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_site_cursor(cursor: str) -> tuple[datetime, str]:
+    """解析分页游标，格式错误时抛出 ValueError"""
+    try:
+        created_at, site_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), site_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
 
 class SiteManager:
     """站点管理服务"""
@@ -44,30 +176,81 @@ class SiteManager:
         status: Optional[str] = None,
         limit: int = 50,
         offset: int = 0,
-    ) -> tuple[list[Site], int]:
-        """列出站点"""
-        query = select(Site).where(Site.tenant_id == tenant_id)
+        cursor: Optional[tuple[datetime, str]] = None,
+    ) -> tuple[list[Site], int, Optional[str]]:
+        """
+        列出站点
 
+        传入 cursor（decode_site_cursor 解析后的 (created_at, id)）时按键集分页，
+        深翻页只需索引范围扫描；否则沿用 offset 分页。
+
+        Returns:
+            (站点列表, 总数, 下一页游标)
+        """
+        filters = [Site.tenant_id == tenant_id]
         if status:
-            query = query.where(Site.status == status)
+            filters.append(Site.status == status)
 
-        # 总数
-        count_query = select(func.count()).select_from(query.subquery())
-        total = await self.session.scalar(count_query) or 0
+        # 总数以标量子查询随分页结果一并返回，一次查询完成，且不受游标条件影响
+        count_query = select(func.count()).select_from(Site).where(*filters)
+        query = select(Site, count_query.scalar_subquery().label("total")).where(*filters)
+
+        if cursor:
+            cursor_created_at, cursor_id = cursor
+            query = query.where(
+                tuple_(Site.created_at, Site.id) < tuple_(cursor_created_at, cursor_id)
+            )
+        else:
+            query = query.offset(offset)
 
-        # 分页
-        query = query.offset(offset).limit(limit).order_by(Site.created_at.desc())
+        # 多取一行判断是否还有下一页，避免总数恰为 limit 整数倍时返回指向空页的游标
+        query = query.order_by(Site.created_at.desc(), Site.id.desc()).limit(limit + 1)
         result = await self.session.execute(query)
-        sites = list(result.scalars().all())
+        rows = result.all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        sites = [row.Site for row in rows]
+        if rows:
+            total = rows[0].total
+        elif cursor or offset:
+            # 翻过末页时没有行可携带总数，单独计数
+            total = (await self.session.execute(count_query)).scalar_one()
+        else:
+            total = 0
+        next_cursor = _encode_site_cursor(sites[-1]) if has_more else None
 
-        return sites, total
+        return sites, total, next_cursor
 
     async def get_site(self, site_id: str) -> Optional[Site]:
-        """获取站点详情"""
+        """获取站点详情（同一请求内重复读取直接复用）"""
+        cache = get_request_cache("site")
+        if cache is not None and site_id in cache:
+            return cache[site_id]
+
         result = await self.session.execute(
             select(Site).where(Site.id == site_id)
         )
-        return result.scalar_one_or_none()
+        site = result.scalar_one_or_none()
+        if cache is not None and site is not None:
+            cache[site_id] = site
+        return site
+
+    async def get_site_columns(
+        self,
+        site_id: str,
+        cols: tuple[str, ...],
+    ) -> Optional[dict[str, Any]]:
+        """
+        只读取站点的指定列
+
+        不构造 Site 实体、不加载其 selectin 关联，适合只需少量字段的调用方
+        """
+        result = await self.session.execute(
+            select(*(getattr(Site, c) for c in cols)).where(Site.id == site_id)
+        )
+        row = result.one_or_none()
+        return dict(row._mapping) if row else None
 
     async def create_site(
         self,
@@ -81,25 +264,28 @@ class SiteManager:
         features: Optional[dict] = None,
     ) -> Site:
         """创建站点"""
-        site = Site(
-            id=site_id,
-            tenant_id=tenant_id,
-            name=name,
-            display_name=display_name or name,
-            description=description,
-            config=config or {},
-            theme=theme or {},
-            features=features or {
-                "quest_enabled": True,
-                "npc_enabled": True,
-                "iot_enabled": False,
-            },
-            status="active",
+        # INSERT ... RETURNING 直接取回含数据库默认值的完整行，无需提交后 refresh
+        result = await self.session.execute(
+            insert(Site)
+            .values(
+                id=site_id,
+                tenant_id=tenant_id,
+                name=name,
+                display_name=display_name or name,
+                description=description,
+                config=config or {},
+                theme=theme or {},
+                features=features or {
+                    "quest_enabled": True,
+                    "npc_enabled": True,
+                    "iot_enabled": False,
+                },
+                status="active",
+            )
+            .returning(Site)
         )
-
-        self.session.add(site)
+        site = result.scalar_one()
         await self.session.commit()
-        await self.session.refresh(site)
 
         logger.info("site_created", site_id=site_id, tenant_id=tenant_id)
         return site
@@ -110,41 +296,51 @@ class SiteManager:
         **kwargs,
     ) -> Optional[Site]:
         """更新站点"""
-        site = await self.get_site(site_id)
+        fields = {
+            key: value
+            for key, value in kwargs.items()
+            if value is not None and key in _SITE_UPDATE_FIELDS
+        }
+        fields["updated_at"] = func.now()
+
+        # UPDATE ... RETURNING 一次往返完成更新并取回最新行，站点不存在时返回空
+        result = await self.session.execute(
+            update(Site)
+            .where(Site.id == site_id)
+            .values(**fields)
+            .returning(Site)
+            .execution_options(synchronize_session=False)
+        )
+        site = result.scalar_one_or_none()
+        await self.session.commit()
         if not site:
             return None
 
-        allowed_fields = [
-            "name", "display_name", "description", "logo_url",
-            "config", "theme", "features", "operating_hours",
-            "contact_info", "location_lat", "location_lng",
-            "address", "timezone", "status",
-        ]
-
-        for key, value in kwargs.items():
-            if key in allowed_fields and value is not None:
-                setattr(site, key, value)
-
-        site.updated_at = datetime.utcnow()
-        await self.session.commit()
-        await self.session.refresh(site)
+        await self._invalidate_site_cache(site_id)
 
         logger.info("site_updated", site_id=site_id)
         return site
 
     async def delete_site(self, site_id: str, soft: bool = True) -> bool:
         """删除站点（默认软删除）"""
-        site = await self.get_site(site_id)
-        if not site:
-            return False
-
         if soft:
-            site.status = "disabled"
-            site.updated_at = datetime.utcnow()
+            stmt = (
+                update(Site)
+                .where(Site.id == site_id)
+                .values(status="disabled", updated_at=func.now())
+            )
         else:
-            await self.session.delete(site)
+            stmt = delete(Site).where(Site.id == site_id)
 
+        result = await self.session.execute(
+            stmt.returning(Site.id).execution_options(synchronize_session=False)
+        )
+        deleted_id = result.scalar_one_or_none()
         await self.session.commit()
+        if deleted_id is None:
+            return False
+
+        await self._invalidate_site_cache(site_id)
         logger.info("site_deleted", site_id=site_id, soft=soft)
         return True
 
@@ -153,30 +349,42 @@ class SiteManager:
     # ============================================================
 
     async def get_site_config(self, site_id: str) -> Optional[dict[str, Any]]:
-        """获取站点配置"""
-        site = await self.get_site(site_id)
+        """获取站点配置（读多写少，经多级缓存读取）"""
+        async def load() -> Optional[dict[str, Any]]:
+            return await self._load_site_config(site_id)
+
+        return await get_cache().get_or_set(
+            CacheKeys.site_config(site_id),
+            load,
+            l1_ttl=SITE_CONFIG_CACHE_TTL,
+            l2_ttl=SITE_CONFIG_CACHE_TTL,
+        )
+
+    async def _load_site_config(self, site_id: str) -> Optional[dict[str, Any]]:
+        """从数据库加载站点配置"""
+        site = await self.get_site_columns(site_id, _SITE_CONFIG_COLUMNS)
         if not site:
             return None
 
         return {
-            "id": site.id,
-            "tenant_id": site.tenant_id,
-            "name": site.name,
-            "display_name": site.display_name,
-            "description": site.description,
-            "logo_url": site.logo_url,
-            "config": site.config,
-            "theme": site.theme,
-            "features": site.features,
-            "operating_hours": site.operating_hours,
-            "contact_info": site.contact_info,
+            "id": site["id"],
+            "tenant_id": site["tenant_id"],
+            "name": site["name"],
+            "display_name": site["display_name"],
+            "description": site["description"],
+            "logo_url": site["logo_url"],
+            "config": site["config"],
+            "theme": site["theme"],
+            "features": site["features"],
+            "operating_hours": site["operating_hours"],
+            "contact_info": site["contact_info"],
             "location": {
-                "lat": site.location_lat,
-                "lng": site.location_lng,
-                "address": site.address,
+                "lat": site["location_lat"],
+                "lng": site["location_lng"],
+                "address": site["address"],
             },
-            "timezone": site.timezone,
-            "status": site.status,
+            "timezone": site["timezone"],
+            "status": site["status"],
         }
 
     async def update_site_config(
@@ -187,23 +395,39 @@ class SiteManager:
         features: Optional[dict] = None,
     ) -> Optional[Site]:
         """更新站点配置"""
-        site = await self.get_site(site_id)
-        if not site:
-            return None
-
+        # JSONB || 在服务端合并顶层键，无需先读取，并发修改不会互相覆盖
+        values: dict[str, Any] = {}
         if config is not None:
-            site.config = {**site.config, **config}
+            values["config"] = Site.config.op("||")(cast(config, JSONB))
         if theme is not None:
-            site.theme = {**site.theme, **theme}
+            values["theme"] = Site.theme.op("||")(cast(theme, JSONB))
         if features is not None:
-            site.features = {**site.features, **features}
+            values["features"] = Site.features.op("||")(cast(features, JSONB))
+        values["updated_at"] = func.now()
 
-        site.updated_at = datetime.utcnow()
+        result = await self.session.execute(
+            update(Site)
+            .where(Site.id == site_id)
+            .values(**values)
+            .returning(Site)
+            .execution_options(synchronize_session=False)
+        )
+        site = result.scalar_one_or_none()
         await self.session.commit()
-        await self.session.refresh(site)
+        if not site:
+            return None
+
+        await self._invalidate_site_cache(site_id)
 
         return site
 
+    async def _invalidate_site_cache(self, site_id: str) -> None:
+        """站点变更后清除请求级缓存与配置缓存"""
+        cache = get_request_cache("site")
+        if cache is not None:
+            cache.pop(site_id, None)
+        await get_cache().delete(CacheKeys.site_config(site_id))
+
     # ============================================================
     # 站点统计
     # ============================================================
@@ -214,8 +438,8 @@ class SiteManager:
         period: str = "7d",  # "1d" | "7d" | "30d"
     ) -> dict[str, Any]:
         """获取站点统计"""
-        site = await self.get_site(site_id)
-        if not site:
+        counters = await self._load_site_counters(site_id)
+        if not counters:
             return {}
 
         # 计算日期范围
@@ -223,52 +447,46 @@ class SiteManager:
         end_date = date.today()
         start_date = end_date - timedelta(days=days - 1)
 
-        # 查询统计数据
+        # 逐日数据与区间合计一次查询取回：合计由窗口函数 SUM() OVER () 在数据库完成
         result = await self.session.execute(
-            select(SiteStatsDaily).where(
+            select(
+                SiteStatsDaily.stat_date,
+                SiteStatsDaily.visitor_uv,
+                SiteStatsDaily.visitor_pv,
+                SiteStatsDaily.quest_completed,
+                SiteStatsDaily.npc_conversations,
+                *(
+                    func.sum(getattr(SiteStatsDaily, field)).over().label(f"total_{field}")
+                    for field in STATS_FIELDS
+                ),
+            ).where(
                 SiteStatsDaily.site_id == site_id,
                 SiteStatsDaily.stat_date >= start_date,
                 SiteStatsDaily.stat_date <= end_date,
             ).order_by(SiteStatsDaily.stat_date)
         )
-        stats_list = list(result.scalars().all())
+        rows = result.all()
 
-        # 汇总
-        totals = {
-            "visitor_uv": 0,
-            "visitor_pv": 0,
-            "new_visitors": 0,
-            "quest_started": 0,
-            "quest_completed": 0,
-            "npc_conversations": 0,
-            "npc_messages": 0,
-            "achievements_unlocked": 0,
-            "check_ins": 0,
-        }
+        # 直接按位置解包 Core Row 元组：前 5 列为逐日数据，其后为各字段合计
+        daily_data = [
+            {
+                "date": stat_date.isoformat(),
+                "visitor_uv": visitor_uv,
+                "visitor_pv": visitor_pv,
+                "quest_completed": quest_completed,
+                "npc_conversations": npc_conversations,
+            }
+            for stat_date, visitor_uv, visitor_pv, quest_completed, npc_conversations, *_ in rows
+        ]
 
-        daily_data = []
-        for stat in stats_list:
-            totals["visitor_uv"] += stat.visitor_uv
-            totals["visitor_pv"] += stat.visitor_pv
-            totals["new_visitors"] += stat.new_visitors
-            totals["quest_started"] += stat.quest_started
-            totals["quest_completed"] += stat.quest_completed
-            totals["npc_conversations"] += stat.npc_conversations
-            totals["npc_messages"] += stat.npc_messages
-            totals["achievements_unlocked"] += stat.achievements_unlocked
-            totals["check_ins"] += stat.check_ins
-
-            daily_data.append({
-                "date": stat.stat_date.isoformat(),
-                "visitor_uv": stat.visitor_uv,
-                "visitor_pv": stat.visitor_pv,
-                "quest_completed": stat.quest_completed,
-                "npc_conversations": stat.npc_conversations,
-            })
-
-        # 实时统计（如果没有历史数据）
-        if not stats_list:
-            totals = await self._calculate_realtime_stats(site_id, site.tenant_id)
+        # 汇总；没有历史数据时使用实时统计
+        if rows:
+            totals = {
+                field: int(total or 0)
+                for field, total in zip(STATS_FIELDS, rows[0][5:], strict=True)
+            }
+        else:
+            totals = self._calculate_realtime_stats(counters)
 
         return {
             "site_id": site_id,
@@ -279,87 +497,94 @@ class SiteManager:
             "daily": daily_data,
         }
 
-    async def _calculate_realtime_stats(
-        self,
-        site_id: str,
-        tenant_id: str,
-    ) -> dict[str, int]:
-        """计算实时统计"""
-        stats = {
-            "visitor_uv": 0,
+    async def _load_site_counters(self, site_id: str) -> Optional[Row]:
+        """
+        读取站点累计计数
+
+        一次查询汇总各计数的分片，不加载 Site 及其 selectin 关联；站点不存在时返回 None
+        """
+        result = await self.session.execute(
+            select(
+                *(_site_counter(counter).label(counter) for counter in _COUNTER_FIELDS.values())
+            ).where(Site.id == site_id)
+        )
+        return result.one_or_none()
+
+    def _calculate_realtime_stats(self, counters: Row) -> dict[str, int]:
+        """计算实时统计（读取触发器维护的站点累计计数）"""
+        return {
+            "visitor_uv": int(counters.total_visitors or 0),
             "visitor_pv": 0,
             "new_visitors": 0,
             "quest_started": 0,
             "quest_completed": 0,
-            "npc_conversations": 0,
+            "npc_conversations": int(counters.total_conversations or 0),
             "npc_messages": 0,
             "achievements_unlocked": 0,
-            "check_ins": 0,
+            "check_ins": int(counters.total_checkins or 0),
         }
 
-        # 访客数
-        visitor_count = await self.session.scalar(
-            select(func.count()).select_from(VisitorProfile).where(
-                VisitorProfile.tenant_id == tenant_id,
-                VisitorProfile.site_id == site_id,
-            )
-        )
-        stats["visitor_uv"] = visitor_count or 0
-
-        # 对话数
-        conv_count = await self.session.scalar(
-            select(func.count()).select_from(Conversation).where(
-                Conversation.tenant_id == tenant_id,
-                Conversation.site_id == site_id,
-            )
-        )
-        stats["npc_conversations"] = conv_count or 0
+    def _daily_stats_insert(self, stat_date: date, *criteria: Any):
+        """
+        构造每日统计快照写入语句
 
-        # 打卡数
-        checkin_count = await self.session.scalar(
-            select(func.count()).select_from(VisitorCheckIn).where(
-                VisitorCheckIn.tenant_id == tenant_id,
-                VisitorCheckIn.site_id == site_id,
-            )
+        INSERT ... SELECT 直接从站点累计计数生成快照，ON CONFLICT 跳过当日已有记录；
+        主键由数据库生成，多站点批量写入时每行各自取值
+        """
+        source = select(
+            func.gen_random_uuid(),
+            Site.id,
+            literal(stat_date, Date),
+            *(
+                _site_counter(_COUNTER_FIELDS[field]) if field in _COUNTER_FIELDS else literal(0)
+                for field in STATS_FIELDS
+            ),
+        ).where(*criteria)
+
+        return (
+            pg_insert(SiteStatsDaily)
+            .from_select(["id", "site_id", "stat_date", *STATS_FIELDS], source)
+            .on_conflict_do_nothing(index_elements=["site_id", "stat_date"])
         )
-        stats["check_ins"] = checkin_count or 0
-
-        return stats
 
     async def record_daily_stats(self, site_id: str) -> Optional[SiteStatsDaily]:
-        """记录每日统计快照"""
-        site = await self.get_site(site_id)
-        if not site:
-            return None
-
+        """记录每日统计快照（首次记录只需一次往返，并发调度也不会重复写入）"""
         today = date.today()
+        result = await self.session.execute(
+            self._daily_stats_insert(today, Site.id == site_id).returning(SiteStatsDaily)
+        )
+        daily_stat = result.scalar_one_or_none()
+        await self.session.commit()
+        if daily_stat:
+            return daily_stat
 
-        # 检查是否已存在
-        existing = await self.session.scalar(
+        # 当日已记录（或站点不存在）时返回已有快照
+        return await self.session.scalar(
             select(SiteStatsDaily).where(
                 SiteStatsDaily.site_id == site_id,
                 SiteStatsDaily.stat_date == today,
             )
         )
 
-        if existing:
-            return existing
+    async def record_all_daily_stats(self, stat_date: Optional[date] = None) -> int:
+        """
+        为全部启用站点记录每日统计快照
 
-        # 计算统计
-        stats = await self._calculate_realtime_stats(site_id, site.tenant_id)
+        由定时任务在低峰期调用（见 scripts/record_daily_stats.py），一条语句写入所有站点
 
-        # 创建记录
-        daily_stat = SiteStatsDaily(
-            site_id=site_id,
-            stat_date=today,
-            **stats,
+        Returns:
+            新写入的快照数
+        """
+        stat_date = stat_date or date.today()
+        result = await self.session.execute(
+            self._daily_stats_insert(stat_date, Site.status == "active")
+            .returning(SiteStatsDaily.site_id)
         )
-
-        self.session.add(daily_stat)
+        recorded = len(result.scalars().all())
         await self.session.commit()
-        await self.session.refresh(daily_stat)
 
-        return daily_stat
+        logger.info("daily_stats_recorded", stat_date=str(stat_date), sites=recorded)
+        return recorded
 
     # ============================================================
     # 站点初始化
@@ -380,7 +605,7 @@ class SiteManager:
         Returns:
             初始化结果
         """
-        site = await self.get_site(site_id)
+        site = await self.get_site_columns(site_id, ("tenant_id",))
         if not site:
             return {"success": False, "error": "Site not found"}
 
@@ -395,168 +620,86 @@ class SiteManager:
             },
         }
 
-        tenant_id = site.tenant_id
+        tenant_id = site["tenant_id"]
 
-        # 根据模板初始化
+        # 根据模板初始化：三类默认数据互不相关，各自在独立会话中并发写入并提交
         if template in ["default", "full"]:
-            # 创建默认 NPC
-            npcs_created = await self._init_default_npcs(tenant_id, site_id)
+            npcs_created, quests_created, achievements_created = await asyncio.gather(
+                self._in_session(lambda m: m._init_default_npcs(tenant_id, site_id)),
+                self._in_session(lambda m: m._init_default_quests(tenant_id, site_id)),
+                self._in_session(lambda m: m._init_default_achievements(tenant_id, site_id)),
+            )
             result["created"]["npcs"] = npcs_created
-
-            # 创建默认任务
-            quests_created = await self._init_default_quests(tenant_id, site_id)
             result["created"]["quests"] = quests_created
-
-            # 创建默认成就
-            achievements_created = await self._init_default_achievements(tenant_id, site_id)
             result["created"]["achievements"] = achievements_created
 
         logger.info("site_initialized", site_id=site_id, template=template, result=result)
         return result
 
+    async def _in_session(
+        self,
+        fn: Callable[["SiteManager"], Awaitable[T]],
+    ) -> T:
+        """在绑定同一引擎的独立会话中执行"""
+        async with AsyncSession(bind=self.session.bind, expire_on_commit=False) as session:
+            return await fn(SiteManager(session))
+
     async def _init_default_npcs(self, tenant_id: str, site_id: str) -> int:
         """初始化默认 NPC"""
-        default_npcs = [
-            {
-                "npc_id": f"{site_id}_guide",
-                "name": "导游小李",
-                "role": "景区导游",
-                "intro": "热情的景区导游，熟悉这里的每一个角落。",
-                "avatar_emoji": "👨‍🦱",
-            },
-            {
-                "npc_id": f"{site_id}_elder",
-                "name": "村长伯伯",
-                "role": "村中长者",
-                "intro": "德高望重的村长，见证了村庄的变迁。",
-                "avatar_emoji": "👴",
-            },
-        ]
-
-        count = 0
-        for npc_data in default_npcs:
-            # 检查是否已存在
-            existing = await self.session.scalar(
-                select(NPCProfile).where(
-                    NPCProfile.npc_id == npc_data["npc_id"],
-                    NPCProfile.tenant_id == tenant_id,
-                )
-            )
-            if existing:
-                continue
-
-            npc = NPCProfile(
-                tenant_id=tenant_id,
-                site_id=site_id,
-                npc_id=npc_data["npc_id"],
-                name=npc_data["name"],
-                role=npc_data["role"],
-                intro=npc_data["intro"],
-                avatar_emoji=npc_data["avatar_emoji"],
-                persona={},
-                status="active",
+        # 已存在的 NPC 由唯一索引跳过，RETURNING 只返回实际插入的行
+        result = await self.session.execute(
+            pg_insert(NPCProfile)
+            .values([
+                {
+                    "tenant_id": tenant_id,
+                    "site_id": site_id,
+                    "npc_id": f"{site_id}_{suffix}",
+                    "version": 1,
+                    "status": "active",
+                    **npc_data,
+                }
+                for suffix, npc_data in _DEFAULT_NPCS
+            ])
+            .on_conflict_do_nothing(
+                index_elements=["tenant_id", "site_id", "npc_id", "version"]
             )
-            self.session.add(npc)
-            count += 1
-
-        if count > 0:
-            await self.session.commit()
-
-        return count
+            .returning(NPCProfile.id)
+        )
+        created = len(result.scalars().all())
+        await self.session.commit()
+        return created
 
     async def _init_default_quests(self, tenant_id: str, site_id: str) -> int:
         """初始化默认任务"""
-        default_quests = [
-            {
-                "name": "welcome_quest",
-                "display_name": "欢迎来到这里",
-                "description": "完成新手引导，了解基本功能。",
-                "quest_type": "onboarding",
-                "category": "tutorial",
-                "difficulty": "easy",
-            },
-            {
-                "name": "first_chat",
-                "display_name": "第一次对话",
-                "description": "与任意一位村民进行对话。",
-                "quest_type": "interaction",
-                "category": "social",
-                "difficulty": "easy",
-            },
-        ]
-
-        count = 0
-        for quest_data in default_quests:
-            # 检查是否已存在
-            existing = await self.session.scalar(
-                select(Quest).where(
-                    Quest.name == quest_data["name"],
-                    Quest.tenant_id == tenant_id,
-                    Quest.site_id == site_id,
-                )
-            )
-            if existing:
-                continue
-
-            quest = Quest(
-                tenant_id=tenant_id,
-                site_id=site_id,
-                **quest_data,
-                status="active",
-            )
-            self.session.add(quest)
-            count += 1
-
-        if count > 0:
-            await self.session.commit()
-
-        return count
+        result = await self.session.execute(
+            pg_insert(Quest)
+            .values([
+                {
+                    "tenant_id": tenant_id,
+                    "site_id": site_id,
+                    "status": "active",
+                    **quest_data,
+                }
+                for quest_data in _DEFAULT_QUESTS
+            ])
+            .on_conflict_do_nothing(index_elements=["tenant_id", "site_id", "name"])
+            .returning(Quest.id)
+        )
+        created = len(result.scalars().all())
+        await self.session.commit()
+        return created
 
     async def _init_default_achievements(self, tenant_id: str, site_id: str) -> int:
         """初始化默认成就"""
-        default_achievements = [
-            {
-                "name": "first_visit",
-                "display_name": "初来乍到",
-                "description": "首次访问站点",
-                "category": "exploration",
-                "tier": "bronze",
-                "rule_type": "count",
-                "rule_config": {"event": "visit", "threshold": 1},
-            },
-            {
-                "name": "first_chat",
-                "display_name": "初次交流",
-                "description": "完成第一次 NPC 对话",
-                "category": "social",
-                "tier": "bronze",
-                "rule_type": "count",
-                "rule_config": {"event": "npc_chat", "threshold": 1},
-            },
-        ]
-
-        count = 0
-        for ach_data in default_achievements:
-            # 检查是否已存在
-            existing = await self.session.scalar(
-                select(Achievement).where(
-                    Achievement.name == ach_data["name"],
-                    Achievement.tenant_id == tenant_id,
-                    Achievement.site_id == site_id,
-                )
-            )
-            if existing:
-                continue
-
-            achievement = Achievement(
-                tenant_id=tenant_id,
-                site_id=site_id,
-                **ach_data,
-            )
-            self.session.add(achievement)
-            count += 1
-
-        if count > 0:
-            await self.session.commit()
-
-        return count
+        result = await self.session.execute(
+            pg_insert(Achievement)
+            .values([
+                {"tenant_id": tenant_id, "site_id": site_id, **ach_data}
+                for ach_data in _DEFAULT_ACHIEVEMENTS
+            ])
+            .on_conflict_do_nothing(index_elements=["tenant_id", "site_id", "code"])
+            .returning(Achievement.id)
+        )
+        created = len(result.scalars().all())
+        await self.session.commit()
+        return created
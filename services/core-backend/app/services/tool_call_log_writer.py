@@ -0,0 +1,28 @@
+"""
+MCP 工具调用日志异步写入器
+
+执行器把日志记录放入队列立即返回，由后台任务批量落库
+"""
+
+from typing import Optional
+
+from app.domain.tool_call_log import ToolCallLog
+from app.services.batch_insert_writer import BatchInsertWriter
+
+
+class ToolCallLogWriter(BatchInsertWriter):
+    """工具调用日志批量写入器"""
+
+    model = ToolCallLog
+
+
+# 全局写入器实例
+_writer: Optional[ToolCallLogWriter] = None
+
+
+def get_tool_call_log_writer() -> ToolCallLogWriter:
+    """获取工具调用日志写入器单例"""
+    global _writer
+    if _writer is None:
+        _writer = ToolCallLogWriter()
+    return _writer
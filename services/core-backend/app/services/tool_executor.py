@@ -4,17 +4,65 @@ MCP 工具执行器
 负责执行 MCP 工具调用，记录审计日志
 """
 
+import secrets
 import time
-import uuid
-from datetime import datetime
+from bisect import bisect_right
+from datetime import date, datetime, timedelta, timezone
 from typing import Any, Dict, Optional
 
+from pydantic import ValidationError
+from sqlalchemy import JSON, func, lambda_stmt, literal_column, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload, selectinload
 
 from app.core.deps import RequestContext
-from app.core.permissions import Permission, has_permission
+from app.core.permissions import missing_permission
+from app.domain.knowledge import KnowledgeEntry
+from app.domain.npc import NPC
+from app.domain.poi import POI
+from app.domain.quest import Quest
+from app.domain.scene import Scene
 from app.domain.tool_call_log import ToolCallLog, ToolCallStatus
+from app.domain.visitor import Visitor, VisitorQuest
 from app.services.mcp_registry import MCPToolRegistry, get_mcp_registry
+from app.services.tool_call_log_writer import get_tool_call_log_writer
+
+# 二十四节气（名称, 拼音, (月, 日)），按公历日期排序
+_SOLAR_TERMS = (
+    ("小寒", "xiaohan", (1, 6)),
+    ("大寒", "dahan", (1, 20)),
+    ("立春", "lichun", (2, 4)),
+    ("雨水", "yushui", (2, 19)),
+    ("惊蛰", "jingzhe", (3, 6)),
+    ("春分", "chunfen", (3, 21)),
+    ("清明", "qingming", (4, 5)),
+    ("谷雨", "guyu", (4, 20)),
+    ("立夏", "lixia", (5, 6)),
+    ("小满", "xiaoman", (5, 21)),
+    ("芒种", "mangzhong", (6, 6)),
+    ("夏至", "xiazhi", (6, 21)),
+    ("小暑", "xiaoshu", (7, 7)),
+    ("大暑", "dashu", (7, 23)),
+    ("立秋", "liqiu", (8, 8)),
+    ("处暑", "chushu", (8, 23)),
+    ("白露", "bailu", (9, 8)),
+    ("秋分", "qiufen", (9, 23)),
+    ("寒露", "hanlu", (10, 8)),
+    ("霜降", "shuangjiang", (10, 24)),
+    ("立冬", "lidong", (11, 8)),
+    ("小雪", "xiaoxue", (11, 22)),
+    ("大雪", "daxue", (12, 7)),
+    ("冬至", "dongzhi", (12, 22)),
+)
+
+# 各节气起始 (月, 日)，供二分查找
+_SOLAR_TERM_STARTS = tuple(start for _, _, start in _SOLAR_TERMS)
+
+
+def _like_pattern(text: str) -> str:
+    """构造子串匹配的 LIKE 模式，转义通配符（转义符为反斜杠）"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
 
 
 class ToolExecutionError(Exception):
@@ -29,6 +77,16 @@ class ToolExecutionError(Exception):
 class ToolExecutor:
     """MCP 工具执行器"""
 
+    # 内置工具名 -> 实现方法名
+    _BUILTIN_DISPATCH: Dict[str, str] = {
+        "knowledge.search": "_tool_knowledge_search",
+        "npc.get_persona": "_tool_npc_get_persona",
+        "scene.get_info": "_tool_scene_get_info",
+        "visitor.get_profile": "_tool_visitor_get_profile",
+        "solar_term.get_current": "_tool_solar_term_get_current",
+        "quest.get_available": "_tool_quest_get_available",
+    }
+
     def __init__(
         self,
         db: AsyncSession,
@@ -69,39 +127,53 @@ class ToolExecutor:
                 error_code="TOOL_NOT_FOUND",
             )
 
-        # 2. 权限检查
-        for perm_str in tool_def.required_permissions:
+        # 2. 参数校验：只保留调用方传入的字段，UUID / 日期等按 JSON 形式回写，供处理器与审计日志使用
+        if tool_def.input_validator is not None:
             try:
-                perm = Permission(perm_str)
-                if not has_permission(self.ctx.user, perm):
-                    raise ToolExecutionError(
-                        f"Missing permission: {perm_str}",
-                        error_code="PERMISSION_DENIED",
-                    )
-            except ValueError:
-                pass  # 未知权限，跳过
-
-        # 3. 创建审计日志
-        span_id = str(uuid.uuid4())[:16]
-        log = ToolCallLog(
-            trace_id=self.ctx.trace_id,
-            span_id=span_id,
-            tenant_id=self.ctx.tenant_id,
-            site_id=self.ctx.site_id,
-            caller_service=caller_service,
-            caller_session_id=session_id,
-            caller_user_id=self.ctx.user.id,
-            tool_name=tool_name,
-            tool_version=tool_def.version,
-            input_params=params,
-            status=ToolCallStatus.RUNNING,
-            started_at=datetime.utcnow(),
-        )
-        self.db.add(log)
-        await self.db.flush()
+                params = tool_def.input_validator.model_validate(params).model_dump(
+                    mode="json", exclude_unset=True
+                )
+            except ValidationError as e:
+                raise ToolExecutionError(
+                    f"Invalid params: {e.errors(include_url=False)}",
+                    error_code="INVALID_PARAMS",
+                ) from e
+
+        # 3. 权限检查（权限枚举在注册时已解析，未知权限已忽略；检查结果按角色缓存）
+        if tool_def.resolved_permissions:
+            user = self.ctx.user
+            missing = missing_permission(
+                user.role,
+                frozenset(user.permissions or ()),
+                tool_def.resolved_permissions,
+            )
+            if missing:
+                raise ToolExecutionError(
+                    f"Missing permission: {missing}",
+                    error_code="PERMISSION_DENIED",
+                )
+
+        # 4. 准备审计日志记录（执行结束后随结果状态一次提交，按工具的审计策略决定是否落库）
+        # 墙上时间只取一次，耗时由单调时钟计算，完成时间由两者推得
+        span_id = secrets.token_hex(8)  # 64 位随机 span ID（OpenTelemetry 格式）
+        started_at = datetime.now(timezone.utc)
+        log = {
+            "trace_id": self.ctx.trace_id,
+            "span_id": span_id,
+            "tenant_id": self.ctx.tenant_id,
+            "site_id": self.ctx.site_id,
+            "caller_service": caller_service,
+            "caller_session_id": session_id,
+            "caller_user_id": self.ctx.user.id,
+            "tool_name": tool_name,
+            "tool_version": tool_def.version,
+            "input_params": params,
+            "status": ToolCallStatus.RUNNING,
+            "started_at": started_at,
+        }
 
-        # 4. 执行工具
-        start_time = time.time()
+        # 5. 执行工具
+        t0 = time.perf_counter_ns()
         try:
             handler = self.registry.get_handler(tool_name)
             if handler:
@@ -114,11 +186,18 @@ class ToolExecutor:
                 # 使用内置处理器
                 result = await self._execute_builtin(tool_name, params)
 
-            duration_ms = int((time.time() - start_time) * 1000)
+            elapsed_ns = time.perf_counter_ns() - t0
+            duration_ms = elapsed_ns // 1_000_000
 
-            # 5. 记录成功
-            log.mark_success(result, duration_ms)
-            await self.db.flush()
+            # 6. 记录成功
+            log.update(
+                status=ToolCallStatus.SUCCESS,
+                output_result=result,
+                completed_at=started_at + timedelta(microseconds=elapsed_ns // 1000),
+                duration_ms=duration_ms,
+            )
+            if tool_def.audit_policy == "always":
+                await self._save_log(log)
 
             return {
                 "success": True,
@@ -130,49 +209,63 @@ class ToolExecutor:
             }
 
         except Exception as e:
-            # 6. 记录失败
+            # 7. 记录失败
             error_code = getattr(e, "error_code", "UNKNOWN_ERROR")
-            log.mark_failed(str(e), error_code)
-            await self.db.flush()
+            log.update(
+                status=ToolCallStatus.FAILED,
+                error_message=str(e),
+                error_code=error_code,
+                completed_at=started_at + timedelta(
+                    microseconds=(time.perf_counter_ns() - t0) // 1000
+                ),
+            )
+            if tool_def.audit_policy != "never":
+                await self._save_log(log)
 
             raise ToolExecutionError(str(e), error_code)
 
+    async def _save_log(self, log: Dict[str, Any]) -> None:
+        """
+        提交审计日志
+
+        优先交给后台写入器批量落库，不占用工具调用的响应时间；
+        写入器未启动（脚本、测试）或队列已满时在当前会话中同步写入
+        """
+        if get_tool_call_log_writer().enqueue(log):
+            return
+        self.db.add(ToolCallLog(**log))
+        await self.db.flush()
+
     async def _execute_builtin(
         self,
         tool_name: str,
         params: Dict[str, Any],
     ) -> Dict[str, Any]:
         """执行内置工具"""
-
-        if tool_name == "knowledge.search":
-            return await self._tool_knowledge_search(params)
-        elif tool_name == "npc.get_persona":
-            return await self._tool_npc_get_persona(params)
-        elif tool_name == "scene.get_info":
-            return await self._tool_scene_get_info(params)
-        elif tool_name == "visitor.get_profile":
-            return await self._tool_visitor_get_profile(params)
-        elif tool_name == "solar_term.get_current":
-            return await self._tool_solar_term_get_current(params)
-        elif tool_name == "quest.get_available":
-            return await self._tool_quest_get_available(params)
-        else:
+        method_name = self._BUILTIN_DISPATCH.get(tool_name)
+        if method_name is None:
             raise ToolExecutionError(
                 f"No handler for tool '{tool_name}'",
                 error_code="NO_HANDLER",
             )
+        return await getattr(self, method_name)(params)
 
     async def _tool_knowledge_search(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """知识检索工具实现"""
-        from sqlalchemy import select, func
-        from app.domain.knowledge import KnowledgeEntry
 
         query_text = params.get("query", "")
         domains = params.get("domains", [])
         top_k = params.get("top_k", 5)
 
-        # 构建查询
-        stmt = select(KnowledgeEntry).where(
+        # 只取返回所需的列，正文在 SQL 中截断，不构造 ORM 实体
+        stmt = select(
+            KnowledgeEntry.id,
+            KnowledgeEntry.title,
+            func.coalesce(func.substr(KnowledgeEntry.content, 1, 500), "").label("content"),
+            KnowledgeEntry.source,
+            KnowledgeEntry.verified,
+            KnowledgeEntry.knowledge_type,
+        ).where(
             KnowledgeEntry.tenant_id == self.ctx.tenant_id,
             KnowledgeEntry.site_id == self.ctx.site_id,
             KnowledgeEntry.status == "active",
@@ -181,23 +274,25 @@ class ToolExecutor:
         if domains:
             stmt = stmt.where(KnowledgeEntry.domains.overlap(domains))
 
-        # 简单的文本匹配（生产环境应使用向量检索）
+        # 子串匹配（生产环境应使用向量检索）：由 pg_trgm GIN 索引支持 ILIKE，
+        # 用户输入中的 % _ 按字面匹配
+        pattern = _like_pattern(query_text)
         stmt = stmt.where(
-            KnowledgeEntry.content.ilike(f"%{query_text}%")
-            | KnowledgeEntry.title.ilike(f"%{query_text}%")
+            KnowledgeEntry.content.ilike(pattern, escape="\\")
+            | KnowledgeEntry.title.ilike(pattern, escape="\\")
         )
 
         stmt = stmt.limit(top_k)
 
         result = await self.db.execute(stmt)
-        entries = result.scalars().all()
+        entries = result.all()
 
         return {
             "results": [
                 {
                     "id": str(entry.id),
                     "title": entry.title,
-                    "content": entry.content[:500] if entry.content else "",
+                    "content": entry.content,
                     "score": 0.8,  # 占位，实际应从向量检索获取
                     "source": entry.source,
                     "verified": entry.verified,
@@ -210,16 +305,18 @@ class ToolExecutor:
 
     async def _tool_npc_get_persona(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """NPC 人设查询工具实现"""
-        from sqlalchemy import select
-        from app.domain.npc import NPC
 
         npc_id = params.get("npc_id")
+        site_id = self.ctx.site_id
 
+        # lambda_stmt 按代码位置缓存语句构造与编译结果，闭包变量作为绑定参数
         result = await self.db.execute(
-            select(NPC).where(
-                NPC.id == npc_id,
-                NPC.site_id == self.ctx.site_id,
-                NPC.deleted_at.is_(None),
+            lambda_stmt(
+                lambda: select(NPC).where(
+                    NPC.id == npc_id,
+                    NPC.site_id == site_id,
+                    NPC.deleted_at.is_(None),
+                )
             )
         )
         npc = result.scalar_one_or_none()
@@ -243,20 +340,25 @@ class ToolExecutor:
 
     async def _tool_scene_get_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """场景信息查询工具实现"""
-        from sqlalchemy import select
-        from app.domain.scene import Scene
-        from app.domain.poi import POI
 
         scene_id = params.get("scene_id")
         include_pois = params.get("include_pois", True)
 
-        result = await self.db.execute(
-            select(Scene).where(
+        site_id = self.ctx.site_id
+
+        stmt = lambda_stmt(
+            lambda: select(Scene).where(
                 Scene.id == scene_id,
-                Scene.site_id == self.ctx.site_id,
+                Scene.site_id == site_id,
                 Scene.deleted_at.is_(None),
             )
         )
+        # POI 随场景一次加载（仅未删除的）；不需要时显式跳过默认的 selectin 加载
+        if include_pois:
+            stmt += lambda s: s.options(selectinload(Scene.pois.and_(POI.deleted_at.is_(None))))
+        else:
+            stmt += lambda s: s.options(raiseload(Scene.pois))
+        result = await self.db.execute(stmt)
         scene = result.scalar_one_or_none()
 
         if not scene:
@@ -274,36 +376,57 @@ class ToolExecutor:
         }
 
         if include_pois:
-            poi_result = await self.db.execute(
-                select(POI).where(
-                    POI.scene_id == scene_id,
-                    POI.deleted_at.is_(None),
-                )
-            )
-            pois = poi_result.scalars().all()
             response["pois"] = [
                 {
                     "id": str(poi.id),
                     "name": poi.name,
                     "poi_type": poi.poi_type,
                 }
-                for poi in pois
+                for poi in scene.pois
             ]
 
         return response
 
     async def _tool_visitor_get_profile(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """游客档案查询工具实现"""
-        from sqlalchemy import select
-        from app.domain.visitor import Visitor, VisitorQuest
 
         visitor_id = params.get("visitor_id")
         include_quest_progress = params.get("include_quest_progress", False)
 
-        result = await self.db.execute(
-            select(Visitor).where(Visitor.id == visitor_id)
+        # 只取返回所需的列；任务进度以 json_agg 标量子查询随同一条语句返回
+        stmt = lambda_stmt(
+            lambda: select(
+                Visitor.id,
+                Visitor.nickname,
+                Visitor.profile,
+                Visitor.stats,
+                Visitor.last_visit_at,
+            ).where(Visitor.id == visitor_id)
         )
-        visitor = result.scalar_one_or_none()
+        if include_quest_progress:
+            stmt += lambda s: s.add_columns(
+                select(
+                    func.coalesce(
+                        func.json_agg(
+                            func.json_build_object(
+                                "quest_id", VisitorQuest.quest_id,
+                                "status", VisitorQuest.status,
+                                "current_step", VisitorQuest.current_step,
+                                "score", VisitorQuest.score,
+                            )
+                        ),
+                        literal_column("'[]'::json"),
+                        type_=JSON,
+                    )
+                )
+                .where(VisitorQuest.visitor_id == Visitor.id)
+                .correlate(Visitor)
+                .scalar_subquery()
+                .label("quest_progress")
+            )
+
+        result = await self.db.execute(stmt)
+        visitor = result.one_or_none()
 
         if not visitor:
             raise ToolExecutionError(
@@ -320,25 +443,12 @@ class ToolExecutor:
         }
 
         if include_quest_progress:
-            quest_result = await self.db.execute(
-                select(VisitorQuest).where(VisitorQuest.visitor_id == visitor_id)
-            )
-            quests = quest_result.scalars().all()
-            response["quest_progress"] = [
-                {
-                    "quest_id": str(q.quest_id),
-                    "status": q.status,
-                    "current_step": q.current_step,
-                    "score": q.score,
-                }
-                for q in quests
-            ]
+            response["quest_progress"] = visitor.quest_progress
 
         return response
 
     async def _tool_solar_term_get_current(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """节气查询工具实现"""
-        from datetime import date
 
         query_date = params.get("date")
         if query_date:
@@ -347,57 +457,20 @@ class ToolExecutor:
             query_date = date.today()
 
         # 简化的节气计算（生产环境应使用精确算法）
-        solar_terms = [
-            ("立春", "lichun", (2, 4)),
-            ("雨水", "yushui", (2, 19)),
-            ("惊蛰", "jingzhe", (3, 6)),
-            ("春分", "chunfen", (3, 21)),
-            ("清明", "qingming", (4, 5)),
-            ("谷雨", "guyu", (4, 20)),
-            ("立夏", "lixia", (5, 6)),
-            ("小满", "xiaoman", (5, 21)),
-            ("芒种", "mangzhong", (6, 6)),
-            ("夏至", "xiazhi", (6, 21)),
-            ("小暑", "xiaoshu", (7, 7)),
-            ("大暑", "dashu", (7, 23)),
-            ("立秋", "liqiu", (8, 8)),
-            ("处暑", "chushu", (8, 23)),
-            ("白露", "bailu", (9, 8)),
-            ("秋分", "qiufen", (9, 23)),
-            ("寒露", "hanlu", (10, 8)),
-            ("霜降", "shuangjiang", (10, 24)),
-            ("立冬", "lidong", (11, 8)),
-            ("小雪", "xiaoxue", (11, 22)),
-            ("大雪", "daxue", (12, 7)),
-            ("冬至", "dongzhi", (12, 22)),
-            ("小寒", "xiaohan", (1, 6)),
-            ("大寒", "dahan", (1, 20)),
-        ]
-
-        current_term = None
-        for i, (name, pinyin, (month, day)) in enumerate(solar_terms):
-            term_date = date(query_date.year, month, day)
-            next_idx = (i + 1) % len(solar_terms)
-            next_month, next_day = solar_terms[next_idx][2]
-            next_year = query_date.year if next_month >= month else query_date.year + 1
-            next_date = date(next_year, next_month, next_day)
-
-            if term_date <= query_date < next_date:
-                current_term = {
-                    "term": name,
-                    "term_pinyin": pinyin,
-                    "start_date": term_date.isoformat(),
-                    "end_date": next_date.isoformat(),
-                }
-                break
-
-        if not current_term:
-            current_term = {
-                "term": "大寒",
-                "term_pinyin": "dahan",
-                "start_date": date(query_date.year, 1, 20).isoformat(),
-                "end_date": date(query_date.year, 2, 4).isoformat(),
-            }
+        # 按 (月, 日) 二分定位当前节气；年初小寒之前仍属上一年的冬至
+        idx = bisect_right(_SOLAR_TERM_STARTS, (query_date.month, query_date.day)) - 1
+        start_year = query_date.year - 1 if idx < 0 else query_date.year
+        idx %= len(_SOLAR_TERMS)
+        next_idx = (idx + 1) % len(_SOLAR_TERMS)
+        end_year = start_year + 1 if next_idx == 0 else start_year
+
+        name, pinyin, start = _SOLAR_TERMS[idx]
+        current_term = {
+            "term": name,
+            "term_pinyin": pinyin,
+            "start_date": date(start_year, *start).isoformat(),
+            "end_date": date(end_year, *_SOLAR_TERMS[next_idx][2]).isoformat(),
+        }
 
         if params.get("include_wisdom", True):
             # 从知识库查询节气相关智慧
@@ -412,27 +485,39 @@ class ToolExecutor:
 
     async def _tool_quest_get_available(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """研学任务查询工具实现"""
-        from sqlalchemy import select
-        from app.domain.quest import Quest
 
         visitor_id = params.get("visitor_id")
         scene_id = params.get("scene_id")
         category = params.get("category")
 
-        stmt = select(Quest).where(
-            Quest.site_id == self.ctx.site_id,
-            Quest.status == "active",
-            Quest.deleted_at.is_(None),
+        site_id = self.ctx.site_id
+
+        # 只取返回所需的列，避免构造实体及其 selectin 加载的步骤
+        stmt = lambda_stmt(
+            lambda: select(
+                Quest.id,
+                Quest.name,
+                Quest.display_name,
+                Quest.description,
+                Quest.difficulty,
+                Quest.time_limit_minutes,
+                Quest.category,
+            ).where(
+                Quest.site_id == site_id,
+                Quest.status == "active",
+                Quest.deleted_at.is_(None),
+            )
         )
 
         if scene_id:
-            stmt = stmt.where(Quest.scene_ids.contains([scene_id]))
+            scene_ids = [scene_id]
+            stmt += lambda s: s.where(Quest.scene_ids.contains(scene_ids))
 
         if category:
-            stmt = stmt.where(Quest.category == category)
+            stmt += lambda s: s.where(Quest.category == category)
 
         result = await self.db.execute(stmt)
-        quests = result.scalars().all()
+        quests = result.all()
 
         return {
             "quests": [
@@ -442,7 +527,7 @@ class ToolExecutor:
                     "display_name": q.display_name,
                     "description": q.description,
                     "difficulty": q.difficulty,
-                    "estimated_duration": q.estimated_duration_minutes,
+                    "estimated_duration": q.time_limit_minutes,
                     "category": q.category,
                 }
                 for q in quests
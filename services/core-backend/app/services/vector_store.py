@@ -4,10 +4,11 @@
 封装 Qdrant 向量数据库操作，提供统一的向量存储和检索接口。
 """
 
+import time
 from typing import Any, Optional
 from uuid import UUID
 
-from qdrant_client import QdrantClient, models
+from qdrant_client import AsyncQdrantClient, models
 from qdrant_client.http.exceptions import UnexpectedResponse
 
 from app.core.config import settings
@@ -18,10 +19,12 @@ logger = get_logger(__name__)
 
 
 # Collection 配置
+# quantization: "int8" 表示启用标量量化（INT8 向量常驻内存，原始 FP32 用于重打分）
 COLLECTIONS = {
     "knowledge": {
         "description": "农耕知识、文化内容",
         "vector_size": 1536,
+        "quantization": "int8",
     },
     "npc_persona": {
         "description": "NPC 人设片段",
@@ -30,9 +33,76 @@ COLLECTIONS = {
     "quest_content": {
         "description": "任务描述和步骤",
         "vector_size": 1536,
+        "quantization": "int8",
     },
 }
 
+# gRPC 通道保活：空闲连接定期 ping，避免被中间设备回收后首个请求重新握手
+QDRANT_GRPC_OPTIONS = {
+    "grpc.keepalive_time_ms": 30_000,
+    "grpc.keepalive_timeout_ms": 10_000,
+    "grpc.keepalive_permit_without_calls": 1,
+}
+
+# 批量写入时每个请求携带的 point 数，避免单个请求体过大
+QDRANT_BATCH_SIZE = 64
+
+# 空结果缓存：近期无结果的查询直接返回，Collection 写入后失效
+EMPTY_RESULT_TTL = 300
+EMPTY_RESULT_CACHE_SIZE = 4096
+
+# 量化检索的过采样倍数：先取 top_k * N 个 INT8 候选，再用 FP32 精确重打分
+QUANTIZATION_OVERSAMPLING = 3.0
+
+
+def _build_quantization_config(
+    collection_name: str,
+) -> Optional[models.ScalarQuantization]:
+    """根据 Collection 配置构建量化参数"""
+    if COLLECTIONS.get(collection_name, {}).get("quantization") != "int8":
+        return None
+    return models.ScalarQuantization(
+        scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            always_ram=True,
+        ),
+    )
+
+
+def _build_search_params(collection_name: str) -> Optional[models.SearchParams]:
+    """量化 Collection 检索时启用 FP32 重打分"""
+    if COLLECTIONS.get(collection_name, {}).get("quantization") != "int8":
+        return None
+    return models.SearchParams(
+        quantization=models.QuantizationSearchParams(
+            rescore=True,
+            oversampling=QUANTIZATION_OVERSAMPLING,
+        ),
+    )
+
+
+def _build_filter(filters: Optional[dict[str, Any]]) -> Optional[models.Filter]:
+    """将 {字段: 值} 过滤条件转换为 Qdrant Filter，列表值按任一匹配"""
+    if not filters:
+        return None
+    conditions = []
+    for key, value in filters.items():
+        if isinstance(value, list):
+            conditions.append(
+                models.FieldCondition(
+                    key=key,
+                    match=models.MatchAny(any=value),
+                )
+            )
+        else:
+            conditions.append(
+                models.FieldCondition(
+                    key=key,
+                    match=models.MatchValue(value=value),
+                )
+            )
+    return models.Filter(must=conditions)
+
 
 class SearchResult:
     """检索结果"""
@@ -58,6 +128,22 @@ class SearchResult:
         }
 
 
+def _to_search_results(hits: list[models.ScoredPoint]) -> list[SearchResult]:
+    """将 Qdrant 命中结果转换为 SearchResult"""
+    search_results = []
+    for hit in hits:
+        payload = hit.payload or {}
+        search_results.append(
+            SearchResult(
+                id=str(hit.id),
+                score=hit.score,
+                content=payload.get("content", ""),
+                metadata={k: v for k, v in payload.items() if k != "content"},
+            )
+        )
+    return search_results
+
+
 class VectorStore:
     """向量存储服务"""
 
@@ -70,15 +156,48 @@ class VectorStore:
         self.host = host or settings.QDRANT_HOST
         self.port = port or settings.QDRANT_PORT
         self.embedding_service = embedding_service or get_embedding_service()
-        self._client: Optional[QdrantClient] = None
+        self._client: Optional[AsyncQdrantClient] = None
+        # Collection 写入版本号，作为空结果缓存 key 的一部分
+        self._collection_versions: dict[str, int] = {}
+        # 空结果缓存：key -> 过期时间（单调时钟）
+        self._empty_results: dict[tuple, float] = {}
 
     @property
-    def client(self) -> QdrantClient:
-        """获取 Qdrant 客户端"""
+    def client(self) -> AsyncQdrantClient:
+        """获取 Qdrant 异步客户端"""
         if self._client is None:
-            self._client = QdrantClient(host=self.host, port=self.port)
+            self._client = AsyncQdrantClient(
+                host=self.host,
+                port=self.port,
+                grpc_port=settings.QDRANT_GRPC_PORT,
+                prefer_grpc=settings.QDRANT_PREFER_GRPC,
+                grpc_options=QDRANT_GRPC_OPTIONS,
+                timeout=settings.QDRANT_TIMEOUT,
+            )
         return self._client
 
+    async def close(self) -> None:
+        """关闭 Qdrant 客户端连接（应用关闭时调用）"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def warmup(self) -> bool:
+        """
+        预热连接（应用启动时调用）
+
+        提前建立 Qdrant 连接并初始化 Collections，避免首个检索请求承担建连开销
+
+        Returns:
+            Qdrant 是否可用
+        """
+        if not await self.health_check():
+            logger.warning("vector_store_warmup_failed", host=self.host, port=self.port)
+            return False
+        await self.init_collections()
+        logger.info("vector_store_warmed_up", host=self.host, port=self.port)
+        return True
+
     async def init_collections(self):
         """初始化所有 Collections"""
         for name, config in COLLECTIONS.items():
@@ -92,20 +211,30 @@ class VectorStore:
         """创建 Collection"""
         try:
             # 检查是否已存在
-            collections = self.client.get_collections().collections
+            collections = (await self.client.get_collections()).collections
             exists = any(c.name == collection_name for c in collections)
 
+            quantization_config = _build_quantization_config(collection_name)
+
             if exists:
+                # 早于量化配置创建的 Collection 补开量化（幂等，Qdrant 后台重建量化索引）
+                if quantization_config is not None:
+                    await self.client.update_collection(
+                        collection_name=collection_name,
+                        quantization_config=quantization_config,
+                    )
                 logger.info("collection_exists", collection=collection_name)
                 return True
 
-            # 创建 Collection
-            self.client.create_collection(
+            # 创建 Collection；量化 Collection 的原始 FP32 向量放在磁盘，仅用于重打分
+            await self.client.create_collection(
                 collection_name=collection_name,
                 vectors_config=models.VectorParams(
                     size=vector_size,
                     distance=models.Distance.COSINE,
+                    on_disk=quantization_config is not None,
                 ),
+                quantization_config=quantization_config,
             )
 
             logger.info("collection_created", collection=collection_name)
@@ -148,7 +277,7 @@ class VectorStore:
             }
 
             # 插入向量
-            self.client.upsert(
+            await self.client.upsert(
                 collection_name=collection_name,
                 points=[
                     models.PointStruct(
@@ -159,6 +288,7 @@ class VectorStore:
                 ],
             )
 
+            self._bump_version(collection_name)
             logger.debug("vector_upserted", collection=collection_name, id=id)
             return True
 
@@ -203,12 +333,17 @@ class VectorStore:
                     )
                 )
 
-            # 批量插入
-            self.client.upsert(
-                collection_name=collection_name,
-                points=points,
-            )
+            # 分块写入：前面的块不等待落盘（Qdrant 按序入队），最后一块等待完成，
+            # 返回时所有块均已生效
+            for start in range(0, len(points), QDRANT_BATCH_SIZE):
+                chunk = points[start:start + QDRANT_BATCH_SIZE]
+                await self.client.upsert(
+                    collection_name=collection_name,
+                    points=chunk,
+                    wait=start + QDRANT_BATCH_SIZE >= len(points),
+                )
 
+            self._bump_version(collection_name)
             logger.info(
                 "batch_upserted",
                 collection=collection_name,
@@ -223,10 +358,12 @@ class VectorStore:
     async def search(
         self,
         collection_name: str,
-        query: str,
+        query: Optional[str] = None,
         top_k: int = 5,
         filters: Optional[dict[str, Any]] = None,
         score_threshold: float = 0.5,
+        *,
+        query_vector: Optional[list[float]] = None,
     ) -> list[SearchResult]:
         """
         语义检索
@@ -237,56 +374,49 @@ class VectorStore:
             top_k: 返回数量
             filters: 过滤条件
             score_threshold: 分数阈值
+            query_vector: 已计算好的查询向量（提供时不再向量化 query）
 
         Returns:
             检索结果列表
         """
+        query = (query or "").strip()
+        if query_vector is None and len(query) < settings.VECTOR_SEARCH_MIN_QUERY_LEN:
+            # 过短的查询向量化后几乎没有语义，不发起检索
+            return []
+
+        empty_key = None
+        if query:
+            empty_key = (
+                collection_name,
+                self._collection_versions.get(collection_name, 0),
+                " ".join(query.lower().split()),
+                top_k,
+                score_threshold,
+                repr(sorted(filters.items())) if filters else None,
+            )
+            expires_at = self._empty_results.get(empty_key)
+            if expires_at is not None:
+                if expires_at > time.monotonic():
+                    return []
+                del self._empty_results[empty_key]
+
         try:
             # 生成查询向量
-            query_vector = await self.embedding_service.embed_text(query)
-
-            # 构建过滤条件
-            qdrant_filter = None
-            if filters:
-                conditions = []
-                for key, value in filters.items():
-                    if isinstance(value, list):
-                        conditions.append(
-                            models.FieldCondition(
-                                key=key,
-                                match=models.MatchAny(any=value),
-                            )
-                        )
-                    else:
-                        conditions.append(
-                            models.FieldCondition(
-                                key=key,
-                                match=models.MatchValue(value=value),
-                            )
-                        )
-                qdrant_filter = models.Filter(must=conditions)
+            if query_vector is None:
+                query_vector = await self.embedding_service.embed_text(query)
 
             # 执行检索
-            results = self.client.search(
+            response = await self.client.query_points(
                 collection_name=collection_name,
-                query_vector=query_vector,
+                query=query_vector,
                 limit=top_k,
-                query_filter=qdrant_filter,
+                query_filter=_build_filter(filters),
                 score_threshold=score_threshold,
+                search_params=_build_search_params(collection_name),
+                with_payload=True,
             )
 
-            # 转换结果
-            search_results = []
-            for hit in results:
-                payload = hit.payload or {}
-                search_results.append(
-                    SearchResult(
-                        id=str(hit.id),
-                        score=hit.score,
-                        content=payload.get("content", ""),
-                        metadata={k: v for k, v in payload.items() if k != "content"},
-                    )
-                )
+            search_results = _to_search_results(response.points)
 
             logger.debug(
                 "search_completed",
@@ -295,12 +425,89 @@ class VectorStore:
                 results_count=len(search_results),
             )
 
+            if not search_results and empty_key is not None:
+                self._remember_empty(empty_key)
             return search_results
 
         except Exception as e:
             logger.error("search_error", collection=collection_name, error=str(e))
             return []
 
+    async def search_batch(
+        self,
+        collection_name: str,
+        queries: list[str],
+        top_k: int = 5,
+        filters: Optional[list[Optional[dict[str, Any]]]] = None,
+        score_threshold: float = 0.5,
+        *,
+        query_vectors: Optional[list[list[float]]] = None,
+    ) -> list[list[SearchResult]]:
+        """
+        批量语义检索
+
+        多个子查询一次批量向量化，并通过一次 Qdrant query_batch_points 请求完成检索
+
+        Args:
+            collection_name: Collection 名称
+            queries: 查询文本列表
+            top_k: 每个查询的返回数量
+            filters: 与 queries 一一对应的过滤条件
+            score_threshold: 分数阈值
+            query_vectors: 与 queries 一一对应的已计算查询向量（提供时不再向量化）
+
+        Returns:
+            与 queries 顺序一致的检索结果列表
+        """
+        if not queries:
+            return []
+        if filters is None:
+            filters = [None] * len(queries)
+
+        try:
+            if query_vectors is None:
+                query_vectors = await self.embedding_service.embed_batch(queries)
+            search_params = _build_search_params(collection_name)
+
+            batch_responses = await self.client.query_batch_points(
+                collection_name=collection_name,
+                requests=[
+                    models.QueryRequest(
+                        query=vector,
+                        filter=_build_filter(query_filters),
+                        limit=top_k,
+                        score_threshold=score_threshold,
+                        params=search_params,
+                        with_payload=True,
+                    )
+                    for vector, query_filters in zip(query_vectors, filters, strict=True)
+                ],
+            )
+
+            logger.debug(
+                "search_batch_completed",
+                collection=collection_name,
+                queries_count=len(queries),
+            )
+
+            return [_to_search_results(response.points) for response in batch_responses]
+
+        except Exception as e:
+            logger.error("search_batch_error", collection=collection_name, error=str(e))
+            return [[] for _ in queries]
+
+    def _bump_version(self, collection_name: str) -> None:
+        """Collection 内容变更，使其空结果缓存失效"""
+        self._collection_versions[collection_name] = (
+            self._collection_versions.get(collection_name, 0) + 1
+        )
+
+    def _remember_empty(self, key: tuple) -> None:
+        """记录无结果的查询，超出容量时淘汰最早写入的条目"""
+        if len(self._empty_results) >= EMPTY_RESULT_CACHE_SIZE:
+            del self._empty_results[next(iter(self._empty_results))]
+        self._empty_results[key] = time.monotonic() + EMPTY_RESULT_TTL
+
     async def delete(
         self,
         collection_name: str,
@@ -308,10 +515,11 @@ class VectorStore:
     ) -> bool:
         """删除向量"""
         try:
-            self.client.delete(
+            await self.client.delete(
                 collection_name=collection_name,
                 points_selector=models.PointIdsList(points=ids),
             )
+            self._bump_version(collection_name)
             logger.info("vectors_deleted", collection=collection_name, count=len(ids))
             return True
         except Exception as e:
@@ -321,7 +529,7 @@ class VectorStore:
     async def get_collection_info(self, collection_name: str) -> Optional[dict[str, Any]]:
         """获取 Collection 信息"""
         try:
-            info = self.client.get_collection(collection_name)
+            info = await self.client.get_collection(collection_name)
             return {
                 "name": collection_name,
                 "vectors_count": info.vectors_count,
@@ -337,7 +545,7 @@ class VectorStore:
     async def health_check(self) -> bool:
         """健康检查"""
         try:
-            self.client.get_collections()
+            await self.client.get_collections()
             return True
         except Exception:
             return False
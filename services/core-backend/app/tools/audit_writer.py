@@ -0,0 +1,71 @@
+"""
+工具调用审计异步写入器
+
+工具执行器把 trace_ledger 审计记录放入队列立即返回，由后台任务批量落库
+"""
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logging import get_logger
+from app.database.models import TraceLedger
+from app.services.batch_insert_writer import BatchInsertWriter
+
+logger = get_logger(__name__)
+
+
+async def insert_trace_records(session: AsyncSession, records: List[Dict[str, Any]]) -> int:
+    """
+    写入 trace_ledger 审计记录（后台批量与同步兜底共用）
+
+    trace_id 唯一：同一 trace 的重复记录跳过，避免整批写入失败；跳过条数记录日志
+
+    Returns:
+        因 trace_id 重复被跳过的记录数
+    """
+    stmt = (
+        pg_insert(TraceLedger)
+        .on_conflict_do_nothing(index_elements=["trace_id"])
+        .returning(TraceLedger.trace_id)
+    )
+    result = await session.execute(stmt, records)
+    skipped = len(records) - len(result.all())
+    if skipped:
+        logger.warning(
+            "trace_ledger_duplicates_skipped",
+            skipped=skipped,
+            count=len(records),
+        )
+    return skipped
+
+
+class TraceLedgerWriter(BatchInsertWriter):
+    """工具调用审计批量写入器"""
+
+    model = TraceLedger
+
+    async def _insert(self, session: AsyncSession, batch: List[Dict[str, Any]]) -> None:
+        await insert_trace_records(session, batch)
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        # 执行器入队的是工具输出模型，在后台写入时才转成 JSONB 字典
+        for record in batch:
+            output = record.get("response_output")
+            if isinstance(output, BaseModel):
+                record["response_output"] = output.model_dump(mode="json")
+        await super()._write(batch)
+
+
+# 全局写入器实例
+_writer: Optional[TraceLedgerWriter] = None
+
+
+def get_trace_ledger_writer() -> TraceLedgerWriter:
+    """获取工具调用审计写入器单例"""
+    global _writer
+    if _writer is None:
+        _writer = TraceLedgerWriter()
+    return _writer
@@ -5,13 +5,16 @@
 """
 
 import hashlib
-import json
 import time
+import orjson
 import structlog
+from collections import OrderedDict
 from datetime import datetime
-from typing import Any, Dict, Optional
+from statistics import fmean
+from typing import Any, ClassVar, Dict, List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import and_, func, insert, lambda_stmt, select, text
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.tools.schemas import (
@@ -21,6 +24,7 @@ from app.tools.schemas import (
     ToolAudit,
     GetNPCProfileInput,
     GetNPCProfileOutput,
+    NPCPersona,
     SearchContentInput,
     SearchContentOutput,
     ContentItem,
@@ -42,24 +46,114 @@ from app.tools.schemas import (
     ListFeedbackOutput,
     FeedbackItem,
 )
+from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.middleware.request_cache import get_request_cache
+from app.tools.audit_writer import get_trace_ledger_writer, insert_trace_records
 from app.tools.registry import ToolRegistry, get_tool_registry
 from app.database.models import (
     NPCProfile,
+    NPCPrompt,
     Content,
-    TraceLedger,
+    Site,
     PolicyMode,
 )
 from app.database.models.user_feedback import UserFeedback, FeedbackStatus
 
 logger = structlog.get_logger(__name__)
 
+# 系统 Prompt 缓存：(profile_id, version, updated_at) -> prompt 文本，LRU 淘汰
+SYSTEM_PROMPT_CACHE_SIZE = 2048
+_system_prompt_cache: "OrderedDict[tuple, str]" = OrderedDict()
+
+# 站点地图单次返回的 POI / 路线上限
+SITE_MAP_MAX_ITEMS = 1000
+
+
+def _score_distribution(scores: List[float], **extra: int) -> Optional[Dict[str, Any]]:
+    """检索分数分布（min / max / avg / count），无结果时返回 None"""
+    if not scores:
+        return None
+    return {
+        "min": min(scores),
+        "max": max(scores),
+        "avg": fmean(scores),
+        "count": len(scores),
+        **extra,
+    }
+
+# pg_trgm 证据检索：相似度在子查询中只计算一次，摘录在 SQL 中截断；
+# 领域过滤按无 / 单个 / 多个拆成三条语句，单领域只传一个文本参数
+_EVIDENCE_TRGM_TEMPLATE = """
+    SELECT
+        id,
+        source_type,
+        source_ref,
+        title,
+        substr(excerpt, 1, 300) AS excerpt,
+        confidence,
+        verified,
+        tags,
+        retrieval_score
+    FROM (
+        SELECT
+            *,
+            GREATEST(
+                COALESCE(similarity(title, :query), 0),
+                COALESCE(similarity(excerpt, :query), 0)
+            ) AS retrieval_score
+        FROM evidences
+        WHERE tenant_id = :tenant_id
+          AND site_id = :site_id
+          AND deleted_at IS NULL
+          AND (
+              title % :query
+              OR excerpt % :query
+          )
+          {domain_filter}
+    ) AS matched
+    WHERE retrieval_score >= :min_score
+    ORDER BY retrieval_score DESC, confidence DESC
+    LIMIT :limit
+"""
+_EVIDENCE_TRGM_SQL = text(_EVIDENCE_TRGM_TEMPLATE.format(domain_filter=""))
+_EVIDENCE_TRGM_ONE_DOMAIN_SQL = text(_EVIDENCE_TRGM_TEMPLATE.format(
+    domain_filter="AND tags @> ARRAY[CAST(:domain AS text)]"
+))
+_EVIDENCE_TRGM_DOMAINS_SQL = text(_EVIDENCE_TRGM_TEMPLATE.format(
+    domain_filter="AND tags && CAST(:domains AS text[])"
+))
+
 
 class ToolExecutor:
     """工具执行器"""
 
+    # 工具名 -> 实现方法名
+    _HANDLERS: ClassVar[Dict[str, str]] = {
+        "get_npc_profile": "_handle_get_npc_profile",
+        "search_content": "_handle_search_content",
+        "get_site_map": "_handle_get_site_map",
+        "create_draft_content": "_handle_create_draft_content",
+        "log_user_event": "_handle_log_user_event",
+        "get_prompt_active": "_handle_get_prompt_active",
+        "retrieve_evidence": "_handle_retrieve_evidence",
+        "submit_feedback": "_handle_submit_feedback",
+        "list_feedback": "_handle_list_feedback",
+    }
+
+    # 证据检索策略 -> 实现方法名；qdrant / hybrid 的实现不抛异常，返回 None 表示需要降级到 trgm
+    _EVIDENCE_STRATEGIES: ClassVar[Dict[str, str]] = {
+        "like": "_retrieve_evidence_like",
+        "trgm": "_retrieve_evidence_trgm",
+        "qdrant": "_retrieve_evidence_qdrant_safe",
+        "hybrid": "_retrieve_evidence_hybrid_safe",
+    }
+
     def __init__(self, session: AsyncSession, registry: Optional[ToolRegistry] = None):
         self.session = session
         self.registry = registry or get_tool_registry()
+        # 本次调用是否走了降级路径（如查询失败返回空结果），降级结果不写入结果缓存
+        self._degraded = False
 
     async def execute(self, request: ToolCallRequest) -> ToolCallResponse:
         """
@@ -92,17 +186,32 @@ class ToolExecutor:
             if not tool_def:
                 raise ValueError(f"Unknown tool: {request.tool_name}")
 
-            # 2. 校验输入
-            validated_input = tool_def.input_schema(**request.input)
+            # 只读工具先查结果缓存；缓存只由校验通过的调用写入，命中时无需再校验
+            cache_key = None
+            if tool_def.cacheable and settings.TOOL_RESULT_CACHE_TTL > 0:
+                cache_key = (
+                    f"tool:{tool_def.name}:{tool_def.version}:"
+                    f"{ctx.tenant_id}:{ctx.site_id}:{payload_hash}"
+                )
+            output = await self._get_cached_output(cache_key) if cache_key else None
+
+            if output is None:
+                # 2. 校验输入
+                validated_input = tool_def.input_schema(**request.input)
 
-            # 3. 执行工具
-            log.info("tool_call_start")
-            output = await self._dispatch(request.tool_name, validated_input, ctx)
+                # 3. 执行工具
+                log.info("tool_call_start")
+                self._degraded = False
+                output = await self._dispatch(request.tool_name, validated_input, ctx)
+                if cache_key and not self._degraded:
+                    await self._set_cached_output(cache_key, output)
+            else:
+                log.info("tool_call_cache_hit")
 
             # 4. 计算延迟
             latency_ms = int((time.time() - start_time) * 1000)
 
-            # 5. 记录审计
+            # 5. 记录审计（交给后台写入器批量落库）
             audit = ToolAudit(
                 trace_id=ctx.trace_id,
                 tool_name=request.tool_name,
@@ -116,7 +225,7 @@ class ToolExecutor:
 
             return ToolCallResponse(
                 success=True,
-                output=output if isinstance(output, dict) else output.model_dump(),
+                output=output,
                 audit=audit,
             )
 
@@ -152,23 +261,11 @@ class ToolExecutor:
         ctx: ToolContext,
     ) -> Any:
         """分发到具体工具实现"""
-        handlers = {
-            "get_npc_profile": self._handle_get_npc_profile,
-            "search_content": self._handle_search_content,
-            "get_site_map": self._handle_get_site_map,
-            "create_draft_content": self._handle_create_draft_content,
-            "log_user_event": self._handle_log_user_event,
-            "get_prompt_active": self._handle_get_prompt_active,
-            "retrieve_evidence": self._handle_retrieve_evidence,
-            "submit_feedback": self._handle_submit_feedback,
-            "list_feedback": self._handle_list_feedback,
-        }
-
-        handler = handlers.get(tool_name)
-        if not handler:
+        method_name = self._HANDLERS.get(tool_name)
+        if not method_name:
             raise NotImplementedError(f"Tool handler not implemented: {tool_name}")
 
-        return await handler(validated_input, ctx)
+        return await getattr(self, method_name)(validated_input, ctx)
 
     # ============================================================
     # 工具实现
@@ -180,20 +277,7 @@ class ToolExecutor:
         ctx: ToolContext,
     ) -> GetNPCProfileOutput:
         """获取 NPC 人设"""
-        stmt = select(NPCProfile).where(
-            NPCProfile.tenant_id == ctx.tenant_id,
-            NPCProfile.site_id == ctx.site_id,
-            NPCProfile.npc_id == input.npc_id,
-            NPCProfile.deleted_at.is_(None),
-        )
-
-        if input.version is not None:
-            stmt = stmt.where(NPCProfile.version == input.version)
-        else:
-            stmt = stmt.where(NPCProfile.active == True)
-
-        result = await self.session.execute(stmt)
-        profile = result.scalar_one_or_none()
+        profile = await self._load_npc_profile(ctx, input.npc_id, input.version)
 
         if not profile:
             raise ValueError(f"NPC profile not found: {input.npc_id}")
@@ -229,39 +313,56 @@ class ToolExecutor:
         
         try:
             like_pattern = f"%{input.query}%"
+            tenant_id, site_id = ctx.tenant_id, ctx.site_id
+            content_type, status, tags, limit = (
+                input.content_type, input.status, input.tags, input.limit,
+            )
 
-            stmt = select(Content).where(
-                Content.tenant_id == ctx.tenant_id,
-                Content.site_id == ctx.site_id,
-                Content.deleted_at.is_(None),
-                (Content.title.ilike(like_pattern) | Content.body.ilike(like_pattern)),
+            # 只取输出所需的列，正文在 SQL 中截断，不构造 ORM 实体
+            stmt = lambda_stmt(
+                lambda: select(
+                    Content.id,
+                    Content.content_type,
+                    Content.title,
+                    Content.summary,
+                    func.coalesce(func.substr(Content.body, 1, 500), "").label("body"),
+                    Content.tags,
+                    Content.domains,
+                    Content.credibility_score,
+                    Content.verified,
+                ).where(
+                    Content.tenant_id == tenant_id,
+                    Content.site_id == site_id,
+                    Content.deleted_at.is_(None),
+                    (Content.title.ilike(like_pattern) | Content.body.ilike(like_pattern)),
+                )
             )
 
-            if input.content_type:
-                stmt = stmt.where(Content.content_type == input.content_type)
-            if input.status:
-                stmt = stmt.where(Content.status == input.status)
-            if input.tags:
-                stmt = stmt.where(Content.tags.overlap(input.tags))
+            if content_type:
+                stmt += lambda s: s.where(Content.content_type == content_type)
+            if status:
+                stmt += lambda s: s.where(Content.status == status)
+            if tags:
+                stmt += lambda s: s.where(Content.tags.overlap(tags))
 
-            stmt = stmt.order_by(Content.credibility_score.desc()).limit(input.limit)
+            stmt += lambda s: s.order_by(Content.credibility_score.desc()).limit(limit)
 
             result = await self.session.execute(stmt)
-            contents = result.scalars().all()
 
+            # 行数据来自数据库、类型已确定，跳过逐字段校验
             items = [
-                ContentItem(
+                ContentItem.model_construct(
                     id=str(c.id),
                     content_type=c.content_type,
                     title=c.title,
                     summary=c.summary,
-                    body=c.body[:500] if c.body and len(c.body) > 500 else (c.body or ""),
+                    body=c.body,
                     tags=c.tags or [],
                     domains=c.domains or [],
                     credibility_score=c.credibility_score,
                     verified=c.verified,
                 )
-                for c in contents
+                for c in result
             ]
 
             log.info("search_content_success", hit_count=len(items))
@@ -273,7 +374,8 @@ class ToolExecutor:
             )
         except Exception as e:
             log.error("search_content_error", error=str(e))
-            # 返回空结果，不抛异常
+            # 返回空结果，不抛异常；空结果不代表真实数据，不能被缓存
+            self._degraded = True
             return SearchContentOutput(
                 items=[],
                 total=0,
@@ -286,60 +388,68 @@ class ToolExecutor:
         ctx: ToolContext,
     ) -> GetSiteMapOutput:
         """获取站点地图"""
-        from app.database.models import Site
+        tenant_id, site_id = ctx.tenant_id, ctx.site_id
+        content_types = [
+            content_type
+            for content_type, included in (("poi", input.include_pois), ("route", input.include_routes))
+            if included
+        ]
 
-        # 获取站点信息
-        site_stmt = select(Site).where(
-            Site.id == ctx.site_id,
-            Site.tenant_id == ctx.tenant_id,
+        # 站点与其已发布的 POI / 路线内容一次查询取回（LEFT JOIN，站点不存在时无行）；
+        # 只取输出所需的列，不构造 ORM 实体
+        stmt = lambda_stmt(
+            lambda: select(
+                Site.id,
+                Site.name,
+                Content.id.label("content_id"),
+                Content.content_type,
+                Content.title,
+                Content.summary,
+                Content.category,
+            )
+            .select_from(Site)
+            .outerjoin(
+                Content,
+                and_(
+                    Content.tenant_id == Site.tenant_id,
+                    Content.site_id == Site.id,
+                    Content.content_type.in_(content_types),
+                    Content.status == "published",
+                    Content.deleted_at.is_(None),
+                ),
+            )
+            .where(
+                Site.id == site_id,
+                Site.tenant_id == tenant_id,
+            )
+            .limit(SITE_MAP_MAX_ITEMS)
         )
-        site_result = await self.session.execute(site_stmt)
-        site = site_result.scalar_one_or_none()
-
-        if not site:
-            raise ValueError(f"Site not found: {ctx.site_id}")
+        result = await self.session.execute(stmt)
 
+        # 逐行遍历结果，不先物化整个行列表
+        site = None
         pois = []
         routes = []
 
-        if input.include_pois:
-            # 从 content 表获取 POI 类型的内容
-            poi_stmt = select(Content).where(
-                Content.tenant_id == ctx.tenant_id,
-                Content.site_id == ctx.site_id,
-                Content.content_type == "poi",
-                Content.status == "published",
-                Content.deleted_at.is_(None),
-            )
-            poi_result = await self.session.execute(poi_stmt)
-            poi_contents = poi_result.scalars().all()
-
-            pois = [
-                POIItem(
-                    id=str(c.id),
-                    name=c.title,
-                    type=c.category or "default",
-                    description=c.summary,
+        for c in result:
+            if site is None:
+                site = c
+            if c.content_type == "poi":
+                pois.append(
+                    POIItem.model_construct(
+                        id=str(c.content_id),
+                        name=c.title,
+                        type=c.category or "default",
+                        description=c.summary,
+                    )
+                )
+            elif c.content_type == "route":
+                routes.append(
+                    {"id": str(c.content_id), "name": c.title, "description": c.summary}
                 )
-                for c in poi_contents
-            ]
-
-        if input.include_routes:
-            # 从 content 表获取 route 类型的内容
-            route_stmt = select(Content).where(
-                Content.tenant_id == ctx.tenant_id,
-                Content.site_id == ctx.site_id,
-                Content.content_type == "route",
-                Content.status == "published",
-                Content.deleted_at.is_(None),
-            )
-            route_result = await self.session.execute(route_stmt)
-            route_contents = route_result.scalars().all()
 
-            routes = [
-                {"id": str(c.id), "name": c.title, "description": c.summary}
-                for c in route_contents
-            ]
+        if site is None:
+            raise ValueError(f"Site not found: {ctx.site_id}")
 
         return GetSiteMapOutput(
             site_id=site.id,
@@ -354,23 +464,25 @@ class ToolExecutor:
         ctx: ToolContext,
     ) -> CreateDraftContentOutput:
         """创建草稿内容"""
-        content = Content(
-            tenant_id=ctx.tenant_id,
-            site_id=ctx.site_id,
-            content_type=input.content_type,
-            title=input.title,
-            body=input.body,
-            summary=input.summary,
-            tags=input.tags,
-            domains=input.domains,
-            source=input.source,
-            status="draft",
-            created_by=ctx.user_id or "system",
+        # INSERT ... RETURNING 直接取回服务端生成的字段，无需 flush 后再 refresh
+        result = await self.session.execute(
+            insert(Content)
+            .values(
+                tenant_id=ctx.tenant_id,
+                site_id=ctx.site_id,
+                content_type=input.content_type,
+                title=input.title,
+                body=input.body,
+                summary=input.summary,
+                tags=input.tags,
+                domains=input.domains,
+                source=input.source,
+                status="draft",
+                created_by=ctx.user_id or "system",
+            )
+            .returning(Content.id, Content.status, Content.created_at)
         )
-
-        self.session.add(content)
-        await self.session.flush()
-        await self.session.refresh(content)
+        content = result.one()
 
         return CreateDraftContentOutput(
             content_id=str(content.id),
@@ -386,19 +498,20 @@ class ToolExecutor:
         """记录用户事件"""
         from app.database.models.analytics_event import AnalyticsEvent
 
-        event = AnalyticsEvent(
-            tenant_id=ctx.tenant_id,
-            site_id=ctx.site_id,
-            trace_id=ctx.trace_id,
-            user_id=input.user_id or ctx.user_id,
-            session_id=input.session_id or ctx.session_id,
-            event_type=input.event_type,
-            event_data=input.event_data,
+        result = await self.session.execute(
+            insert(AnalyticsEvent)
+            .values(
+                tenant_id=ctx.tenant_id,
+                site_id=ctx.site_id,
+                trace_id=ctx.trace_id,
+                user_id=input.user_id or ctx.user_id,
+                session_id=input.session_id or ctx.session_id,
+                event_type=input.event_type,
+                event_data=input.event_data,
+            )
+            .returning(AnalyticsEvent.id, AnalyticsEvent.created_at)
         )
-
-        self.session.add(event)
-        await self.session.flush()
-        await self.session.refresh(event)
+        event = result.one()
 
         return LogUserEventOutput(
             event_id=str(event.id),
@@ -416,15 +529,17 @@ class ToolExecutor:
         优先从 npc_prompts 表（Prompt Registry）加载
         如果不存在，回退到 npc_profiles 表
         """
-        from app.database.models import NPCPrompt
+        tenant_id, site_id, npc_id = ctx.tenant_id, ctx.site_id, input.npc_id
 
         # 1. 优先从 Prompt Registry 加载
-        stmt = select(NPCPrompt).where(
-            NPCPrompt.tenant_id == ctx.tenant_id,
-            NPCPrompt.site_id == ctx.site_id,
-            NPCPrompt.npc_id == input.npc_id,
-            NPCPrompt.active == True,
-            NPCPrompt.deleted_at.is_(None),
+        stmt = lambda_stmt(
+            lambda: select(NPCPrompt).where(
+                NPCPrompt.tenant_id == tenant_id,
+                NPCPrompt.site_id == site_id,
+                NPCPrompt.npc_id == npc_id,
+                NPCPrompt.active == True,
+                NPCPrompt.deleted_at.is_(None),
+            )
         )
         result = await self.session.execute(stmt)
         prompt_record = result.scalar_one_or_none()
@@ -453,28 +568,14 @@ class ToolExecutor:
             )
 
         # 2. 回退到 NPC Profile
-        stmt = select(NPCProfile).where(
-            NPCProfile.tenant_id == ctx.tenant_id,
-            NPCProfile.site_id == ctx.site_id,
-            NPCProfile.npc_id == input.npc_id,
-            NPCProfile.active == True,
-            NPCProfile.deleted_at.is_(None),
-        )
-
-        result = await self.session.execute(stmt)
-        profile = result.scalar_one_or_none()
+        profile = await self._load_npc_profile(ctx, input.npc_id)
 
         if not profile:
             raise ValueError(f"NPC profile not found: {input.npc_id}")
 
         # 根据 prompt_type 构建 prompt 文本
-        persona = profile.persona or {}
-        identity = persona.get("identity", {})
-        personality = persona.get("personality", {})
-        constraints = persona.get("constraints", {})
-
         if input.prompt_type == "system":
-            prompt_text = self._build_system_prompt(profile, identity, personality, constraints)
+            prompt_text = self._build_system_prompt(profile)
         elif input.prompt_type == "greeting":
             templates = profile.greeting_templates or []
             prompt_text = templates[0] if templates else f"你好，我是{profile.display_name or profile.name}。"
@@ -518,13 +619,17 @@ class ToolExecutor:
         2. qdrant: Qdrant 向量语义检索
         3. hybrid: 混合检索（trgm + qdrant）
         """
-        from app.core.config import settings
 
         original_strategy = input.strategy
         strategy = original_strategy
         if not strategy or strategy not in ("trgm", "qdrant", "hybrid"):
             strategy = settings.RETRIEVAL_STRATEGY
-        
+            if strategy not in self._EVIDENCE_STRATEGIES:
+                strategy = "trgm"
+        # 向后兼容：use_trgm=False 时使用 LIKE
+        if not input.use_trgm and strategy == "trgm":
+            strategy = "like"
+
         log = logger.bind(
             query=input.query[:50],
             original_strategy=original_strategy,
@@ -535,69 +640,25 @@ class ToolExecutor:
         fallback_reason = None
         strategy_used = strategy
 
-        # 向后兼容：use_trgm=False 时使用 LIKE
-        if not input.use_trgm and strategy == "trgm":
-            try:
-                return await self._retrieve_evidence_like(input, ctx, log)
-            except Exception as e:
-                log.error("retrieve_evidence_like_error", error=str(e))
-                # LIKE 失败返回空结果，不抛异常
-                return self._empty_evidence_output(
-                    input.query, "like", "like_error", str(e)
-                )
+        try:
+            result = await getattr(self, self._EVIDENCE_STRATEGIES[strategy])(input, ctx, log)
+            if result is not None:
+                return result
 
-        if strategy == "trgm":
-            try:
-                return await self._retrieve_evidence_trgm(input, ctx, log)
-            except Exception as e:
-                log.error("retrieve_evidence_trgm_error", error=str(e))
-                return self._empty_evidence_output(
-                    input.query, "trgm", "trgm_error", str(e)
-                )
+            # qdrant / hybrid 不可用，降级到 trgm
+            fallback_reason = f"{strategy}_unavailable"
+            strategy_used = "trgm_fallback"
+            log.warning("retrieve_evidence_fallback_trgm", fallback_reason=fallback_reason)
 
-        # qdrant 或 hybrid 策略：需要兜底
-        if strategy == "qdrant":
-            try:
-                result = await self._retrieve_evidence_qdrant_safe(input, ctx, log)
-                if result is not None:
-                    return result
-                # Qdrant 不可用，fallback 到 trgm
-                fallback_reason = "qdrant_unavailable"
-                strategy_used = "trgm_fallback"
-            except Exception as e:
-                log.warning("retrieve_evidence_qdrant_fallback", error=str(e))
-                fallback_reason = f"qdrant_error: {str(e)[:100]}"
-                strategy_used = "trgm_fallback"
-
-        elif strategy == "hybrid":
-            try:
-                result = await self._retrieve_evidence_hybrid_safe(input, ctx, log)
-                if result is not None:
-                    return result
-                # Hybrid 失败，fallback 到 trgm
-                fallback_reason = "hybrid_unavailable"
-                strategy_used = "trgm_fallback"
-            except Exception as e:
-                log.warning("retrieve_evidence_hybrid_fallback", error=str(e))
-                fallback_reason = f"hybrid_error: {str(e)[:100]}"
-                strategy_used = "trgm_fallback"
-
-        # Fallback 到 trgm
-        log.warning(
-            "retrieve_evidence_fallback_trgm",
-            original_strategy=strategy,
-            fallback_reason=fallback_reason,
-        )
-        try:
             result = await self._retrieve_evidence_trgm(input, ctx, log)
-            # 标记为 fallback
             result.strategy_used = strategy_used
             result.fallback_reason = fallback_reason
             return result
         except Exception as e:
-            log.error("retrieve_evidence_trgm_fallback_error", error=str(e))
+            # 检索失败返回空结果，不抛异常
+            log.error("retrieve_evidence_error", strategy_used=strategy_used, error=str(e))
             return self._empty_evidence_output(
-                input.query, strategy_used, fallback_reason, str(e)
+                input.query, strategy_used, fallback_reason or f"{strategy}_error", str(e)
             )
 
     def _empty_evidence_output(
@@ -629,9 +690,9 @@ class ToolExecutor:
         
         返回 None 表示需要 fallback
         """
-        from app.retrieval.qdrant_client import get_qdrant_client
-
         try:
+            from app.retrieval.qdrant_client import get_qdrant_client
+
             qdrant = get_qdrant_client()
             
             # 检查 Qdrant 可用性
@@ -650,7 +711,7 @@ class ToolExecutor:
 
             # 如果 Qdrant 返回空结果但没有错误，仍然是有效结果
             items = [
-                EvidenceItem(
+                EvidenceItem.model_construct(
                     id=r.id,
                     source_type=r.source_type,
                     source_ref=r.source_ref,
@@ -658,22 +719,14 @@ class ToolExecutor:
                     excerpt=r.excerpt[:300] if r.excerpt and len(r.excerpt) > 300 else r.excerpt,
                     confidence=r.confidence,
                     verified=r.verified,
-                    tags=r.tags,
+                    tags=r.tags or [],
                     retrieval_score=r.score,
-                    qdrant_score=r.qdrant_score if hasattr(r, 'qdrant_score') else r.score,
+                    qdrant_score=getattr(r, "qdrant_score", r.score),
                 )
                 for r in results
             ]
 
-            scores = [r.score for r in results]
-            score_distribution = None
-            if scores:
-                score_distribution = {
-                    "min": min(scores),
-                    "max": max(scores),
-                    "avg": sum(scores) / len(scores),
-                    "count": len(scores),
-                }
+            score_distribution = _score_distribution([r.score for r in results])
 
             log.info("retrieve_evidence_qdrant_success", hit_count=len(items))
 
@@ -701,10 +754,10 @@ class ToolExecutor:
         
         返回 None 表示需要 fallback
         """
-        from app.retrieval.hybrid import HybridRetriever
-        from app.retrieval.qdrant_client import get_qdrant_client
-
         try:
+            from app.retrieval.hybrid import HybridRetriever
+            from app.retrieval.qdrant_client import get_qdrant_client
+
             qdrant = get_qdrant_client()
             
             # 检查 Qdrant 可用性（hybrid 需要 qdrant）
@@ -726,8 +779,17 @@ class ToolExecutor:
                 domains=input.domains,
             )
 
-            items = [
-                EvidenceItem(
+            # 构造结果的同一遍循环中统计各路命中数
+            items = []
+            scores = []
+            trgm_hits = qdrant_hits = 0
+            for r in results:
+                trgm_score = getattr(r, "trgm_score", None)
+                qdrant_score = getattr(r, "qdrant_score", None)
+                trgm_hits += bool(trgm_score)
+                qdrant_hits += bool(qdrant_score)
+                scores.append(r.score)
+                items.append(EvidenceItem.model_construct(
                     id=r.id,
                     source_type=r.source_type,
                     source_ref=r.source_ref,
@@ -735,25 +797,15 @@ class ToolExecutor:
                     excerpt=r.excerpt[:300] if r.excerpt and len(r.excerpt) > 300 else r.excerpt,
                     confidence=r.confidence,
                     verified=r.verified,
-                    tags=r.tags,
+                    tags=r.tags or [],
                     retrieval_score=r.score,
-                    trgm_score=r.trgm_score if hasattr(r, 'trgm_score') else None,
-                    qdrant_score=r.qdrant_score if hasattr(r, 'qdrant_score') else None,
-                )
-                for r in results
-            ]
+                    trgm_score=trgm_score,
+                    qdrant_score=qdrant_score,
+                ))
 
-            scores = [r.score for r in results]
-            score_distribution = None
-            if scores:
-                score_distribution = {
-                    "min": min(scores),
-                    "max": max(scores),
-                    "avg": sum(scores) / len(scores),
-                    "count": len(scores),
-                    "trgm_hits": sum(1 for r in results if hasattr(r, 'trgm_score') and r.trgm_score),
-                    "qdrant_hits": sum(1 for r in results if hasattr(r, 'qdrant_score') and r.qdrant_score),
-                }
+            score_distribution = _score_distribution(
+                scores, trgm_hits=trgm_hits, qdrant_hits=qdrant_hits
+            )
 
             log.info("retrieve_evidence_hybrid_success", hit_count=len(items))
 
@@ -777,132 +829,37 @@ class ToolExecutor:
         log,
     ) -> RetrieveEvidenceOutput:
         """使用 pg_trgm 相似度搜索"""
-        from sqlalchemy import text
-
-        # 构建原生 SQL 查询，使用 similarity() 函数
-        # GREATEST 取 title 和 excerpt 相似度的最大值
-        sql = text("""
-            SELECT
-                id,
-                source_type,
-                source_ref,
-                title,
-                excerpt,
-                confidence,
-                verified,
-                tags,
-                GREATEST(
-                    COALESCE(similarity(title, :query), 0),
-                    COALESCE(similarity(excerpt, :query), 0)
-                ) AS retrieval_score
-            FROM evidences
-            WHERE tenant_id = :tenant_id
-              AND site_id = :site_id
-              AND deleted_at IS NULL
-              AND (
-                  title % :query
-                  OR excerpt % :query
-              )
-              AND GREATEST(
-                  COALESCE(similarity(title, :query), 0),
-                  COALESCE(similarity(excerpt, :query), 0)
-              ) >= :min_score
-        """)
-
-        # 添加 domains 过滤
-        if input.domains:
-            sql = text("""
-                SELECT
-                    id,
-                    source_type,
-                    source_ref,
-                    title,
-                    excerpt,
-                    confidence,
-                    verified,
-                    tags,
-                    GREATEST(
-                        COALESCE(similarity(title, :query), 0),
-                        COALESCE(similarity(excerpt, :query), 0)
-                    ) AS retrieval_score
-                FROM evidences
-                WHERE tenant_id = :tenant_id
-                  AND site_id = :site_id
-                  AND deleted_at IS NULL
-                  AND (
-                      title % :query
-                      OR excerpt % :query
-                  )
-                  AND GREATEST(
-                      COALESCE(similarity(title, :query), 0),
-                      COALESCE(similarity(excerpt, :query), 0)
-                  ) >= :min_score
-                  AND tags && :domains
-                ORDER BY retrieval_score DESC, confidence DESC
-                LIMIT :limit
-            """)
-            params = {
-                "tenant_id": ctx.tenant_id,
-                "site_id": ctx.site_id,
-                "query": input.query,
-                "min_score": input.min_score,
-                "domains": input.domains,
-                "limit": input.limit,
-            }
+        params = {
+            "tenant_id": ctx.tenant_id,
+            "site_id": ctx.site_id,
+            "query": input.query,
+            "min_score": input.min_score,
+            "limit": input.limit,
+        }
+        domains = input.domains or []
+        if len(domains) == 1:
+            stmt = _EVIDENCE_TRGM_ONE_DOMAIN_SQL
+            params["domain"] = domains[0]
+        elif domains:
+            stmt = _EVIDENCE_TRGM_DOMAINS_SQL
+            params["domains"] = domains
         else:
-            sql = text("""
-                SELECT
-                    id,
-                    source_type,
-                    source_ref,
-                    title,
-                    excerpt,
-                    confidence,
-                    verified,
-                    tags,
-                    GREATEST(
-                        COALESCE(similarity(title, :query), 0),
-                        COALESCE(similarity(excerpt, :query), 0)
-                    ) AS retrieval_score
-                FROM evidences
-                WHERE tenant_id = :tenant_id
-                  AND site_id = :site_id
-                  AND deleted_at IS NULL
-                  AND (
-                      title % :query
-                      OR excerpt % :query
-                  )
-                  AND GREATEST(
-                      COALESCE(similarity(title, :query), 0),
-                      COALESCE(similarity(excerpt, :query), 0)
-                  ) >= :min_score
-                ORDER BY retrieval_score DESC, confidence DESC
-                LIMIT :limit
-            """)
-            params = {
-                "tenant_id": ctx.tenant_id,
-                "site_id": ctx.site_id,
-                "query": input.query,
-                "min_score": input.min_score,
-                "limit": input.limit,
-            }
-
-        result = await self.session.execute(sql, params)
-        rows = result.fetchall()
+            stmt = _EVIDENCE_TRGM_SQL
 
+        result = await self.session.execute(stmt, params)
         items = []
         scores = []
 
-        for row in rows:
+        for row in result:
             score = float(row.retrieval_score) if row.retrieval_score else 0.0
             scores.append(score)
 
-            items.append(EvidenceItem(
+            items.append(EvidenceItem.model_construct(
                 id=str(row.id),
                 source_type=row.source_type,
                 source_ref=row.source_ref,
                 title=row.title,
-                excerpt=row.excerpt[:300] if row.excerpt and len(row.excerpt) > 300 else row.excerpt,
+                excerpt=row.excerpt,
                 confidence=float(row.confidence) if row.confidence else 1.0,
                 verified=bool(row.verified),
                 tags=list(row.tags) if row.tags else [],
@@ -910,14 +867,7 @@ class ToolExecutor:
             ))
 
         # 计算分数分布
-        score_distribution = None
-        if scores:
-            score_distribution = {
-                "min": min(scores),
-                "max": max(scores),
-                "avg": sum(scores) / len(scores),
-                "count": len(scores),
-            }
+        score_distribution = _score_distribution(scores)
 
         log.info(
             "retrieve_evidence_trgm",
@@ -945,7 +895,17 @@ class ToolExecutor:
 
         like_pattern = f"%{input.query}%"
 
-        stmt = select(Evidence).where(
+        # 只取输出所需的列，摘录在 SQL 中截断
+        stmt = select(
+            Evidence.id,
+            Evidence.source_type,
+            Evidence.source_ref,
+            Evidence.title,
+            func.substr(Evidence.excerpt, 1, 300).label("excerpt"),
+            Evidence.confidence,
+            Evidence.verified,
+            Evidence.tags,
+        ).where(
             Evidence.tenant_id == ctx.tenant_id,
             Evidence.site_id == ctx.site_id,
             Evidence.deleted_at.is_(None),
@@ -958,21 +918,20 @@ class ToolExecutor:
         stmt = stmt.order_by(Evidence.confidence.desc()).limit(input.limit)
 
         result = await self.session.execute(stmt)
-        evidences = result.scalars().all()
 
         items = [
-            EvidenceItem(
+            EvidenceItem.model_construct(
                 id=str(e.id),
                 source_type=e.source_type.value if hasattr(e.source_type, 'value') else str(e.source_type),
                 source_ref=e.source_ref,
                 title=e.title,
-                excerpt=e.excerpt[:300] if e.excerpt and len(e.excerpt) > 300 else e.excerpt,
+                excerpt=e.excerpt,
                 confidence=e.confidence,
                 verified=e.verified,
                 tags=e.tags or [],
                 retrieval_score=None,  # LIKE 搜索无分数
             )
-            for e in evidences
+            for e in result
         ]
 
         log.info("retrieve_evidence_like", hit_count=len(items))
@@ -1062,7 +1021,6 @@ class ToolExecutor:
             .limit(input.limit)
         )
         result = await self.session.execute(query)
-        feedbacks = result.scalars().all()
 
         items = [
             FeedbackItem(
@@ -1074,43 +1032,59 @@ class ToolExecutor:
                 status=f.status,
                 created_at=f.created_at,
             )
-            for f in feedbacks
+            for f in result.scalars()
         ]
 
         return ListFeedbackOutput(items=items, total=total)
 
-    def _build_system_prompt(
-        self,
-        profile: NPCProfile,
-        identity: Dict,
-        personality: Dict,
-        constraints: Dict,
-    ) -> str:
-        """构建系统 Prompt"""
+    def _build_system_prompt(self, profile: NPCProfile) -> str:
+        """
+        构建系统 Prompt
+
+        结果只取决于人设内容：按 (id, version, updated_at) 缓存，人设原地修改时 updated_at 变化即失效；
+        persona JSONB 只在未命中时解析一次
+        """
+        cache_key = (profile.id, profile.version, profile.updated_at)
+        prompt = _system_prompt_cache.get(cache_key)
+        if prompt is not None:
+            _system_prompt_cache.move_to_end(cache_key)
+            return prompt
+
+        persona = NPCPersona.model_validate(profile.persona or {})
+        prompt = self._render_system_prompt(profile, persona)
+        _system_prompt_cache[cache_key] = prompt
+        if len(_system_prompt_cache) > SYSTEM_PROMPT_CACHE_SIZE:
+            _system_prompt_cache.popitem(last=False)
+        return prompt
+
+    def _render_system_prompt(self, profile: NPCProfile, persona: NPCPersona) -> str:
+        """拼接系统 Prompt 文本"""
         parts = []
+        identity = persona.identity
+        personality = persona.personality
 
         # 身份
         parts.append(f"你是{profile.display_name or profile.name}。")
-        if identity.get("era"):
-            parts.append(f"你生活在{identity['era']}。")
-        if identity.get("role"):
-            parts.append(f"你的身份是{identity['role']}。")
-        if identity.get("background"):
-            parts.append(f"背景：{identity['background']}")
+        if identity.era:
+            parts.append(f"你生活在{identity.era}。")
+        if identity.role:
+            parts.append(f"你的身份是{identity.role}。")
+        if identity.background:
+            parts.append(f"背景：{identity.background}")
 
         # 性格
-        if personality.get("traits"):
-            parts.append(f"你的性格特点：{'、'.join(personality['traits'])}。")
-        if personality.get("speaking_style"):
-            parts.append(f"说话风格：{personality['speaking_style']}")
+        if personality.traits:
+            parts.append(f"你的性格特点：{'、'.join(personality.traits)}。")
+        if personality.speaking_style:
+            parts.append(f"说话风格：{personality.speaking_style}")
 
         # 知识领域
         if profile.knowledge_domains:
             parts.append(f"你擅长的领域：{'、'.join(profile.knowledge_domains)}。")
 
         # 约束
-        if constraints.get("forbidden_topics"):
-            parts.append(f"禁止讨论的话题：{'、'.join(constraints['forbidden_topics'])}。")
+        if persona.constraints.forbidden_topics:
+            parts.append(f"禁止讨论的话题：{'、'.join(persona.constraints.forbidden_topics)}。")
         if profile.must_cite_sources:
             parts.append("回答时请引用可靠来源。")
         if profile.max_response_length:
@@ -1122,10 +1096,75 @@ class ToolExecutor:
     # 辅助方法
     # ============================================================
 
+    async def _load_npc_profile(
+        self,
+        ctx: ToolContext,
+        npc_id: str,
+        version: Optional[int] = None,
+    ) -> Optional[NPCProfile]:
+        """
+        加载 NPC 人设（未指定版本时取激活版本）
+
+        同一请求内的重复查询由请求级缓存去重
+        """
+        tenant_id, site_id = ctx.tenant_id, ctx.site_id
+        cache_key = (tenant_id, site_id, npc_id, version)
+        cache = get_request_cache("npc_profile")
+        if cache is not None and cache_key in cache:
+            return cache[cache_key]
+
+        # lambda_stmt 按代码位置缓存语句构造与编译结果，闭包变量作为绑定参数
+        stmt = lambda_stmt(
+            lambda: select(NPCProfile).where(
+                NPCProfile.tenant_id == tenant_id,
+                NPCProfile.site_id == site_id,
+                NPCProfile.npc_id == npc_id,
+                NPCProfile.deleted_at.is_(None),
+            )
+        )
+
+        if version is not None:
+            stmt += lambda s: s.where(NPCProfile.version == version)
+        else:
+            stmt += lambda s: s.where(NPCProfile.active == True)
+
+        result = await self.session.execute(stmt)
+        profile = result.scalar_one_or_none()
+        if cache is not None and profile is not None:
+            cache[cache_key] = profile
+        return profile
+
     def _hash_payload(self, payload: Dict[str, Any]) -> str:
         """计算 payload hash"""
-        payload_str = json.dumps(payload, sort_keys=True, ensure_ascii=False)
-        return hashlib.sha256(payload_str.encode()).hexdigest()[:16]
+        # 审计指纹无需密码学强度：orjson 直接输出 UTF-8 字节，blake2b 取 64 位摘要（16 位十六进制）
+        payload_bytes = orjson.dumps(
+            payload,
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+            default=str,
+        )
+        return hashlib.blake2b(payload_bytes, digest_size=8).hexdigest()
+
+    async def _get_cached_output(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取工具结果缓存，Redis 不可用时视为未命中"""
+        try:
+            redis_client = await get_redis()
+            raw = await redis_client.get(key)
+        except Exception as e:
+            logger.warning("tool_cache_get_error", key=key, error=str(e))
+            return None
+        return orjson.loads(raw) if raw is not None else None
+
+    async def _set_cached_output(self, key: str, output: BaseModel) -> None:
+        """写入工具结果缓存，失败不影响调用结果"""
+        try:
+            redis_client = await get_redis()
+            await redis_client.setex(
+                key,
+                settings.TOOL_RESULT_CACHE_TTL,
+                output.model_dump_json(),
+            )
+        except Exception as e:
+            logger.warning("tool_cache_set_error", key=key, error=str(e))
 
     async def _record_audit(
         self,
@@ -1135,33 +1174,42 @@ class ToolExecutor:
         output: Any,
         error: Optional[str] = None,
     ) -> None:
-        """记录审计到 trace_ledger"""
-        trace = TraceLedger(
-            tenant_id=ctx.tenant_id,
-            site_id=ctx.site_id,
-            trace_id=ctx.trace_id,
-            span_id=ctx.span_id,
-            session_id=ctx.session_id,
-            user_id=ctx.user_id,
-            npc_id=ctx.npc_id,
-            request_type="tool_call",
-            request_input={"tool_name": tool_name},
-            tool_calls=[{
+        """
+        记录审计到 trace_ledger
+
+        优先交给后台写入器批量落库；写入器未启动（脚本、测试）或队列已满时在当前会话中同步写入
+        """
+        now = datetime.utcnow()
+        record = {
+            "tenant_id": ctx.tenant_id,
+            "site_id": ctx.site_id,
+            "trace_id": ctx.trace_id,
+            "span_id": ctx.span_id,
+            "session_id": ctx.session_id,
+            "user_id": ctx.user_id,
+            "npc_id": ctx.npc_id,
+            "request_type": "tool_call",
+            "request_input": {"tool_name": tool_name},
+            "tool_calls": [{
                 "name": tool_name,
                 "status": audit.status,
                 "latency_ms": audit.latency_ms,
                 "payload_hash": audit.request_payload_hash,
             }],
-            policy_mode=PolicyMode.NORMAL.value,
-            latency_ms=audit.latency_ms,
-            status=audit.status,
-            error=error,
-            started_at=datetime.utcnow(),
-            completed_at=datetime.utcnow(),
-        )
+            "policy_mode": PolicyMode.NORMAL.value,
+            "latency_ms": audit.latency_ms,
+            "status": audit.status,
+            "error": error,
+            "started_at": now,
+            "completed_at": now,
+        }
 
-        if output:
-            trace.response_output = output if isinstance(output, dict) else output.model_dump()
+        # 输出模型原样入队，由写入器落库前再转成 JSON 字典，不占用请求路径
+        if output is not None:
+            record["response_output"] = output
 
-        self.session.add(trace)
-        await self.session.flush()
+        if get_trace_ledger_writer().enqueue(record):
+            return
+        if isinstance(output, BaseModel):
+            record["response_output"] = output.model_dump(mode="json")
+        await insert_trace_records(self.session, [record])
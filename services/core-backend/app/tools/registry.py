@@ -41,6 +41,7 @@ class ToolDefinition:
         handler: Optional[Callable] = None,
         requires_auth: bool = True,
         ai_callable: bool = True,
+        cacheable: bool = False,
     ):
         self.name = name
         self.version = version
@@ -51,6 +52,8 @@ class ToolDefinition:
         self.handler = handler
         self.requires_auth = requires_auth
         self.ai_callable = ai_callable
+        # 只读且结果仅由 (租户, 站点, 输入) 决定的工具可缓存结果
+        self.cacheable = cacheable
 
     def to_metadata(self) -> ToolMetadata:
         """转换为元数据"""
@@ -83,6 +86,7 @@ class ToolRegistry:
             category="npc",
             input_schema=GetNPCProfileInput,
             output_schema=GetNPCProfileOutput,
+            cacheable=True,
         ))
 
         # 2. search_content
@@ -93,6 +97,7 @@ class ToolRegistry:
             category="content",
             input_schema=SearchContentInput,
             output_schema=SearchContentOutput,
+            cacheable=True,
         ))
 
         # 3. get_site_map
@@ -103,6 +108,7 @@ class ToolRegistry:
             category="site",
             input_schema=GetSiteMapInput,
             output_schema=GetSiteMapOutput,
+            cacheable=True,
         ))
 
         # 4. create_draft_content
@@ -133,6 +139,7 @@ class ToolRegistry:
             category="prompt",
             input_schema=GetPromptActiveInput,
             output_schema=GetPromptActiveOutput,
+            cacheable=True,
         ))
 
         # 7. retrieve_evidence
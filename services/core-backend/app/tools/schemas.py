@@ -51,7 +51,8 @@ class ToolCallResponse(BaseModel):
     """工具调用响应"""
 
     success: bool
-    output: Optional[Dict[str, Any]] = None
+    # 工具输出模型直接挂在响应上，由 Pydantic 序列化器一次遍历输出；结果缓存命中时为字典
+    output: Any = None
     error: Optional[str] = None
     error_type: Optional[str] = None
     audit: ToolAudit
@@ -116,6 +117,35 @@ class GetNPCProfileOutput(BaseModel):
     must_cite_sources: bool
 
 
+class NPCIdentity(BaseModel):
+    """人设：身份"""
+
+    era: Optional[str] = None
+    role: Optional[str] = None
+    background: Optional[str] = None
+
+
+class NPCPersonality(BaseModel):
+    """人设：性格"""
+
+    traits: List[str] = Field(default_factory=list)
+    speaking_style: Optional[str] = None
+
+
+class NPCConstraints(BaseModel):
+    """人设：约束"""
+
+    forbidden_topics: List[str] = Field(default_factory=list)
+
+
+class NPCPersona(BaseModel):
+    """NPC 人设（npc_profiles.persona JSONB 的结构化视图，未知字段忽略）"""
+
+    identity: NPCIdentity = Field(default_factory=NPCIdentity)
+    personality: NPCPersonality = Field(default_factory=NPCPersonality)
+    constraints: NPCConstraints = Field(default_factory=NPCConstraints)
+
+
 class SearchContentInput(BaseModel):
     """search_content 输入"""
 
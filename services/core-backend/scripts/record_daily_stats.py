@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+站点每日统计快照定时任务
+
+在低峰期为全部启用站点写入当日统计快照，统计接口只读取 site_stats_daily。
+重复执行是安全的：当日已有快照的站点会被跳过。
+
+用法：
+    python scripts/record_daily_stats.py                    # 记录今天
+    python scripts/record_daily_stats.py --date 2026-10-18  # 补录指定日期
+
+crontab 示例（每天 00:05）：
+    5 0 * * * cd /app && python scripts/record_daily_stats.py
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import date
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database.engine import async_session_maker, engine
+from app.services.site_manager import SiteManager
+
+
+async def main(stat_date: date) -> None:
+    async with async_session_maker() as session:
+        recorded = await SiteManager(session).record_all_daily_stats(stat_date)
+    await engine.dispose()
+    print(f"✅ {stat_date.isoformat()}: 写入 {recorded} 个站点快照")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="记录站点每日统计快照")
+    parser.add_argument(
+        "--date",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="统计日期（YYYY-MM-DD），默认今天",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.date))
@@ -286,6 +286,8 @@ async def main(collection: str, tenant_id: str, site_id: str):
             if info:
                 print(f"  - {name}: {info['points_count']} 条向量")
 
+    await vector_store.close()
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="数据向量化工具")
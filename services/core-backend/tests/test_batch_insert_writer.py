@@ -0,0 +1,82 @@
+"""
+审计批量写入器测试
+
+用假会话替换 async_session_maker，验证整批失败后逐条写入只丢弃出错的记录
+"""
+
+from contextlib import asynccontextmanager
+
+import pytest
+
+import app.services.batch_insert_writer as writer_module
+from app.services.batch_insert_writer import BatchInsertWriter
+
+
+class FakeSession:
+    """记录已提交的行；SAVEPOINT 回滚时丢弃其中的写入"""
+
+    def __init__(self, committed):
+        self.committed = committed
+        self.pending = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        mark = len(self.pending)
+        try:
+            yield
+        except Exception:
+            del self.pending[mark:]
+            raise
+
+    async def commit(self):
+        self.committed.extend(self.pending)
+
+
+class FakeModel:
+    __tablename__ = "fake_records"
+
+
+class FakeWriter(BatchInsertWriter):
+    """含 bad 字段的记录写入失败"""
+
+    model = FakeModel
+
+    async def _insert(self, session, batch):
+        if any(record.get("bad") for record in batch):
+            raise ValueError("invalid row")
+        session.pending.extend(batch)
+
+
+@pytest.fixture
+def committed(monkeypatch):
+    rows = []
+    monkeypatch.setattr(writer_module, "async_session_maker", lambda: FakeSession(rows))
+    return rows
+
+
+async def test_batch_written_in_one_insert(committed):
+    """整批成功时一次写入"""
+    await FakeWriter()._write([{"id": 1}, {"id": 2}])
+    assert committed == [{"id": 1}, {"id": 2}]
+
+
+async def test_bad_row_does_not_drop_batch(committed):
+    """单条坏记录只丢弃自身，同批其他记录逐条写入"""
+    await FakeWriter()._write([{"id": 1}, {"id": 2, "bad": True}, {"id": 3}])
+    assert committed == [{"id": 1}, {"id": 3}]
+
+
+async def test_queue_flushes_on_shutdown(committed):
+    """关闭时写完队列中剩余记录"""
+    writer = FakeWriter(flush_interval=0.01)
+    writer.start()
+    assert writer.enqueue({"id": 1})
+    assert writer.enqueue({"id": 2, "bad": True})
+    await writer.flush_on_shutdown()
+    assert committed == [{"id": 1}]
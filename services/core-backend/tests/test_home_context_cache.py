@@ -0,0 +1,73 @@
+"""
+首页上下文缓存测试
+
+两个 MultiLevelCache 实例模拟两个 worker，共享内存 Redis，
+验证一个 worker 失效后另一个 worker 不再读到本地旧值
+"""
+
+import time
+from uuid import uuid4
+
+import app.services.recommendation as recommendation_module
+from app.services.cache import CacheKeys, MultiLevelCache
+from app.services.recommendation import HOME_CONTEXT_BUCKET_SECONDS, invalidate_home_context
+
+VISITOR_ID = uuid4()
+
+
+class FakeRedis:
+    """只实现 get / setex / delete 的内存 Redis"""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+
+def _worker(redis_client: FakeRedis) -> MultiLevelCache:
+    cache = MultiLevelCache()
+    cache._redis = redis_client
+    return cache
+
+
+async def test_invalidation_visible_to_other_workers(monkeypatch):
+    """worker A 清除首页上下文后，worker B 重新构建而不是返回本地旧值"""
+    redis_client = FakeRedis()
+    worker_a, worker_b = _worker(redis_client), _worker(redis_client)
+    key = CacheKeys.home_context(
+        "yantian", "yantian-main", str(VISITOR_ID),
+        int(time.time() // HOME_CONTEXT_BUCKET_SECONDS),
+    )
+    builds = []
+
+    async def build():
+        builds.append(len(builds))
+        return {"version": len(builds)}
+
+    first = await worker_b.get_or_set(key, build, use_l1=False)
+    monkeypatch.setattr(recommendation_module, "get_cache", lambda: worker_a)
+    await invalidate_home_context("yantian", "yantian-main", VISITOR_ID)
+    second = await worker_b.get_or_set(key, build, use_l1=False)
+
+    assert first == {"version": 1}
+    assert second == {"version": 2}
+
+
+async def test_l1_enabled_by_default():
+    """默认仍回填 L1，Redis 清空后本进程继续命中本地值"""
+    redis_client = FakeRedis()
+    cache = _worker(redis_client)
+
+    await cache.set("k", {"v": 1})
+    redis_client.store.clear()
+
+    assert await cache.get("k") == {"v": 1}
+    assert await cache.get("k", use_l1=False) is None
@@ -0,0 +1,35 @@
+"""
+混合推荐引擎测试
+
+覆盖不依赖数据库与向量库的纯函数部分
+"""
+
+from app.services.hybrid_recommender import _score_rule_quest
+
+
+class TestScoreRuleQuest:
+    """规则打分内核测试"""
+
+    def test_base_score(self):
+        """无匹配时返回基础分"""
+        score, reason = _score_rule_quest(["历史"], "medium", frozenset({"摄影"}), 3)
+        assert score == 0.5
+        assert reason == "推荐任务"
+
+    def test_tag_match(self):
+        """标签命中加分"""
+        score, reason = _score_rule_quest(["摄影", "历史"], "medium", frozenset({"摄影"}), 3)
+        assert score == 0.7
+        assert reason == "符合您的兴趣：摄影"
+
+    def test_newbie_easy_quest(self):
+        """新手 + 简单任务，难度理由覆盖标签理由"""
+        score, reason = _score_rule_quest(["摄影"], "easy", frozenset({"摄影"}), 0)
+        assert abs(score - 0.8) < 1e-9
+        assert reason == "适合新手的任务"
+
+    def test_veteran_hard_quest(self):
+        """资深游客 + 困难任务"""
+        score, reason = _score_rule_quest(None, "hard", frozenset(), 5)
+        assert abs(score - 0.6) < 1e-9
+        assert reason == "挑战性任务"
@@ -0,0 +1,82 @@
+"""
+MCP 工具输入校验模型测试
+
+覆盖 JSON Schema -> Pydantic 模型的编译结果
+"""
+
+from datetime import date
+from uuid import UUID
+
+import pytest
+from pydantic import ValidationError
+
+from app.services.mcp_registry import _compile_input_validator
+
+SCHEMA = {
+    "type": "object",
+    "required": ["query", "npc_id"],
+    "properties": {
+        "query": {"type": "string"},
+        "npc_id": {"type": "string", "format": "uuid"},
+        "visit_date": {"type": "string", "format": "date"},
+        "top_k": {"type": "integer", "default": 5},
+        "domains": {"type": "array", "items": {"type": "string"}},
+        "verified_only": {"type": "boolean"},
+    },
+}
+NPC_ID = "7d4a6c1e-2f3b-4c5d-8e9f-0a1b2c3d4e5f"
+
+
+@pytest.fixture(scope="module")
+def validator():
+    return _compile_input_validator("knowledge.search", SCHEMA)
+
+
+def test_required_and_formats(validator):
+    """必填字段与 uuid / date 格式解析为对应类型"""
+    params = validator.model_validate(
+        {"query": "严氏", "npc_id": NPC_ID, "visit_date": "2026-04-05"}
+    )
+    assert params.query == "严氏"
+    assert params.npc_id == UUID(NPC_ID)
+    assert params.visit_date == date(2026, 4, 5)
+
+
+def test_optional_and_default(validator):
+    """可选字段缺省为 None，带 default 的字段使用默认值"""
+    params = validator.model_validate({"query": "严氏", "npc_id": NPC_ID})
+    assert params.top_k == 5
+    assert params.domains is None
+    assert params.verified_only is None
+    # 只回写调用方传入的字段
+    assert params.model_dump(mode="json", exclude_unset=True) == {
+        "query": "严氏",
+        "npc_id": NPC_ID,
+    }
+
+
+def test_extra_fields_allowed(validator):
+    """未声明的字段原样保留"""
+    params = validator.model_validate({"query": "严氏", "npc_id": NPC_ID, "trace": "t1"})
+    assert params.model_dump(exclude_unset=True)["trace"] == "t1"
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"npc_id": NPC_ID},  # 缺少必填字段
+        {"query": "严氏", "npc_id": "not-a-uuid"},
+        {"query": "严氏", "npc_id": NPC_ID, "visit_date": "清明"},
+        {"query": "严氏", "npc_id": NPC_ID, "top_k": "many"},
+    ],
+)
+def test_rejected_payload(validator, payload):
+    """缺字段或格式错误时拒绝"""
+    with pytest.raises(ValidationError):
+        validator.model_validate(payload)
+
+
+def test_non_object_schema_has_no_validator():
+    """非 object 或无属性的 schema 不编译校验模型"""
+    assert _compile_input_validator("noop", {"type": "object"}) is None
+    assert _compile_input_validator("noop", {"type": "string"}) is None
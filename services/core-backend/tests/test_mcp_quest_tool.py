@@ -0,0 +1,42 @@
+"""
+MCP quest.get_available 工具测试
+
+用记录语句的假会话执行处理器，并按 PostgreSQL 方言编译实际构建的语句
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.tool_executor import ToolExecutor
+
+
+class RecordingSession:
+    """记录执行的语句，返回空结果"""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(stmt)
+        return SimpleNamespace(all=lambda: [])
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{}, {"scene_id": "scene-1"}, {"scene_id": "scene-1", "category": "farming"}],
+)
+async def test_quest_get_available_builds_statement(params):
+    """各过滤组合下语句都能构建并编译，无匹配时返回空列表"""
+    session = RecordingSession()
+    executor = ToolExecutor(db=session, ctx=SimpleNamespace(site_id="yantian-main"))
+
+    result = await executor._tool_quest_get_available(params)
+
+    assert result == {"quests": []}
+    (stmt,) = session.statements
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "quests.time_limit_minutes" in sql
+    if "category" in params:
+        assert "quests.category" in sql
@@ -0,0 +1,45 @@
+"""
+研学任务服务测试
+
+覆盖不依赖数据库的步骤校验部分
+"""
+
+from app.services.quest_service import _within_any, _within_radius
+
+
+class TestWithinRadius:
+    """地理围栏距离判断测试"""
+
+    def test_same_point(self):
+        """同一坐标在任意半径内"""
+        assert _within_radius(29.5, 118.0, 29.5, 118.0, 1)
+
+    def test_inside_radius(self):
+        """约 30 米外的点落在 50 米半径内"""
+        assert _within_radius(29.5, 118.0, 29.5, 118.0003, 50)
+
+    def test_outside_radius(self):
+        """约 100 米外的点不在 50 米半径内"""
+        assert not _within_radius(29.5, 118.0, 29.5, 118.001, 50)
+
+    def test_latitude_prefilter(self):
+        """纬度差明显超出半径时直接判定为不在范围内"""
+        assert not _within_radius(29.5, 118.0, 30.5, 118.0, 50)
+
+
+class TestWithinAny:
+    """多目标围栏测试"""
+
+    def test_any_target_matches(self):
+        """命中任一目标即通过"""
+        targets = [
+            {"lat": 30.5, "lng": 118.0},
+            {"lat": 29.5, "lng": 118.0003},
+        ]
+        assert _within_any(29.5, 118.0, targets, 50)
+
+    def test_target_radius_overrides_default(self):
+        """目标自带半径优先于步骤默认半径"""
+        targets = [{"lat": 29.5, "lng": 118.001, "radius_meters": 200}]
+        assert _within_any(29.5, 118.0, targets, 50)
+        assert not _within_any(29.5, 118.0, [{"lat": 29.5, "lng": 118.001}], 50)
@@ -0,0 +1,58 @@
+"""
+首页推荐查询测试
+
+只构建并按 PostgreSQL 方言编译语句，不连接数据库
+"""
+
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.recommendation import RecommendationService, _json_rows
+
+VISITOR_ID = uuid4()
+
+
+@pytest.fixture
+def service():
+    return RecommendationService(session=None)
+
+
+def _compile(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.parametrize("visitor_id", [None, VISITOR_ID])
+def test_recommended_quests_query_compiles(service, visitor_id):
+    """推荐任务查询可编译；有游客时经会话关联排除已完成任务"""
+    sql = _compile(service._recommended_quests_query("yantian", "yantian-main", visitor_id))
+    assert "estimated_duration_minutes" in sql
+    if visitor_id:
+        assert "NOT (EXISTS" in sql
+        assert "conversations.session_id = quest_submissions.session_id" in sql
+
+
+def test_achievement_hints_query_compiles(service):
+    """成就提示查询可编译，进度取画像中真实存在的计数列"""
+    sql = _compile(service._achievement_hints_query("yantian", "yantian-main", VISITOR_ID))
+    assert "achievements.icon_url AS icon" in sql
+    assert "visitor_profiles.conversation_count" in sql
+    assert "visitor_profiles.user_id" in sql
+
+
+def test_home_widgets_aggregate_compiles(service):
+    """两个组件聚合成的 json_agg 子查询可编译"""
+    quests = _json_rows(
+        service._recommended_quests_query("yantian", "yantian-main", VISITOR_ID),
+        "quests",
+        "sort_order",
+    )
+    hints = _json_rows(
+        service._achievement_hints_query("yantian", "yantian-main", VISITOR_ID),
+        "hints",
+        "progress_pct",
+        desc=True,
+    )
+    assert "json_agg" in _compile(quests)
+    assert "json_agg" in _compile(hints)
@@ -0,0 +1,118 @@
+"""
+工具结果缓存测试
+
+用内存 Redis 与假会话验证只读工具的缓存命中、未命中、Redis 故障与降级结果不缓存
+"""
+
+import pytest
+from sqlalchemy.sql.dml import Insert
+
+import app.tools.executor as executor_module
+from app.tools.executor import ToolExecutor
+from app.tools.schemas import ContentItem, SearchContentOutput, ToolCallRequest, ToolContext
+
+
+class FakeRedis:
+    """只实现 get / setex 的内存 Redis"""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.store[key] = value
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+
+class FakeSession:
+    """假会话：审计写入直接成功，其余查询失败以模拟数据库异常"""
+
+    async def execute(self, stmt, params=None):
+        if isinstance(stmt, Insert):
+            return FakeResult(params or [])
+        raise RuntimeError("db unavailable")
+
+
+def _request(query: str = "严氏") -> ToolCallRequest:
+    return ToolCallRequest(
+        tool_name="search_content",
+        input={"query": query, "limit": 5},
+        context=ToolContext(tenant_id="yantian", site_id="yantian-main", trace_id="test-trace"),
+    )
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = FakeRedis()
+
+    async def get_redis():
+        return client
+
+    monkeypatch.setattr(executor_module, "get_redis", get_redis)
+    return client
+
+
+def _stub_search(executor: ToolExecutor) -> list:
+    """替换 search_content 实现，返回调用记录"""
+    calls = []
+
+    async def handler(input, ctx):
+        calls.append(input.query)
+        item = ContentItem.model_construct(
+            id="c1", content_type="knowledge", title="严氏宗祠", summary=None,
+            body="", tags=[], domains=[], credibility_score=1.0, verified=True,
+        )
+        return SearchContentOutput(items=[item], total=1, query=input.query)
+
+    executor._handle_search_content = handler
+    return calls
+
+
+async def test_cache_miss_then_hit(redis_client):
+    """首次调用执行工具并写缓存，相同 payload 再次调用直接命中"""
+    executor = ToolExecutor(session=FakeSession())
+    calls = _stub_search(executor)
+
+    first = await executor.execute(_request())
+    second = await executor.execute(_request())
+
+    assert first.success and second.success
+    assert calls == ["严氏"]
+    assert len(redis_client.store) == 1
+    assert second.output == first.output.model_dump(mode="json")
+
+
+async def test_redis_error_treated_as_miss(monkeypatch):
+    """Redis 不可用时照常执行工具，不影响调用结果"""
+    async def get_redis():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(executor_module, "get_redis", get_redis)
+    executor = ToolExecutor(session=FakeSession())
+    calls = _stub_search(executor)
+
+    first = await executor.execute(_request())
+    second = await executor.execute(_request())
+
+    assert first.success and second.success
+    assert calls == ["严氏", "严氏"]
+
+
+async def test_degraded_result_not_cached(redis_client):
+    """查询失败时返回的空结果不写入缓存"""
+    executor = ToolExecutor(session=FakeSession())
+
+    response = await executor.execute(_request())
+
+    assert response.success
+    assert response.output.total == 0
+    assert redis_client.store == {}
@@ -0,0 +1,55 @@
+"""
+向量检索测试
+
+使用 qdrant-client 本地内存模式，验证 search / search_batch 调用的客户端接口与结果转换
+"""
+
+import pytest
+from qdrant_client import AsyncQdrantClient, models
+
+from app.services.vector_store import VectorStore
+
+COLLECTION = "test_vectors"
+
+
+@pytest.fixture
+async def store():
+    client = AsyncQdrantClient(location=":memory:")
+    await client.create_collection(
+        COLLECTION,
+        vectors_config=models.VectorParams(size=2, distance=models.Distance.COSINE),
+    )
+    await client.upsert(
+        COLLECTION,
+        points=[
+            models.PointStruct(id=1, vector=[1.0, 0.0], payload={"content": "稻", "type": "crop"}),
+            models.PointStruct(id=2, vector=[0.0, 1.0], payload={"content": "茶", "type": "drink"}),
+        ],
+    )
+    vector_store = VectorStore(embedding_service=object())
+    vector_store._client = client
+    yield vector_store
+    await client.close()
+
+
+async def test_search_with_query_vector(store):
+    """单条检索返回按分数过滤的结果"""
+    results = await store.search(COLLECTION, query_vector=[1.0, 0.1], score_threshold=0.5)
+
+    assert [r.id for r in results] == ["1"]
+    assert results[0].content == "稻"
+    assert results[0].metadata == {"type": "crop"}
+
+
+async def test_search_batch_keeps_query_order(store):
+    """批量检索结果与查询一一对应，过滤条件逐条生效"""
+    results = await store.search_batch(
+        COLLECTION,
+        ["稻谷", "茶叶"],
+        filters=[None, {"type": "drink"}],
+        score_threshold=0.0,
+        query_vectors=[[1.0, 0.0], [1.0, 0.2]],
+    )
+
+    assert [r.id for r in results[0]][0] == "1"
+    assert [r.id for r in results[1]] == ["2"]